@@ -0,0 +1,329 @@
+"""
+Агрегати вхідних платежів для фінансових звітів: сума і кількість по
+годинах і днях (Київ) у розрізі токена, відправника і гаманця-отримувача.
+
+- Новий переказ оновлює шість кошиків (година/доба × токен/відправник/
+  гаманець) у пам'яті — O(1), без читання інших переказів; у SQLite
+  змінені кошики записуються одним commit() за цикл
+- Рядок на кошик: (період, початок, токен, розріз, ключ) -> сума, кількість.
+  Погодинні кошики старші за AGG_HOURLY_DAYS видаляються, добові лишаються
+- Ключі врахованих переказів зберігаються (таблиця counted): повторна
+  поява того самого переказу (re-scan звірки, backfill) не рахується вдруге
+- Реорганізації: перекази з ще не остаточних блоків лежать у журналі разом
+  із хешем блоку. Бот раз на цикл звіряє хеші цих блоків з вузлом; якщо
+  блок змінився, внески його переказів віднімаються з кошиків і ключ
+  позначається відкликаним, а повторно знайдені в новому блоці —
+  враховуються знову. Записи журналу з остаточних блоків видаляються
+- Підсумок за добу (digest) будується лише з кошиків, без RPC
+
+Запуск:
+    python aggregates.py day [YYYY-MM-DD]   — підсумок за добу (за замовчуванням учора)
+    python aggregates.py hours [N]          — суми по годинах за останні N годин
+    python aggregates.py rebuild            — перебудувати з TRANSFER_STORE_DB
+"""
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from transfer import INCOMING, Transfer
+from config import AGGREGATES_DB, AGG_HOURLY_DAYS, DIGEST_TOP, TRANSFER_STORE_DB, TOKENS_CACHE_FILE
+
+KYIV = ZoneInfo("Europe/Kyiv")
+HOUR = "h"
+DAY = "d"
+TOKEN = "token"
+SENDER = "sender"
+WALLET = "wallet"
+_ZERO = Decimal(0)
+_MEMORY_BUCKETS = 20_000  # кошиків у пам'яті, після яких лишаються лише останні дві доби
+
+# (період, початок, токен, розріз, ключ); ключ розрізу "token" — порожній
+BucketKey = Tuple[str, int, str, str, str]
+# (мережа, блок, хеш блоку, час, токен, відправник, отримувач, сума)
+JournalEntry = Tuple[str, int, bytes, int, str, str, str, Decimal]
+
+
+@lru_cache(maxsize=4096)
+def _day_start(hour: int) -> int:
+    """Початок доби за Києвом для години hour (unix-час // 3600)."""
+    day = datetime.fromtimestamp(hour * 3600, KYIV).replace(hour=0, minute=0, second=0)
+    return int(day.timestamp())
+
+
+def day_start(day: datetime) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=KYIV).timestamp())
+
+
+def bucket_keys(timestamp: int, symbol: str, sender: str, wallet: str) -> List[BucketKey]:
+    hour = timestamp // 3600
+    starts = ((HOUR, hour * 3600), (DAY, _day_start(hour)))
+    dims = ((TOKEN, ""), (SENDER, sender), (WALLET, wallet))
+    return [(period, start, symbol, dim, key) for period, start in starts for dim, key in dims]
+
+
+class Aggregates:
+    def __init__(self, path: str = AGGREGATES_DB):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        # total — TEXT: точна Decimal-сума в токенах
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " period TEXT NOT NULL, start INTEGER NOT NULL, symbol TEXT NOT NULL,"
+            " dim TEXT NOT NULL, key TEXT NOT NULL, total TEXT NOT NULL, count INTEGER NOT NULL,"
+            " PRIMARY KEY (period, dim, start, symbol, key)) WITHOUT ROWID"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            " tx_key TEXT PRIMARY KEY, chain TEXT NOT NULL, block_number INTEGER NOT NULL,"
+            " block_hash BLOB, timestamp INTEGER NOT NULL, symbol TEXT NOT NULL,"
+            " from_addr TEXT NOT NULL, to_addr TEXT NOT NULL, amount TEXT NOT NULL) WITHOUT ROWID"
+        )
+        created = not self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counted'"
+        ).fetchone()
+        # retracted = 1 — внесок відкликала реорганізація, переказ можна врахувати знову
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS counted ("
+            " tx_key TEXT PRIMARY KEY, retracted INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID"
+        )
+        if created:  # база до таблиці counted: враховані — принаймні ті, що в журналі
+            self.db.execute("INSERT OR IGNORE INTO counted (tx_key) SELECT tx_key FROM journal")
+        self.db.commit()
+        self.buckets: Dict[BucketKey, List] = {}  # кошик -> [сума, кількість]; лише ті, до яких зверталися
+        self.dirty: Set[BucketKey] = set()
+        self.journal: Dict[str, JournalEntry] = {
+            row[0]: (row[1], row[2], row[3] or b"", row[4], row[5], row[6], row[7], Decimal(row[8]))
+            for row in self.db.execute("SELECT * FROM journal")
+        }
+
+    # --- оновлення ---
+
+    def _bucket(self, key: BucketKey) -> List:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            row = self.db.execute(
+                "SELECT total, count FROM buckets WHERE period = ? AND start = ? AND symbol = ? AND dim = ? AND key = ?",
+                key,
+            ).fetchone()
+            bucket = self.buckets[key] = [Decimal(row[0]), row[1]] if row else [_ZERO, 0]
+        return bucket
+
+    def _apply(self, entry: JournalEntry, sign: int):
+        amount = entry[7] if sign > 0 else -entry[7]
+        for key in bucket_keys(*entry[3:7]):
+            bucket = self._bucket(key)
+            bucket[0] += amount
+            bucket[1] += sign
+            self.dirty.add(key)
+
+    def add(self, tx: Transfer, known: bool = False) -> bool:
+        """
+        Враховує вхідний переказ, що пройшов фільтри токена і мінімальної
+        суми. Переказ з таблиці counted враховується знову, лише якщо його
+        внесок відкликала реорганізація. known — переказ уже оброблявся
+        (processed_txs): без запису в counted (оброблений до появи таблиці)
+        він не рахується.
+        """
+        if tx.direction != INCOMING or tx.key in self.journal:
+            return False
+        row = self.db.execute("SELECT retracted FROM counted WHERE tx_key = ?", (tx.key,)).fetchone()
+        if (row is None and known) or (row is not None and not row[0]):
+            return False
+        entry = (
+            tx.chain, tx.block_number, tx.block_hash, tx.timestamp,
+            tx.symbol.upper(), tx.from_address, tx.to_address, tx.amount,
+        )
+        self._apply(entry, 1)
+        self.journal[tx.key] = entry
+        self.db.execute(
+            "INSERT OR REPLACE INTO journal VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (tx.key, *entry[:7], str(entry[7])),
+        )
+        self.db.execute("INSERT OR REPLACE INTO counted VALUES (?, 0)", (tx.key,))
+        return True
+
+    def unconfirmed_blocks(self, chain: str, final_block: int) -> Dict[int, bytes]:
+        """
+        Блоки мережі з журналу, що ще можуть змінитися: {номер: хеш}.
+        Остаточні записи видаляються з журналу; їхні ключі лишаються в counted.
+        """
+        final = [k for k, e in self.journal.items() if e[0] == chain and e[1] <= final_block]
+        for k in final:
+            del self.journal[k]
+        if final:
+            self.db.execute("DELETE FROM journal WHERE chain = ? AND block_number <= ?", (chain, final_block))
+        return {e[1]: e[2] for e in self.journal.values() if e[0] == chain and e[2]}
+
+    def retract_blocks(self, chain: str, blocks: Set[int]) -> List[str]:
+        """Віднімає внески переказів зі змінених блоків; повертає їхні ключі."""
+        keys = [k for k, e in self.journal.items() if e[0] == chain and e[1] in blocks]
+        for k in keys:
+            self._apply(self.journal.pop(k), -1)
+        self.db.executemany("DELETE FROM journal WHERE tx_key = ?", [(k,) for k in keys])
+        self.db.executemany("UPDATE counted SET retracted = 1 WHERE tx_key = ?", [(k,) for k in keys])
+        return keys
+
+    def commit(self):
+        """Змінені кошики і журнал — однією транзакцією SQLite."""
+        upsert, empty = [], []
+        for key in self.dirty:
+            total, count = self.buckets[key]
+            if count:
+                upsert.append((*key, str(total), count))
+            else:
+                empty.append(key)
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?, ?)", upsert)
+            self.db.executemany(
+                "DELETE FROM buckets WHERE period = ? AND start = ? AND symbol = ? AND dim = ? AND key = ?", empty,
+            )
+        self.dirty.clear()
+        if len(self.buckets) > _MEMORY_BUCKETS:
+            horizon = time.time() - 2 * 86400
+            self.buckets = {k: v for k, v in self.buckets.items() if k[1] >= horizon}
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Видаляє погодинні кошики, старші за AGG_HOURLY_DAYS."""
+        self.commit()
+        horizon = int((now or time.time()) - AGG_HOURLY_DAYS * 86400)
+        with self.db:
+            removed = self.db.execute("DELETE FROM buckets WHERE period = ? AND start < ?", (HOUR, horizon)).rowcount
+        self.buckets = {k: v for k, v in self.buckets.items() if k[0] != HOUR or k[1] >= horizon}
+        return removed
+
+    # --- звіти (лише з кошиків) ---
+
+    def totals(self, period: str, dim: str, start: int, end: int) -> Dict[Tuple[str, str], List]:
+        """{(токен, ключ): [сума, кількість]} за кошики [start, end)."""
+        self.commit()
+        out: Dict[Tuple[str, str], List] = defaultdict(lambda: [_ZERO, 0])
+        for symbol, key, total, count in self.db.execute(
+            "SELECT symbol, key, total, count FROM buckets WHERE period = ? AND dim = ? AND start >= ? AND start < ?",
+            (period, dim, start, end),
+        ):
+            item = out[(symbol, key)]
+            item[0] += Decimal(total)
+            item[1] += count
+        return dict(out)
+
+    def hourly(self, start: int, end: int) -> List[Tuple[int, str, Decimal, int]]:
+        """(початок години, токен, сума, кількість) за [start, end) у порядку часу."""
+        self.commit()
+        return [
+            (row[0], row[1], Decimal(row[2]), row[3])
+            for row in self.db.execute(
+                "SELECT start, symbol, total, count FROM buckets"
+                " WHERE period = ? AND dim = ? AND start >= ? AND start < ? ORDER BY start, symbol",
+                (HOUR, TOKEN, start, end),
+            )
+        ]
+
+    def digest(self, day: datetime, top: int = DIGEST_TOP) -> str:
+        """Підсумок за добу (Київ) для Telegram: суми по токенах, топ гаманців і відправників."""
+        start = day_start(day)
+        end = day_start(day + timedelta(days=1))
+        title = f"📊 <b>Підсумок за {day.strftime('%d.%m.%Y')}</b> (Київ)"
+        tokens = self.totals(DAY, TOKEN, start, end)
+        if not tokens:
+            return f"{title}\n\nПлатежів не було."
+        lines = [title, ""]
+        for (symbol, _), (total, count) in sorted(tokens.items()):
+            lines.append(f"💰 <b>{symbol}:</b> {total:.2f} (платежів: {count})")
+        for dim, header in ((WALLET, "📥 <b>Гаманці:</b>"), (SENDER, "👤 <b>Топ відправників:</b>")):
+            rows = sorted(self.totals(DAY, dim, start, end).items(), key=lambda item: (-item[1][0], item[0]))
+            lines += ["", header]
+            for (symbol, key), (total, count) in rows[:top]:
+                lines.append(f"<code>{key}</code> — {total:.2f} {symbol} ({count})")
+        return "\n".join(lines)
+
+    def rebuild(self, transfers: List[Transfer], accept: Optional[Callable[[Transfer], bool]] = None) -> int:
+        """
+        Кошики заново з переліку переказів (сховище); журнал очищується.
+        accept — фільтр переказів (токен і мінімальна сума, як у бота).
+        """
+        with self.db:
+            self.db.execute("DELETE FROM buckets")
+            self.db.execute("DELETE FROM journal")
+            self.db.execute("DELETE FROM counted")
+        self.buckets.clear()
+        self.dirty.clear()
+        self.journal.clear()
+        counted = 0
+        for tx in transfers:
+            if tx.direction == INCOMING and (accept is None or accept(tx)):
+                entry = (tx.chain, tx.block_number, tx.block_hash, tx.timestamp,
+                         tx.symbol.upper(), tx.from_address, tx.to_address, tx.amount)
+                self._apply(entry, 1)
+                self.db.execute("INSERT OR REPLACE INTO counted VALUES (?, 0)", (tx.key,))
+                counted += 1
+        self.commit()
+        return counted
+
+
+def token_filter() -> Callable[[Transfer], bool]:
+    """Токен з реєстру мережі і сума не менша за його мінімум; метадані — лише з кешу, без RPC."""
+    from chains import get_chain, state_file
+    from tokens import TokenRegistry
+
+    registries: Dict[str, TokenRegistry] = {}
+
+    def accept(tx: Transfer) -> bool:
+        registry = registries.get(tx.chain)
+        if registry is None:
+            chain = get_chain(tx.chain)
+            registry = TokenRegistry(chain.tokens, state_file(TOKENS_CACHE_FILE, chain.key), chain.native_symbol)
+            registry._fill(registry._load_cache())
+            registries[tx.chain] = registry
+        token = registry.get(tx.contract)
+        return token is not None and tx.amount >= token.min_amount
+
+    return accept
+
+
+def _print_hours(aggregates: Aggregates, hours: int):
+    end = (int(time.time()) // 3600 + 1) * 3600
+    for start, symbol, total, count in aggregates.hourly(end - hours * 3600, end):
+        stamp = datetime.fromtimestamp(start, KYIV).strftime("%Y-%m-%d %H:00")
+        print(f"{stamp}  {total:>14.2f} {symbol:<5} ({count})")
+
+
+def main():
+    commands = ("day", "hours", "rebuild")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        return
+    if not AGGREGATES_DB:
+        print("❌ Не задано AGGREGATES_DB")
+        return
+    aggregates = Aggregates()
+    cmd, args = sys.argv[1], sys.argv[2:]
+    t0 = time.perf_counter()
+    try:
+        if cmd == "day":
+            day = (datetime.strptime(args[0], "%Y-%m-%d") if args
+                   else datetime.now(KYIV) - timedelta(days=1))
+            print(aggregates.digest(day))
+        elif cmd == "hours":
+            _print_hours(aggregates, int(args[0]) if args else 24)
+        else:
+            if not TRANSFER_STORE_DB:
+                print("❌ Не задано TRANSFER_STORE_DB")
+                return
+            from transfer_store import TransferStore
+
+            counted = aggregates.rebuild(TransferStore().time_range(0, int(time.time()) + 86400), token_filter())
+            print(f"✅ Враховано вхідних переказів: {counted}")
+    except ValueError as e:
+        print(f"❌ {e}\n{__doc__}")
+        return
+    print(f"⏱️ {(time.perf_counter() - t0) * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+asyncio-монітор платежів: один цикл подій, окремі задачі для
+- сканування нових блоків (AsyncBSCscanClient) — по задачі на кожну
+  мережу з CHAINS; черга доставки і processed_txs спільні
+- доставки подій з черги в канали сповіщень (sinks.py)
+- звірки балансів (reconcile.py у потоці, раз на RECONCILE_INTERVAL_SEC)
+- статусів тихого періоду (01:00-09:00 Київ)
+
+Перша мережа — основна: діагностика, звірка, рахунки, сховище і підсумок
+циклу працюють для неї. Для кожної мережі в лог пишеться відставання
+від голови ланцюга (блоків і ~секунд).
+
+Задачі живуть в одній asyncio.TaskGroup: помилка окремого циклу
+сканування чи доставки лише пишеться в лог і цикл повторюється,
+скасування монітора скасовує всі. Перед виходом недоставлені перекази
+з черги все ж надсилаються, а стан зберігається.
+
+Запуск окремо: ASYNC_RUNTIME=true python bot.py (або python async_bot.py).
+У власному asyncio-сервісі:
+    monitor = await AsyncPaymentMonitor.create()
+    task = asyncio.create_task(monitor.run())
+    ...
+    task.cancel()
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+from async_client import AsyncBSCscanClient, gather_or_cancel
+from bot import PaymentMonitorBot, QUIET_START_MESSAGE, QUIET_END_MESSAGE
+from chains import get_chain
+from logging_setup import flush_logs, get_logger
+from rate_limiter import CreditBudgetExceeded
+from telegram_bot import AsyncTelegramBot
+from transfer import Transfer
+from config import WALLET_ADDRESS, TRACK_NATIVE, RECONCILE_INTERVAL_SEC, CHAINS
+
+log = get_logger("async_bot")
+
+
+class AsyncPaymentMonitor(PaymentMonitorBot):
+    def __init__(
+        self,
+        client: AsyncBSCscanClient,
+        telegram: AsyncTelegramBot,
+        others: Optional[List[AsyncBSCscanClient]] = None,
+    ):
+        # Без мережі: підключені клієнти передаються готовими, старт — у startup_async()
+        self._init_started = time.monotonic()
+        self.bscscan = client
+        self.telegram = telegram
+        self.start_blocks: Dict[str, Optional[int]] = {}  # мережа -> останній перевірений блок
+        self.lag: Dict[str, int] = {}  # мережа -> відставання від голови на початку циклу, блоків
+        self._init_state()
+        for other in others or []:
+            self.clients[other.chain.key] = other
+        self.queue: "asyncio.Queue[Optional[List[Transfer]]]" = asyncio.Queue()
+        self._awake = asyncio.Event()  # встановлена поза тихим періодом
+        self._reconcile_lock = asyncio.Lock()
+
+    @property
+    def start_block(self) -> Optional[int]:
+        """Стартовий блок основної мережі (звірка, PaymentMonitorBot)."""
+        return self.start_blocks.get(self.bscscan.chain.key)
+
+    @start_block.setter
+    def start_block(self, value: Optional[int]):
+        self.start_blocks[self.bscscan.chain.key] = value
+
+    @classmethod
+    async def create(cls) -> "AsyncPaymentMonitor":
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(AsyncBSCscanClient.create(chain=get_chain(key)) for key in CHAINS), return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await asyncio.gather(*(r.close() for r in results if not isinstance(r, BaseException)))
+            raise errors[0]
+        monitor = cls(results[0], AsyncTelegramBot(), results[1:])
+        monitor._init_started = started
+        try:
+            await monitor.startup_async()
+        except BaseException:
+            await monitor.close()
+            raise
+        return monitor
+
+    async def startup_async(self):
+        """Діагностика, стартовий блок і повідомлення про старт — паралельно."""
+        await asyncio.gather(
+            asyncio.to_thread(self.bscscan.run_diagnostic),
+            self.init_start_block_async(),
+            self._send_status_async("✅ Бот стартував! Моніторинг активний."),
+        )
+        print(f"⚡ Старт за {time.monotonic() - self._init_started:.1f} с")
+
+    async def init_start_block_async(self):
+        clients = list(self.clients.values())
+        blocks = await asyncio.gather(*(client.get_latest_block_async() for client in clients))
+        for client, block in zip(clients, blocks):
+            block = block and block - client.chain.confirmations
+            self.start_blocks[client.chain.key] = block
+            if block:
+                print(f"✅ {client.tag}Стартовий блок: {block}")
+            else:
+                print(f"⚠️ {client.tag}Не вдалося отримати стартовий блок")
+        if any(blocks):
+            print(f"📌 Моніторинг почнеться з наступного блоку")
+
+    async def close(self):
+        self.notifier.close()
+        await self.telegram.close()
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+
+    async def _send_status_async(self, text: str):
+        try:
+            if not await self.telegram.send_message_async(text):
+                print(f"⚠️ Telegram: системне повідомлення не надіслано")
+        except Exception as e:
+            print(f"⚠️ Не вдалося надіслати системне повідомлення: {e}")
+
+    # =====================================================
+    #  ЗАДАЧІ
+    # =====================================================
+
+    async def run(self):
+        self.print_banner()
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._status_loop(), name="status")
+                for key, client in self.clients.items():
+                    tg.create_task(self._scan_loop(client), name=f"scan:{key}")
+                tg.create_task(self._delivery_loop(), name="delivery")
+                tg.create_task(self._reconcile_loop(), name="reconcile")
+        finally:
+            await self._drain()
+            self.save_processed_txs()
+            for client in self.clients.values():
+                client.limiter.save()
+            await self.close()
+            log.info("\n🛑 Бот зупинено")
+            flush_logs()
+
+    async def _status_loop(self):
+        """Перемикає тихий період і повідомляє про нього; сканування чекає на _awake."""
+        while True:
+            now_kyiv = self._now_kyiv()
+            in_quiet = self._is_quiet_hours(now_kyiv)
+            if in_quiet and not self.is_quiet_mode:
+                self.is_quiet_mode = True
+                self._awake.clear()
+                log.info("🌙 Тихий період: моніторинг призупинено до 09:00 (Київ)")
+                await self._send_status_async(QUIET_START_MESSAGE)
+            elif not in_quiet and self.is_quiet_mode:
+                self.is_quiet_mode = False
+                self._awake.set()
+                log.info("🌅 Моніторинг відновлено о 09:00 (Київ)")
+                await self._send_status_async(QUIET_END_MESSAGE)
+                digest = self.build_digest()
+                if digest:
+                    await self._send_status_async(digest)
+            elif not in_quiet:
+                self._awake.set()
+            await asyncio.sleep(self._seconds_to_next_transition(now_kyiv, in_quiet))
+
+    async def _scan_loop(self, client: AsyncBSCscanClient):
+        """Цикл однієї мережі; повтор доставки, рахунки і підсумок — лише в циклі основної."""
+        primary = client is self.bscscan
+        while True:
+            await self._awake.wait()
+            try:
+                client.limiter.start_cycle()
+                if primary:
+                    self.notifier.start_cycle()
+                await self.check_new_transactions_async(client)
+                if primary:
+                    if self.notifier.pending:
+                        await self.queue.put(None)  # повтор непідтверджених, якщо цикл нічого не розсилав
+                    self.sweep_invoices()
+                    self.report_cycle()
+                else:
+                    if client.spam is not None:
+                        client.spam.save()
+                    client.limiter.save()
+            except Exception as e:
+                # Помилка одного циклу не має зупиняти TaskGroup (і решту мереж);
+                # курсор не зсунуто — діапазон перевіримо наступного циклу
+                log.warning("⚠️ %sПомилка циклу сканування: %r", client.tag, e)
+            interval = self.next_interval(client)
+            await asyncio.sleep(min(interval, self._seconds_to_next_transition(self._now_kyiv(), False)))
+
+    async def check_new_transactions_async(self, client: Optional[AsyncBSCscanClient] = None):
+        client = client or self.bscscan
+        chain = client.chain
+        tag = client.tag
+        log.info("\n%s\n🔍 %sПеревірка транзакцій для %s\n%s", "=" * 60, tag, WALLET_ADDRESS, "=" * 60)
+
+        head = await client.get_latest_block_async()
+        if not head:
+            log.error("❌ %sНе вдалося отримати останній блок", tag)
+            return
+        # Сканування відстає від голови на confirmations блоків мережі
+        latest_block = head - chain.confirmations
+
+        start_block = self.start_blocks.get(chain.key)
+        if not start_block:
+            self.start_blocks[chain.key] = latest_block
+            log.info("✅ %sВстановлено стартовий блок: %d", tag, latest_block)
+            return
+
+        lag = head - start_block
+        self.lag[chain.key] = lag
+        log.info(
+            "⛓ %sВідставання від голови: %d бл (~%.0f с)", tag, lag, lag * chain.block_time,
+            extra={"chain": chain.key, "lag_blocks": lag, "lag_sec": round(lag * chain.block_time, 1)},
+        )
+
+        if latest_block <= start_block:
+            log.info("⏳ %sНових блоків немає", tag)
+            return
+
+        start = start_block + 1
+        log.info("📊 %sПеревірка блоків %d - %d (%d блоків)", tag, start, latest_block, latest_block - start + 1)
+
+        try:
+            # Блоки з платежами, що змінились після реорганізації, — повторним range-сканом
+            changed = await self.check_reorgs_async(client, head)
+            scans = [client.get_new_token_transactions_async(start, latest_block)]
+            if TRACK_NATIVE:
+                scans.append(client.get_native_transactions_async(start, latest_block))
+            new_scans = len(scans)
+            if changed:
+                scans.append(client.get_token_transactions_async(min(changed), start_block))
+                if TRACK_NATIVE:
+                    scans.append(client.get_native_transactions_async(min(changed), start_block))
+            found = await gather_or_cancel(*scans)
+        except CreditBudgetExceeded as e:
+            log.warning("⛔ %s%s. Блоки %d-%d перевіримо пізніше", tag, e, start, latest_block)
+            return
+        except ConnectionError as e:
+            log.warning("⚠️ %s%s. Блоки %d-%d перевіримо пізніше", tag, e, start, latest_block)
+            return
+        transactions = [tx for txs in found[:new_scans] for tx in txs]
+        rescanned = [tx for txs in found[new_scans:] for tx in txs]
+
+        self.start_blocks[chain.key] = latest_block
+        if changed:
+            self.retract_reorged(client, changed)
+        if self.reconciler is not None and client is self.bscscan:
+            async with self._reconcile_lock:
+                self.reconciler.record(transactions)
+                self.reconciler.save()
+        await self.queue.put(rescanned + transactions)
+
+    async def check_reorgs_async(self, client: AsyncBSCscanClient, head: int) -> Set[int]:
+        """check_reorgs() для asyncio: хеші блоків — паралельними batch-запитами."""
+        if self.aggregates is None:
+            return set()
+        recorded = self.aggregates.unconfirmed_blocks(client.chain.key, head - client.chain.finality)
+        if not recorded:
+            return set()
+        current = await client.get_block_hashes_async(sorted(recorded))
+        return {bn for bn, block_hash in recorded.items() if current.get(bn) != block_hash}
+
+    async def _delivery_loop(self):
+        while True:
+            transactions = await self.queue.get()
+            try:
+                await self.process_transactions_async(transactions)
+            except Exception as e:
+                # Події, вже передані notifier, лишаються в pending — повтор наступного циклу
+                log.warning("⚠️ Помилка доставки: %r", e)
+            finally:
+                self.queue.task_done()
+
+    async def _drain(self):
+        """Доставка переказів, що лишились у черзі після скасування задач."""
+        while not self.queue.empty():
+            try:
+                await self.process_transactions_async(self.queue.get_nowait())
+            except Exception as e:
+                log.warning("⚠️ Доставка при зупинці: %s", e)
+                return
+
+    async def process_transactions_async(self, transactions: Optional[List[Transfer]]):
+        """Розсилка в потоках каналів (sinks.py), цикл подій тим часом вільний. None — лише повтор."""
+        if transactions is None:
+            self.mark_delivered(await asyncio.to_thread(self.notifier.retry))
+            return
+        events = self.build_events(*self.select_new(transactions))
+        if events or self.notifier.pending:
+            self.mark_delivered(await self.notifier.publish_async(events))
+
+    async def _reconcile_loop(self):
+        """Звірка балансів у потоці: Reconciler працює через блокуючі методи клієнта."""
+        if self.reconciler is None:
+            return
+        while True:
+            await self._awake.wait()
+            try:
+                async with self._reconcile_lock:
+                    missed = await asyncio.to_thread(self.reconciler.run, safe_block=self.start_block)
+            except CreditBudgetExceeded as e:
+                log.warning("⛔ Звірку відкладено: %s", e)
+                missed = []
+            except Exception as e:
+                log.warning("⚠️ Помилка звірки: %s", e)
+                missed = []
+            if missed:
+                log.info("🧮 Звірка знайшла %d пропущених переказів", len(missed))
+                await self.queue.put(missed)
+            await asyncio.sleep(RECONCILE_INTERVAL_SEC)
+
+
+async def run_monitor():
+    monitor = await AsyncPaymentMonitor.create()
+    await monitor.run()
+
+
+def main():
+    try:
+        asyncio.run(run_monitor())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""
+asyncio-клієнт BSC (і будь-якої мережі з chains.py): ті самі токени, список адрес, bloom-префільтр,
+спам-фільтр і розбір логів, що й у BSCscanClient, але RPC іде через
+AsyncHTTPProvider web3 і не блокує цикл подій.
+
+- Один aiohttp-сеанс на клієнт: одиничні виклики — provider.make_request,
+  batch — POST списку в тому ж сеансі
+- Спільні з блокуючим клієнтом RpcLimiter (acquire_async) і кеш ланцюга
+- Чанки get_logs — паралельно, до logs_concurrency; 413 ділить чанк навпіл
+- Час блоків для знайдених логів — пакетом заголовків, не get_block на лог
+- Тут лише транспорт: параметри запитів, bloom-відбір, спам-фільтр, розбір
+  логів, блоків і receipts — спільні методи BSCscanClient
+- Блокуючі методи BSCscanClient лишаються доступними на тому ж об'єкті
+  (reconcile.py, backfill.py працюють через них у потоках)
+- USE_LOG_FILTER не підтримується: клієнт вимикає його з попередженням
+  і працює range-сканом
+
+Використання:
+    client = await AsyncBSCscanClient.create()
+    txs = await client.get_new_token_transactions_async(start, end)
+    await client.close()
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from bscscan_client import BSCscanClient
+from chain_cache import MISS, ChainCache, shared_cache
+from chains import Chain
+from logging_setup import get_logger
+from rate_limiter import CreditBudgetExceeded, RpcLimiter, limiter_for, provider_name
+from transfer import Transfer, raw_bytes, raw_int
+from config import CONNECT_RETRIES
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+    from web3 import AsyncWeb3
+
+log = get_logger("async_client")
+
+
+def make_async_web3(rpc_url: str) -> "AsyncWeb3":
+    from web3 import AsyncWeb3  # ~1.5 с імпорту — викликається через asyncio.to_thread
+
+    return AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(rpc_url, request_kwargs={"timeout": 30}))
+
+
+async def gather_or_cancel(*aws) -> List[Any]:
+    """
+    asyncio.gather, що при першій помилці скасовує решту задач і чекає їх:
+    звичайний gather лишає їх працювати і витрачати запити вже нікому.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class AsyncBSCscanClient(BSCscanClient):
+    def __init__(self, rpc_url: str = None, chain: Optional[Chain] = None):
+        # Без мережі: підключення, профіль і токени — у connect()
+        self._setup(rpc_url, chain)
+        if self.use_log_filter:
+            log.warning("⚠️ %sUSE_LOG_FILTER не підтримується asyncio-клієнтом — працюю range-сканом", self.tag)
+            self.use_log_filter = False
+        self.aw3: Optional["AsyncWeb3"] = None
+        self._session: Optional["ClientSession"] = None
+
+    @classmethod
+    async def create(cls, rpc_url: str = None, chain: Optional[Chain] = None) -> "AsyncBSCscanClient":
+        client = cls(rpc_url, chain)
+        try:
+            await client.connect()
+        except BaseException:
+            await client.close()
+            raise
+        return client
+
+    def _make_w3(self, rpc_url: str):
+        # Блокуючий web3 створюється лише при першому зверненні до self.w3
+        self.limiter: RpcLimiter = limiter_for(rpc_url)
+        self.cache: Optional[ChainCache] = shared_cache(self.chain.key, self.chain.finality)
+        self._w3 = None
+        self._w3_future = None
+
+    async def _open(self, rpc_url: str):
+        from aiohttp import ClientSession, ClientTimeout
+
+        await self.close()
+        self._make_w3(rpc_url)
+        self.aw3 = await asyncio.to_thread(make_async_web3, rpc_url)
+        self._session = ClientSession(raise_for_status=True, timeout=ClientTimeout(total=30))
+        await self.aw3.provider.cache_async_session(self._session)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def connect(self):
+        """Підключення з повторами (1, 2, 4… с), резервні RPC мережі, профіль, токени."""
+        await self._open(self.rpc_url)
+        print(f"🔌 {self.tag}Підключення (asyncio): {self.rpc_url[:50]}...", flush=True)
+        for attempt in range(1, CONNECT_RETRIES + 1):
+            try:
+                n = await self._block_number_async()
+                print(f"✅ {self.tag}RPC OK. Блок: {n}", flush=True)
+                break
+            except CreditBudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"⚠️ {self.tag}{provider_name(self.rpc_url)} (спроба {attempt}/{CONNECT_RETRIES}): {e}", flush=True)
+                if attempt < CONNECT_RETRIES:
+                    await asyncio.sleep(2 ** (attempt - 1))
+        else:
+            for url in self.fallback_urls:
+                print(f"⚠️ {self.tag}Спробуємо резервний RPC {url[:50]}...", flush=True)
+                self.rpc_url = url
+                await self._open(self.rpc_url)
+                try:
+                    n = await self._block_number_async()
+                except Exception as e:
+                    print(f"❌ {self.tag}{e}", flush=True)
+                    continue
+                print(f"✅ {self.tag}Резервний RPC OK. Блок: {n}", flush=True)
+                break
+            else:
+                raise ConnectionError(f"{self.tag}Не вдалося підключитися до RPC")
+
+        self._apply_profile()
+        await self.tokens.resolve_async(self._rpc_batch_async, self._rpc_call_async)
+        if self.tokens.unresolved:
+            raise ConnectionError(f"Не вдалося отримати метадані токенів: {', '.join(self.tokens.unresolved)}")
+        print(f"🪙 {self.tag}Токени: {self.tokens.describe()}", flush=True)
+        if self.spam is not None:
+            self.spam.set_tokens(self.tokens)
+        self._sync_watch()
+
+    # =====================================================
+    #  ТРАНСПОРТ
+    # =====================================================
+
+    async def _rpc_call_async(self, method: str, params: Optional[list] = None) -> Any:
+        """Один JSON-RPC виклик: кеш -> limiter -> AsyncHTTPProvider."""
+        params = params or []
+        if self.cache is not None:
+            cached = self.cache.get(method, params)
+            if cached is not MISS:
+                return cached
+        await self.limiter.acquire_async(method)
+        response = await self.aw3.provider.make_request(method, params)
+        if "error" in response:
+            error = response["error"]
+            raise ValueError(error.get("message", error) if isinstance(error, dict) else error)
+        result = response.get("result")
+        if self.cache is not None:
+            self.cache.put(method, params, result)
+        return result
+
+    async def _rpc_batch_async(self, calls: List[Tuple[str, list]]) -> List[Any]:
+        """
+        _rpc_batch() для asyncio: None для елементів з помилкою, кешовані не запитуються.
+        Збій самого запиту (таймаут, aiohttp-помилка, не JSON) — ConnectionError.
+        """
+        results: List[Any] = [None] * len(calls)
+        pending = list(range(len(calls)))
+        if self.cache is not None:
+            found, pending = self.cache.lookup_batch(calls)
+            for idx, result in found.items():
+                results[idx] = result
+            if not pending:
+                return results
+
+        if not self.batch_supported:
+            # _rpc_call_async сам кешує результат
+            single = await asyncio.gather(
+                *(self._rpc_call_async(*calls[idx]) for idx in pending), return_exceptions=True,
+            )
+            for idx, result in zip(pending, single):
+                if isinstance(result, CreditBudgetExceeded):
+                    raise result
+                if not isinstance(result, BaseException):
+                    results[idx] = result
+            return results
+
+        payload = [
+            {"jsonrpc": "2.0", "id": idx, "method": calls[idx][0], "params": calls[idx][1]}
+            for idx in pending
+        ]
+        for method, count in Counter(calls[idx][0] for idx in pending).items():
+            await self.limiter.acquire_async(method, count)
+        from aiohttp import ClientError
+
+        try:
+            async with self._session.post(self.rpc_url, json=payload) as resp:
+                data = await resp.json(content_type=None)
+        except (ClientError, asyncio.TimeoutError, ValueError) as e:
+            # як у _rpc_batch: збій транспорту — ConnectionError, цикл сканування його ловить
+            raise ConnectionError(f"batch {calls[pending[0]][0]} ({len(pending)}): {e}") from e
+        if not isinstance(data, list):
+            raise ConnectionError(f"batch не підтримується: {data.get('error', data)}")
+
+        for item in data:
+            idx = item.get("id")
+            if isinstance(idx, int) and 0 <= idx < len(calls):
+                results[idx] = item.get("result")
+                if self.cache is not None:
+                    self.cache.put(calls[idx][0], calls[idx][1], results[idx])
+        return results
+
+    async def _block_number_async(self) -> int:
+        n = raw_int(await self._rpc_call_async("eth_blockNumber"))
+        if self.cache is not None:
+            self.cache.observe_head(n)
+        return n
+
+    async def get_latest_block_async(self) -> Optional[int]:
+        try:
+            return await self._block_number_async()
+        except CreditBudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"❌ {self.tag}get_latest_block: {e}", flush=True)
+            return None
+
+    async def get_block_timestamps_async(self, blocks: List[int]) -> Dict[int, int]:
+        """get_block_timestamps(): пакети заголовків паралельно; спільний кеш у пам'яті."""
+        out, missing = self._cached_block_times(blocks)
+        parts = self._batches(missing, self.header_batch)
+        fetched = await gather_or_cancel(*(self._rpc_batch_async(self._block_calls(part)) for part in parts))
+        for part, headers in zip(parts, fetched):
+            out.update(self._header_fields(part, headers, "timestamp", raw_int))
+        self._remember_block_times(out, missing)
+        return out
+
+    # =====================================================
+    #  ПОШУК ТРАНЗАКЦІЙ
+    # =====================================================
+
+    async def get_new_token_transactions_async(self, start_block: int, end_block: int) -> List[Transfer]:
+        return await self.get_token_transactions_async(start_block, end_block)
+
+    async def get_token_transactions_async(self, start_block: int, end_block: int) -> List[Transfer]:
+        start_block = max(0, start_block)
+        if start_block > end_block:
+            return []
+        self._sync_watch()
+        log.info(
+            "🔍 %sRPC: блоки %d-%d (%d)", self.tag, start_block, end_block, end_block - start_block + 1,
+            extra={"sample": self.tag + "range"},
+        )
+
+        ranges = [(start_block, end_block)]
+        if self.use_bloom and self.bloom_query is not None:
+            candidates = await self._bloom_candidate_ranges_async(start_block, end_block)
+            if candidates is not None:
+                ranges = candidates
+
+        chunks = [
+            (pos, min(pos + self.logs_chunk - 1, range_end))
+            for range_start, range_end in ranges
+            for pos in range(range_start, range_end + 1, self.logs_chunk)
+        ]
+        semaphore = asyncio.Semaphore(self.logs_concurrency)
+        pages = await gather_or_cancel(*(self._get_logs_async(a, b, semaphore) for a, b in chunks))
+
+        for logs in pages:
+            # сирі JSON-логи: topics hex-рядками, а _select_logs порівнює 32-байтові слова
+            for lg in logs:
+                lg["topics"] = [raw_bytes(t) for t in lg.get("topics") or []]
+        selected = [item for logs in pages for item in self._select_logs(logs)]
+        blocks = self._selected_blocks(selected)
+        times = await self.get_block_timestamps_async(blocks) if blocks else {}
+        txs = self._decode_selected(selected, times)
+        self._log_found(txs)
+        return txs
+
+    async def _get_logs_async(self, start: int, end: int, semaphore: asyncio.Semaphore) -> List[Any]:
+        """Логи чанку; 413 — дві половини паралельно, інша помилка — чанк пропускається (як у _rpc_get_transfers)."""
+        try:
+            async with semaphore:
+                return await self._rpc_call_async("eth_getLogs", [self._logs_filter(start, end)])
+        except CreditBudgetExceeded:
+            raise
+        except Exception as e:
+            if self._too_large(e) and end > start:
+                mid = (start + end) // 2
+                log.warning("      ⚠️ 413 — %d-%d навпіл", start, end, extra={"sample": "chunk_413"})
+                left, right = await gather_or_cancel(
+                    self._get_logs_async(start, mid, semaphore),
+                    self._get_logs_async(mid + 1, end, semaphore),
+                )
+                return left + right
+            log.warning("      ⚠️ %d-%d: %s", start, end, e, extra={"sample": "chunk_error"})
+            return []
+
+    async def _bloom_candidate_ranges_async(
+        self, start_block: int, end_block: int
+    ) -> Optional[List[Tuple[int, int]]]:
+        try:
+            blooms = await self._fetch_blooms_async(start_block, end_block)
+        except CreditBudgetExceeded:
+            raise
+        except Exception as e:
+            log.warning("      ⚠️ Bloom-префільтр: %s", e, extra={"sample": "bloom_error"})
+            return None
+        return self._candidate_ranges(start_block, end_block, blooms)
+
+    async def _fetch_blooms_async(self, start_block: int, end_block: int) -> Dict[int, bytes]:
+        parts = self._batches(list(range(start_block, end_block + 1)), self.header_batch)
+        semaphore = asyncio.Semaphore(self.logs_concurrency)
+
+        async def fetch(numbers: List[int]) -> List[Any]:
+            async with semaphore:
+                method = self._header_method
+                headers = await self._rpc_batch_async(self._bloom_calls(numbers, method))
+                if self._header_unsupported(method, headers):
+                    headers = await self._rpc_batch_async(self._bloom_calls(numbers, self._header_method))
+                return headers
+
+        blooms: Dict[int, bytes] = {}
+        for numbers, headers in zip(parts, await gather_or_cancel(*(fetch(p) for p in parts))):
+            self._read_blooms(numbers, headers, blooms)
+        return blooms
+
+    # =====================================================
+    #  BNB І ПЕРЕВІРКА ЗА ХЕШЕМ
+    # =====================================================
+
+    async def get_block_hashes_async(self, blocks: List[int]) -> Dict[int, bytes]:
+        """get_block_hashes(): пакети заголовків паралельно."""
+        parts = self._batches(blocks, self.header_batch)
+        fetched = await gather_or_cancel(*(self._rpc_batch_async(self._block_calls(part)) for part in parts))
+        out: Dict[int, bytes] = {}
+        for part, headers in zip(parts, fetched):
+            out.update(self._header_fields(part, headers, "hash", raw_bytes))
+        return out
+
+    async def get_native_transactions_async(self, start_block: int, end_block: int) -> List[Transfer]:
+        """get_native_transactions(): пакети блоків паралельно, до native_concurrency."""
+        start_block = max(0, start_block)
+        if start_block > end_block:
+            return []
+        self._sync_watch()
+        semaphore = asyncio.Semaphore(self.native_concurrency)
+
+        async def fetch(numbers: List[int]) -> List[Transfer]:
+            calls = self._block_calls(numbers, full=True)
+            try:
+                async with semaphore:
+                    blocks = await self._rpc_batch_async(calls)
+                    if None in blocks:
+                        blocks = await self._rpc_batch_async(calls)
+            except CreditBudgetExceeded:
+                raise
+            except Exception as e:
+                raise ConnectionError(f"{self.chain.native_symbol}: блоки {numbers[0]}-{numbers[-1]}: {e}")
+            return self._match_native(numbers, blocks)
+
+        batches = self._native_batches(start_block, end_block)
+        txs = [tx for found in await gather_or_cancel(*(fetch(b) for b in batches)) for tx in found]
+        self._log_native_found(txs)
+        return txs
+
+    async def check_transactions_by_hash_async(self, tx_hashes: List[str]) -> Dict[str, Optional[List[Transfer]]]:
+        """check_transactions_by_hash() для asyncio; той самий формат результату."""
+        self._sync_watch()
+        hashes = self._normalize_hashes(tx_hashes)
+        batches = self._batches(hashes, self.receipt_batch)
+        semaphore = asyncio.Semaphore(self.hash_concurrency)
+
+        async def fetch(batch: List[str]) -> List[Any]:
+            async with semaphore:
+                return await self._rpc_batch_async(self._receipt_calls(batch))
+
+        receipts: Dict[str, Any] = {}
+        for batch, results in zip(batches, await gather_or_cancel(*(fetch(b) for b in batches))):
+            receipts.update(zip(batch, results))
+
+        matched = self._match_receipts(receipts)
+        blocks = self._selected_blocks([item for found in matched.values() for item in found])
+        times = await self.get_block_timestamps_async(blocks) if blocks else {}
+        return self._decode_matched(hashes, matched, times)
+
+
+def main():
+    """python async_client.py <з_блоку> <до_блоку> — скан діапазону asyncio-клієнтом."""
+    import sys
+
+    if len(sys.argv) < 3:
+        print(main.__doc__)
+        return
+
+    async def scan(start: int, end: int):
+        client = await AsyncBSCscanClient.create()
+        try:
+            t0 = time.perf_counter()
+            txs = await client.get_token_transactions_async(start, end)
+            print(f"\n{len(txs)} переказів за {time.perf_counter() - t0:.2f} с; 💳 {client.limiter.summary()}")
+        finally:
+            await client.close()
+
+    asyncio.run(scan(int(sys.argv[1]), int(sys.argv[2])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Історичний backfill: перекази за великий діапазон блоків (місяці історії
+для нової адреси) у локальне сховище TRANSFER_STORE_DB.
+
+- Діапазон ділиться на шарди по BACKFILL_SHARD_BLOCKS блоків, шарди
+  обробляються пулом з BACKFILL_WORKERS потоків; усі потоки йдуть через
+  спільний RpcLimiter провайдера, тож ліміти не перевищуються
+- get_logs з OR-списком адрес у topics (вхідні, з TRACK_OUTGOING — і
+  вихідні), час блоків — пакетом заголовків, без get_block на кожен лог
+- Завершені шарди записуються в BACKFILL_STATE_FILE лише після запису
+  в сховище: перерваний запуск з тими самими аргументами продовжує з
+  місця зупинки, повторно записані перекази ігноруються сховищем
+- З BACKFILL_PROCESSES > 0 (великий список адрес, щільні діапазони) —
+  get_logs без фільтра адрес сирими сторінками, розбір у пулі процесів
+  (log_pipeline.py); швидкість масштабується з кількістю ядер
+- Прогрес: блоків/сек і орієнтовний час до завершення
+- Лише токени з TOKEN_CONTRACTS; BNB (повні блоки) не backfill-иться
+- --queue: діапазони з RESCAN_QUEUE_FILE (пропуски, знайдені csv_import.py);
+  діапазон знімається з черги, коли всі його шарди оброблені
+
+Запуск:
+    python backfill.py <від_блоку> [до_блоку] [адреса ...]
+    python backfill.py --queue
+Без до_блоку — до останнього остаточного; без адрес — весь список моніторингу.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+from bscscan_client import BSCscanClient, TRANSFER_EVENT_TOPIC
+from rate_limiter import CreditBudgetExceeded
+from transfer import Transfer, decode_transfer_log, raw_bytes, raw_int
+from log_pipeline import LogPipeline
+from transfer_store import TransferStore
+from watchlist import AddressSet, parse_address
+from config import (
+    BACKFILL_SHARD_BLOCKS, BACKFILL_WORKERS, BACKFILL_LOG_CHUNK, BACKFILL_STATE_FILE,
+    BACKFILL_PROCESSES, FINALITY_DEPTH, TRACK_OUTGOING, TRANSFER_STORE_DB, RESCAN_QUEUE_FILE,
+)
+
+TOPIC_BATCH = 100  # адрес в одному OR-списку topics
+SHARD_RETRIES = 3
+
+Shard = Tuple[int, int]
+
+
+def make_shards(start_block: int, end_block: int, size: int) -> List[Shard]:
+    return [(s, min(s + size - 1, end_block)) for s in range(start_block, end_block + 1, size)]
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600} год {seconds % 3600 // 60} хв"
+    if seconds >= 60:
+        return f"{seconds // 60} хв {seconds % 60} с"
+    return f"{seconds} с"
+
+
+class Checkpoint:
+    """Завершені шарди по завданнях: {ключ завдання: [початок шарду, ...]}."""
+
+    def __init__(self, key: str, state_file: str = BACKFILL_STATE_FILE):
+        self.key = key
+        self.state_file = state_file
+        self.jobs: Dict[str, List[int]] = {}
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                self.jobs = json.load(f).get("jobs", {})
+        except (FileNotFoundError, ValueError):
+            pass
+        self.done = set(self.jobs.get(key, []))
+
+    def mark(self, shard_start: int):
+        self.done.add(shard_start)
+        self.jobs[self.key] = sorted(self.done)
+        # через тимчасовий файл: kill посеред запису не зіпсує checkpoint
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"jobs": self.jobs}, f)
+        os.replace(tmp, self.state_file)
+
+
+class RescanQueue:
+    """
+    Діапазони для повторного скану: {"ranges": [[від, до, [адреси]], ...]}.
+    Діапазони з тими самими адресами, що перетинаються або стоять поруч
+    (ближче за gap блоків), зливаються.
+    """
+
+    def __init__(self, path: str = RESCAN_QUEUE_FILE, gap: int = BACKFILL_LOG_CHUNK):
+        self.path = path
+        self.gap = gap
+        self.ranges: List[list] = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.ranges = json.load(f).get("ranges", [])
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def add(self, start: int, end: int, addresses: Sequence[str] = ()):
+        addresses = sorted(a.lower() for a in addresses)
+        for item in self.ranges:
+            if item[2] == addresses and start <= item[1] + self.gap and item[0] <= end + self.gap:
+                item[0], item[1] = min(item[0], start), max(item[1], end)
+                return
+        self.ranges.append([start, end, addresses])
+
+    def remove(self, item: list):
+        self.ranges.remove(item)
+
+    def save(self):
+        self.ranges.sort()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"ranges": self.ranges}, f)
+        os.replace(tmp, self.path)
+
+
+class Backfill:
+    def __init__(self, client: BSCscanClient, addresses: Sequence[bytes], store: TransferStore):
+        self.client = client
+        self.store = store
+        self.addresses = sorted(set(addresses))
+        self.watch = AddressSet(self.addresses)
+        self.topic_sets = []
+        for i in range(0, len(self.addresses), TOPIC_BATCH):
+            topic_list = ["0x" + "00" * 12 + a.hex() for a in self.addresses[i:i + TOPIC_BATCH]]
+            self.topic_sets.append([TRANSFER_EVENT_TOPIC, None, topic_list])  # вхідні
+            if TRACK_OUTGOING:
+                self.topic_sets.append([TRANSFER_EVENT_TOPIC, topic_list])  # вихідні
+        self.pipeline: Optional[LogPipeline] = None
+        if BACKFILL_PROCESSES > 0:
+            self.pipeline = LogPipeline(client, self.addresses, BACKFILL_PROCESSES, TRACK_OUTGOING)
+
+    def close(self):
+        if self.pipeline is not None:
+            self.pipeline.close()
+
+    def job_key(self, start_block: int, end_block: int) -> str:
+        digest = hashlib.sha1(b"".join(self.addresses)).hexdigest()[:12]
+        return f"{start_block}-{end_block}:{BACKFILL_SHARD_BLOCKS}:{digest}"
+
+    # --- один шард ---
+
+    def _get_logs(self, start: int, end: int, topics: list) -> list:
+        """get_logs чанками по BACKFILL_LOG_CHUNK; при помилці розміру — ділимо навпіл."""
+        out = []
+        chunk = BACKFILL_LOG_CHUNK
+        pos = start
+        while pos <= end:
+            chunk_end = min(pos + chunk - 1, end)
+            try:
+                out.extend(self.client.w3.eth.get_logs({
+                    "fromBlock": pos,
+                    "toBlock": chunk_end,
+                    "address": self.client.tokens.addresses,
+                    "topics": topics,
+                }))
+                pos = chunk_end + 1
+            except CreditBudgetExceeded:
+                raise
+            except Exception as e:
+                if chunk > 1 and any(s in str(e).lower() for s in ("413", "too large", "limit", "range")):
+                    chunk = max(1, chunk // 2)
+                    continue
+                raise
+        return out
+
+    def scan_shard(self, shard: Shard) -> List[Transfer]:
+        start, end = shard
+        if self.pipeline is not None:
+            return self.pipeline.scan(start, end)
+        logs = []
+        for topics in self.topic_sets:
+            logs.extend(self._get_logs(start, end, topics))
+
+        contains_word = self.watch.contains_word
+        spam = self.client.spam
+        decoded = {}
+        for lg in logs:
+            topics = lg.get("topics", [])
+            if len(topics) < 3:
+                continue
+            token = self.client.tokens.get(raw_bytes(lg.get("address")))
+            if token is None:
+                continue
+            # лише stateless-перевірка: частота й схожі адреси залежать від порядку блоків
+            if spam is not None and spam.is_dust(token.address, lg.get("data")):
+                continue
+            direction = self.client._direction(contains_word, topics)
+            if direction is None:
+                continue
+            # вхідний і вихідний запити можуть повернути той самий лог (SELF)
+            decoded[(raw_bytes(lg.get("transactionHash")), raw_int(lg.get("logIndex")))] = (lg, token, direction)
+
+        if not decoded:
+            return []
+        times = self.client.get_block_timestamps(sorted({raw_int(lg.get("blockNumber")) for lg, _, _ in decoded.values()}))
+        return [
+            decode_transfer_log(
+                lg, timestamp=times[raw_int(lg.get("blockNumber"))],
+                decimals=token.decimals, symbol=token.symbol, direction=direction,
+                chain=self.client.chain.key,
+            )
+            for lg, token, direction in decoded.values()
+        ]
+
+    def _scan_with_retry(self, shard: Shard) -> List[Transfer]:
+        for attempt in range(1, SHARD_RETRIES + 1):
+            try:
+                return self.scan_shard(shard)
+            except CreditBudgetExceeded:
+                raise
+            except Exception as e:
+                if attempt == SHARD_RETRIES:
+                    raise
+                print(f"   ⚠️ Шард {shard[0]}-{shard[1]}, спроба {attempt}: {e}", flush=True)
+                time.sleep(2 * attempt)
+
+    # --- весь діапазон ---
+
+    def run(self, start_block: int, end_block: int, state_file: str = BACKFILL_STATE_FILE) -> int:
+        """Повертає кількість нових переказів у сховищі."""
+        shards = make_shards(start_block, end_block, BACKFILL_SHARD_BLOCKS)
+        checkpoint = Checkpoint(self.job_key(start_block, end_block), state_file)
+        todo = [s for s in shards if s[0] not in checkpoint.done]
+        total_blocks = sum(e - s + 1 for s, e in todo)
+        mode = f", розбір у {BACKFILL_PROCESSES} процесах" if self.pipeline is not None else ""
+        print(
+            f"🗂 Backfill {start_block}-{end_block}: {len(self.addresses)} адрес, "
+            f"шардів до обробки {len(todo)} з {len(shards)}, {BACKFILL_WORKERS} потоків{mode}",
+            flush=True,
+        )
+        if not todo:
+            return 0
+
+        added = found = blocks_done = 0
+        failed: List[Shard] = []
+        t0 = time.monotonic()
+        queue = iter(todo)
+        pool = ThreadPoolExecutor(max_workers=BACKFILL_WORKERS)
+        running = {}
+        try:
+            # не більше шардів у роботі, ніж потоків: після зупинки не лишається хвоста
+            for shard in queue:
+                running[pool.submit(self._scan_with_retry, shard)] = shard
+                if len(running) >= BACKFILL_WORKERS:
+                    break
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    shard = running.pop(future)
+                    try:
+                        transfers = future.result()
+                    except CreditBudgetExceeded:
+                        raise
+                    except Exception as e:
+                        print(f"   ❌ Шард {shard[0]}-{shard[1]}: {e}", flush=True)
+                        failed.append(shard)
+                    else:
+                        # спершу сховище, потім checkpoint — шард не губиться між ними
+                        added += self.store.add(transfers)
+                        found += len(transfers)
+                        checkpoint.mark(shard[0])
+                    blocks_done += shard[1] - shard[0] + 1
+
+                    elapsed = time.monotonic() - t0
+                    rate = blocks_done / elapsed if elapsed > 0 else 0.0
+                    eta = (total_blocks - blocks_done) / rate if rate else 0.0
+                    print(
+                        f"   📦 {blocks_done}/{total_blocks} блоків ({blocks_done * 100 // total_blocks}%), "
+                        f"{rate:.0f} блоків/с, ETA {_format_eta(eta)}, знайдено {found}",
+                        flush=True,
+                    )
+                    nxt = next(queue, None)
+                    if nxt is not None:
+                        running[pool.submit(self._scan_with_retry, nxt)] = nxt
+        except (CreditBudgetExceeded, KeyboardInterrupt) as e:
+            for future in running:
+                future.cancel()
+            print(f"⏸ Зупинено ({e or 'Ctrl+C'}), прогрес збережено — повторіть команду", flush=True)
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.monotonic() - t0
+        print(
+            f"✅ Backfill: {blocks_done} блоків за {_format_eta(elapsed)}, "
+            f"переказів {found} (нових у сховищі {added})",
+            flush=True,
+        )
+        if failed:
+            print(f"⚠️ Не вдалося: {len(failed)} шардів — повторіть команду, щоб догнати", flush=True)
+        return added
+
+
+def run_queue(client: BSCscanClient, store: TransferStore):
+    """Діапазони з RescanQueue по черзі; завершений діапазон знімається з черги."""
+    queue = RescanQueue()
+    print(f"📋 У черзі повторного скану: {len(queue)} діапазонів", flush=True)
+    for item in list(queue.ranges):
+        start_block, end_block, addresses = item
+        backfill = Backfill(client, [parse_address(a) for a in addresses] or list(client.watch), store)
+        try:
+            backfill.run(start_block, end_block)
+        finally:
+            backfill.close()
+        shards = make_shards(start_block, end_block, BACKFILL_SHARD_BLOCKS)
+        if Checkpoint(backfill.job_key(start_block, end_block)).done.issuperset(s for s, _ in shards):
+            queue.remove(item)
+            queue.save()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    if not TRANSFER_STORE_DB:
+        print("❌ Не задано TRANSFER_STORE_DB")
+        return
+    if sys.argv[1] == "--queue":
+        client = BSCscanClient()
+        try:
+            run_queue(client, TransferStore())
+        except (CreditBudgetExceeded, KeyboardInterrupt):
+            pass
+        finally:
+            print(f"💳 {client.limiter.summary()}", flush=True)
+            client.limiter.save()
+        return
+    args = sys.argv[1:]
+    try:
+        start_block = int(args.pop(0))
+        end_block: Optional[int] = int(args.pop(0)) if args and not args[0].startswith("0x") else None
+        addresses = [parse_address(a) for a in args]
+    except ValueError as e:
+        print(f"❌ {e}\n{__doc__}")
+        return
+
+    client = BSCscanClient()
+    if end_block is None:
+        end_block = client.w3.eth.block_number - FINALITY_DEPTH
+    if not addresses:
+        addresses = list(client.watch)
+    backfill = Backfill(client, addresses, TransferStore())
+    try:
+        backfill.run(start_block, end_block)
+    except (CreditBudgetExceeded, KeyboardInterrupt):
+        pass
+    finally:
+        backfill.close()
+        print(f"💳 {client.limiter.summary()}", flush=True)
+        client.limiter.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Вимірювання bloom-префільтра на записаній вибірці блоків.
+
+1) Запис вибірки (потрібен RPC):
+       python bench_bloom.py record [кількість_блоків]
+   Зберігає для кожного блоку logsBloom, розмір заголовка, розмір
+   відповіді get_logs (усі USDT Transfer) та отримувачів у bloom_sample.json.
+
+2) Аналіз (офлайн):
+       python bench_bloom.py
+   Для нашого гаманця, реальних отримувачів з вибірки та випадкових адрес
+   рахує частку хибно-позитивних блоків і зекономлені байти/запити.
+"""
+import json
+import math
+import os
+import random
+import sys
+import requests
+from bloom import BloomQuery, address_topic, merge_ranges
+from config import QUICKNODE_BSC_NODE, WALLET_ADDRESS, HEADER_BATCH_SIZE
+
+USDT_CONTRACT = "0x55d398326f99059fF775485246999027B3197955"
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+SAMPLE_FILE = "bloom_sample.json"
+LOGS_CHUNK = 20  # як у _rpc_get_transfers
+
+
+def rpc(url, method, params):
+    resp = requests.post(url, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params}, timeout=30)
+    resp.raise_for_status()
+    return resp.content, resp.json().get("result")
+
+
+def record(count: int):
+    url = QUICKNODE_BSC_NODE.rstrip("/")
+    _, latest = rpc(url, "eth_blockNumber", [])
+    latest = int(latest, 16)
+    blocks = []
+    for bn in range(latest - count + 1, latest + 1):
+        raw_header, header = rpc(url, "eth_getHeaderByNumber", [hex(bn)])
+        raw_logs, logs = rpc(url, "eth_getLogs", [{
+            "fromBlock": hex(bn), "toBlock": hex(bn),
+            "address": USDT_CONTRACT, "topics": [TRANSFER_TOPIC],
+        }])
+        blocks.append({
+            "number": bn,
+            "logsBloom": header["logsBloom"],
+            "header_bytes": len(raw_header),
+            "logs_bytes": len(raw_logs),
+            "recipients": sorted({lg["topics"][2][-40:] for lg in logs if len(lg["topics"]) > 2}),
+        })
+        print(f"\r{bn - latest + count}/{count}", end="", flush=True)
+    print()
+    with open(SAMPLE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"contract": USDT_CONTRACT, "blocks": blocks}, f)
+    print(f"Збережено {len(blocks)} блоків у {SAMPLE_FILE}")
+
+
+def analyze_address(blocks, contract: bytes, address_hex: str):
+    query = BloomQuery([[contract], [address_topic(bytes.fromhex(address_hex))]])
+    actual = {b["number"] for b in blocks if address_hex in b["recipients"]}
+    candidates = [b for b in blocks if query.matches(bytes.fromhex(b["logsBloom"][2:]))]
+    cand_numbers = {b["number"] for b in candidates}
+    missed = actual - cand_numbers
+    false_pos = len(cand_numbers - actual)
+    negatives = len(blocks) - len(actual)
+
+    full_bytes = sum(b["logs_bytes"] for b in blocks)
+    pre_bytes = sum(b["header_bytes"] for b in blocks) + sum(b["logs_bytes"] for b in candidates)
+    full_calls = math.ceil(len(blocks) / LOGS_CHUNK)
+    ranges = merge_ranges(sorted(cand_numbers), max_span=LOGS_CHUNK)
+    pre_calls = math.ceil(len(blocks) / HEADER_BATCH_SIZE) + len(ranges)
+    return {
+        "actual": len(actual),
+        "candidates": len(cand_numbers),
+        "missed": len(missed),
+        "fp_rate": false_pos / negatives if negatives else 0.0,
+        "full_bytes": full_bytes,
+        "pre_bytes": pre_bytes,
+        "full_calls": full_calls,
+        "pre_calls": pre_calls,
+    }
+
+
+def analyze():
+    if not os.path.exists(SAMPLE_FILE):
+        print(f"Немає {SAMPLE_FILE}. Спершу: python bench_bloom.py record 500")
+        return
+    with open(SAMPLE_FILE, "r", encoding="utf-8") as f:
+        sample = json.load(f)
+    blocks = sample["blocks"]
+    contract = bytes.fromhex(sample["contract"][2:])
+    rnd = random.Random(42)
+
+    recipients = sorted({r for b in blocks for r in b["recipients"]})
+    groups = [
+        ("гаманець", [WALLET_ADDRESS.lower()[2:]]),
+        ("отримувачі", rnd.sample(recipients, min(20, len(recipients)))),
+        ("випадкові", [os.urandom(20).hex() for _ in range(20)]),
+    ]
+
+    print(f"Блоків у вибірці: {len(blocks)}")
+    print(f"{'група':<12} {'адрес':>5} {'FP rate':>8} {'пропущено':>9} {'байти, %':>9} {'запити':>13}")
+    for name, addresses in groups:
+        rows = [analyze_address(blocks, contract, a) for a in addresses]
+        if not rows:
+            continue
+        fp = sum(r["fp_rate"] for r in rows) / len(rows)
+        missed = sum(r["missed"] for r in rows)
+        full_b = sum(r["full_bytes"] for r in rows)
+        pre_b = sum(r["pre_bytes"] for r in rows)
+        full_c = sum(r["full_calls"] for r in rows)
+        pre_c = sum(r["pre_calls"] for r in rows)
+        print(
+            f"{name:<12} {len(rows):>5} {fp:>8.2%} {missed:>9} "
+            f"{pre_b / full_b:>9.1%} {pre_c:>6}/{full_c:<6}"
+        )
+    print("байти, % — трафік з префільтром відносно повного get_logs (менше = краще)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        record(int(sys.argv[2]) if len(sys.argv) > 2 else 500)
+    else:
+        analyze()
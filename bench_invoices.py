@@ -0,0 +1,72 @@
+"""
+Бенчмарк рахунків: завантаження, зіставлення платежів і sweep
+при десятках тисяч відкритих рахунків. Мережа не потрібна.
+
+Запуск: python bench_invoices.py [кількість_рахунків]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from invoices import Invoice, InvoiceBook
+from transfer import Transfer
+
+
+def main():
+    n_invoices = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rnd = random.Random(7)
+    addresses = [os.urandom(20) for _ in range(n_invoices // 5)]  # ~5 рахунків на адресу
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "invoices.sqlite")
+        book = InvoiceBook(path)
+        t0 = time.perf_counter()
+        invoices = [
+            (rnd.choice(addresses), Decimal(rnd.randint(100, 50_000)) / 100, i)
+            for i in range(n_invoices)
+        ]
+        now = time.time()
+        with book.db:  # одна транзакція замість create() на кожен рахунок
+            for addr, amount, i in invoices:
+                book._write(Invoice(
+                    f"inv{i}", addr, "USDT", amount,
+                    created_at=now, expires_at=now + rnd.randint(-600, 3600),
+                ), verb="INSERT")
+        insert_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        book = InvoiceBook(path)
+        load_s = time.perf_counter() - t0
+
+        transfers = []
+        for i, (addr, amount, _) in enumerate(invoices):
+            if i % 2 == 0:  # половина — точна сума, частина — часткові, решта — чужі
+                value = int(amount * 10**18)
+            elif i % 4 == 1:
+                value = int(amount * 10**18) // 2
+            else:
+                addr = os.urandom(20)
+                value = int(amount * 10**18)
+            transfers.append(Transfer(os.urandom(32), i, 1, os.urandom(20), addr, value))
+
+        t0 = time.perf_counter()
+        matched = sum(1 for tx in transfers if book.match(tx) is not None)
+        book.commit()
+        match_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        expired = book.sweep()
+        sweep_s = time.perf_counter() - t0
+
+    print(f"Рахунків: {n_invoices}, платежів: {len(transfers)}")
+    print(f"запис у SQLite:     {insert_s:8.2f} с")
+    print(f"завантаження:       {load_s:8.2f} с")
+    print(f"зіставлення:        {match_s / len(transfers) * 1e6:8.1f} мкс/платіж "
+          f"(зіставлено {matched}, з записом у БД)")
+    print(f"sweep:              {sweep_s * 1000:8.1f} мс (прострочено {len(expired)})")
+
+
+if __name__ == "__main__":
+    main()
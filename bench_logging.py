@@ -0,0 +1,172 @@
+"""
+Бенчмарк логування під час догону (catch-up): get_token_transactions по
+щільному діапазону, де майже кожен чанк містить наші перекази.
+
+Режими (кожен в окремому процесі, stdout — pipe, як у docker/journald):
+- flush на рядок: DEBUG, запис і flush на кожне повідомлення (як print(..., flush=True))
+- DEBUG / INFO / JSON DEBUG через чергу (logging_setup.py)
+
+Вузол — локальний mock JSON-RPC у процесі-замірі. Мережа не потрібна.
+
+Запуск: python bench_logging.py [блоків] [переказів_на_блок]
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = 18549
+USDT = "0x55d398326f99059ff775485246999027b3197955"
+TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+WALLET = "0x" + "ab" * 20
+HEAD = 50_000_000
+PER_BLOCK = 5
+
+MODES = {
+    "flush на рядок": {"LOG_LEVEL": "DEBUG", "LOG_FORMAT": "text", "sync": True},
+    "DEBUG, черга": {"LOG_LEVEL": "DEBUG", "LOG_FORMAT": "text"},
+    "JSON DEBUG, черга": {"LOG_LEVEL": "DEBUG", "LOG_FORMAT": "json"},
+    "INFO, черга": {"LOG_LEVEL": "INFO", "LOG_FORMAT": "text"},
+}
+
+
+def make_logs(start: int, end: int):
+    logs = []
+    for bn in range(start, end + 1):
+        for i in range(PER_BLOCK):
+            logs.append({
+                "address": USDT,
+                "topics": [TOPIC, "0x" + "00" * 12 + "%040x" % (bn * 8 + i), "0x" + "00" * 12 + WALLET[2:]],
+                "data": "0x" + (10**18 * (i + 1)).to_bytes(32, "big").hex(),
+                "blockNumber": hex(bn), "blockHash": "0x%064x" % bn,
+                "transactionHash": "0x%064x" % (bn * 8 + i), "transactionIndex": hex(i), "logIndex": hex(i),
+                "removed": False,
+            })
+    return logs
+
+
+def answer(req):
+    method, params = req["method"], req.get("params", [])
+    if method == "eth_blockNumber":
+        result = hex(HEAD)
+    elif method == "eth_chainId":
+        result = "0x38"
+    elif method == "eth_call":
+        if params[0]["data"] == "0x313ce567":
+            result = "0x" + (18).to_bytes(32, "big").hex()
+        else:
+            result = "0x" + (32).to_bytes(32, "big").hex() + (4).to_bytes(32, "big").hex() + b"USDT".ljust(32, b"\0").hex()
+    elif method == "eth_getLogs":
+        result = make_logs(int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16))
+    elif method == "eth_getBlockByNumber":
+        n = int(params[0], 16)
+        result = {
+            "number": hex(n), "hash": "0x%064x" % n, "parentHash": "0x%064x" % (n - 1),
+            "timestamp": hex(1_700_000_000 + n), "logsBloom": "0x" + "00" * 256,
+            "miner": "0x" + "00" * 20, "gasLimit": "0x1", "gasUsed": "0x1", "difficulty": "0x2",
+            "extraData": "0x", "size": "0x1", "stateRoot": "0x" + "00" * 32,
+            "receiptsRoot": "0x" + "00" * 32, "transactionsRoot": "0x" + "00" * 32,
+            "sha3Uncles": "0x" + "00" * 32, "uncles": [], "nonce": "0x" + "00" * 8,
+            "mixHash": "0x" + "00" * 32, "totalDifficulty": "0x1", "transactions": [],
+        }
+    else:
+        return {"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32601, "message": "not found"}}
+    return {"jsonrpc": "2.0", "id": req.get("id"), "result": result}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        out = [answer(r) for r in body] if isinstance(body, list) else answer(body)
+        data = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def child(mode: str, blocks: int):
+    """Догін у процесі з налаштуваннями режиму; час — у stderr."""
+    import logging_setup
+
+    logging_setup.setup_logging()
+    if MODES[mode].get("sync"):
+        handler = logging.StreamHandler(sys.stdout)  # write + flush на кожен запис
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logging.getLogger(logging_setup.ROOT).handlers = [handler]
+    from bscscan_client import BSCscanClient
+
+    client = BSCscanClient()
+    t0 = time.perf_counter()
+    txs = client.get_token_transactions(HEAD - blocks + 1, HEAD)
+    logging_setup.flush_logs()
+    sys.stdout.flush()
+    print(f"RESULT {time.perf_counter() - t0:.3f} {len(txs)}", file=sys.stderr, flush=True)
+
+
+def run_mode(mode: str, blocks: int, env: dict):
+    settings = {k: v for k, v in MODES[mode].items() if k != "sync"}
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--child", mode, str(blocks), str(PER_BLOCK)],
+        env={**env, **settings}, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    lines = 0
+    for _ in proc.stdout:  # читач, як драйвер логів контейнера: рядок за рядком
+        lines += 1
+    err = proc.stderr.read()
+    proc.wait()
+    result = [line for line in err.splitlines() if line.startswith("RESULT")]
+    if not result:
+        raise RuntimeError(f"{mode}: {err[-500:]}")
+    _, seconds, found = result[-1].split()
+    return float(seconds), int(found), lines
+
+
+def main():
+    global PER_BLOCK
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        PER_BLOCK = int(sys.argv[4])
+        child(sys.argv[2], int(sys.argv[3]))
+        return
+
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    PER_BLOCK = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    tmp = tempfile.mkdtemp()
+    env = {
+        **os.environ,
+        "QUICKNODE_BSC_NODE": f"http://127.0.0.1:{PORT}",
+        "WALLET_ADDRESS": WALLET,
+        "TOKEN_CONTRACTS": USDT,
+        "INITIAL_CONNECTION_DELAY": "0",
+        "USE_CHAIN_CACHE": "0",
+        "USE_BLOOM_PRESCREEN": "0",
+        "USE_SPAM_FILTER": "0",
+        "ENDPOINT_PROFILE_FILE": "",
+        "RPC_PROVIDER_LIMITS": json.dumps({"default": {"rps": 100_000}}),
+        "RPC_BUDGET_FILE": os.path.join(tmp, "budget.json"),
+        "TOKENS_CACHE_FILE": "",
+        "SPAM_STATE_FILE": "",
+        "LOG_SAMPLE_SEC": "5",
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"Блоків: {blocks}, наших переказів на блок: {PER_BLOCK}")
+    print(f"{'режим':<20} {'секунд':>8} {'рядків':>8} {'переказів':>10}")
+    for mode in MODES:
+        seconds, found, lines = run_mode(mode, blocks, env)
+        print(f"{mode:<20} {seconds:>8.2f} {lines:>8} {found:>10}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
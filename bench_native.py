@@ -0,0 +1,99 @@
+"""
+Бенчмарк BNB-шляху: скільки повних блоків за секунду встигає розібрати
+одне ядро. Порівнює сирий JSON + match_native_block з web3-шляхом
+(форматери get_block(full_transactions=True) + AttributeDict).
+Мережа не потрібна, блоки синтетичні.
+
+Запуск: python bench_native.py [транзакцій_у_блоці] [кількість_блоків]
+"""
+import json
+import os
+import sys
+import time
+from web3._utils.method_formatters import block_formatter
+from web3.datastructures import AttributeDict
+from native import match_native_block
+from watchlist import AddressSet
+
+BSC_BLOCK_TIME = 0.75  # секунд на блок (BSC після Maxwell)
+
+
+def make_block(n: int, tx_count: int, ours: bytes) -> bytes:
+    txs = []
+    for i in range(tx_count):
+        to = ours if i == 0 and n % 10 == 0 else os.urandom(20)
+        txs.append({
+            "blockHash": "0x" + os.urandom(32).hex(),
+            "blockNumber": hex(n),
+            "from": "0x" + os.urandom(20).hex(),
+            "gas": "0x5208",
+            "gasPrice": "0x3b9aca00",
+            "hash": "0x" + os.urandom(32).hex(),
+            "input": "0x" if i % 3 else "0xa9059cbb" + os.urandom(64).hex(),
+            "nonce": hex(i),
+            "to": "0x" + to.hex(),
+            "transactionIndex": hex(i),
+            "value": hex(10**15 * (i + 1)) if i % 2 == 0 else "0x0",
+            "type": "0x0",
+            "chainId": "0x38",
+            "v": "0x93",
+            "r": "0x" + os.urandom(32).hex(),
+            "s": "0x" + os.urandom(32).hex(),
+        })
+    block = {
+        "number": hex(n),
+        "hash": "0x" + os.urandom(32).hex(),
+        "parentHash": "0x" + os.urandom(32).hex(),
+        "timestamp": hex(1_700_000_000 + n),
+        "miner": "0x" + os.urandom(20).hex(),
+        "logsBloom": "0x" + "00" * 256,
+        "gasLimit": "0x8583b00",
+        "gasUsed": "0x1c9c380",
+        "transactions": txs,
+    }
+    return json.dumps({"jsonrpc": "2.0", "id": n, "result": block}).encode()
+
+
+def run_raw(bodies, watch):
+    contains = watch.__contains__
+    found = 0
+    for body in bodies:
+        found += len(match_native_block(json.loads(body)["result"], contains))
+    return found
+
+
+def run_web3(bodies, watch):
+    found = 0
+    for body in bodies:
+        block = AttributeDict.recursive(block_formatter(json.loads(body)["result"]))
+        for tx in block["transactions"]:
+            if tx["to"] and bytes.fromhex(tx["to"][2:]) in watch and tx["value"]:
+                found += 1
+    return found
+
+
+def main():
+    tx_count = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    n_blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    ours = os.urandom(20)
+    watch = AddressSet([ours] + [os.urandom(20) for _ in range(999)])
+    bodies = [make_block(n, tx_count, ours) for n in range(n_blocks)]
+    size = sum(len(b) for b in bodies) / n_blocks
+
+    print(f"Блоків: {n_blocks}, транзакцій у блоці: {tx_count}, ~{size / 1024:.0f} КБ на блок, адрес у списку: {len(watch)}")
+    print(f"{'шлях':<8} {'мс/блок':>9} {'блоків/сек':>11} {'запас vs BSC':>13}")
+    for name, fn in (("raw", run_raw), ("web3", run_web3)):
+        t0 = time.perf_counter()
+        found = fn(bodies, watch)
+        elapsed = time.perf_counter() - t0
+        per_block = elapsed / n_blocks
+        print(
+            f"{name:<8} {per_block * 1000:>9.2f} {1 / per_block:>11.0f} "
+            f"{BSC_BLOCK_TIME / per_block:>12.0f}x"
+        )
+        assert found == (n_blocks + 9) // 10
+    print(f"запас vs BSC — у скільки разів швидше за появу блоків ({BSC_BLOCK_TIME} с/блок) на одному ядрі")
+
+
+if __name__ == "__main__":
+    main()
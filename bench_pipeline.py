@@ -0,0 +1,80 @@
+"""
+Бенчмарк конвеєра log_pipeline: розбір сирих сторінок get_logs у пулі
+з 1, 2, 4 і 8 процесів проти розбору в одному потоці. Сторінки
+синтетичні (щільні Transfer USDT), мережа не потрібна.
+
+Запуск: python bench_pipeline.py [сторінок] [логів_на_сторінці]
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from log_pipeline import decode_page, init_worker
+
+USDT = "0x55d398326f99059ff775485246999027b3197955"
+TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+BSC_BLOCK_TIME = 0.75  # секунд на блок
+LOGS_PER_BLOCK = 500  # приблизно Transfer USDT у щільному блоці BSC
+
+
+def make_page(n: int, count: int, ours: str) -> bytes:
+    logs = []
+    for i in range(count):
+        to = ours if i % 1000 == 0 else os.urandom(20).hex()
+        logs.append({
+            "address": USDT,
+            "topics": [TOPIC, "0x" + "00" * 12 + os.urandom(20).hex(), "0x" + "00" * 12 + to],
+            "data": "0x" + (10**18 * (i + 1)).to_bytes(32, "big").hex(),
+            "blockNumber": hex(n * 20 + i // LOGS_PER_BLOCK),
+            "blockHash": "0x" + os.urandom(32).hex(),
+            "transactionHash": "0x" + os.urandom(32).hex(),
+            "transactionIndex": hex(i),
+            "logIndex": hex(i),
+            "removed": False,
+        })
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": logs}).encode()
+
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    ours = os.urandom(20).hex()
+    watch = [ours] + [os.urandom(20).hex() for _ in range(9_999)]
+    pages = [make_page(n, per_page, ours) for n in range(n_pages)]
+    total_logs = n_pages * per_page
+    size = sum(len(p) for p in pages) / n_pages
+    expected = n_pages * ((per_page + 999) // 1000)
+
+    print(
+        f"Сторінок: {n_pages}, логів на сторінці: {per_page} (~{size / 1024 / 1024:.1f} МБ), "
+        f"адрес у списку: {len(watch)}, ядер: {os.cpu_count()}"
+    )
+    print(f"{'процесів':<9} {'логів/сек':>11} {'блоків/сек':>11} {'прискорення':>12}")
+
+    init_worker(watch, {}, False)
+    t0 = time.perf_counter()
+    found = sum(len(decode_page(p)) for p in pages)
+    base = time.perf_counter() - t0
+    assert found == expected
+    print(f"{'потік':<9} {total_logs / base:>11.0f} {total_logs / base / LOGS_PER_BLOCK:>11.0f} {1.0:>11.1f}x")
+
+    for processes in (1, 2, 4, 8):
+        with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(watch, {}, False)) as pool:
+            list(pool.map(abs, range(processes)))  # запуск процесів не входить у вимір
+            t0 = time.perf_counter()
+            found = sum(len(rows) for rows in pool.map(decode_page, pages))
+            elapsed = time.perf_counter() - t0
+        assert found == expected
+        print(
+            f"{processes:<9} {total_logs / elapsed:>11.0f} {total_logs / elapsed / LOGS_PER_BLOCK:>11.0f} "
+            f"{base / elapsed:>11.1f}x"
+        )
+    print(
+        f"блоків/сек — при ~{LOGS_PER_BLOCK} Transfer USDT на блок; "
+        f"BSC дає {1 / BSC_BLOCK_TIME:.1f} блоків/сек"
+    )
+
+
+if __name__ == "__main__":
+    main()
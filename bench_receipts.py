@@ -0,0 +1,152 @@
+"""
+Бенчмарк перевірки за хешем: хешів/сек через check_transactions_by_hash
+(receipts пакетами, паралельно, час блоків спільним пакетом) проти
+послідовних get_transaction_receipt + get_block на кожен хеш.
+
+Вузол — локальний mock JSON-RPC у цьому ж процесі із затримкою на
+кожен HTTP-запит (як RTT до провайдера). Мережа не потрібна.
+
+Запуск: python bench_receipts.py [хешів] [затримка_мс]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = 18545
+USDT = "0x55d398326f99059ff775485246999027b3197955"
+TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+WALLET = "0x" + "ab" * 20
+HEAD = 50_000_000
+
+_tmp = tempfile.mkdtemp()
+os.environ.update({
+    "QUICKNODE_BSC_NODE": f"http://127.0.0.1:{PORT}",
+    "WALLET_ADDRESS": WALLET,
+    "TOKEN_CONTRACTS": USDT,
+    "INITIAL_CONNECTION_DELAY": "0",
+    "USE_CHAIN_CACHE": "0",
+    "RPC_PROVIDER_LIMITS": json.dumps({"default": {"rps": 100_000}}),
+    "RPC_BUDGET_FILE": os.path.join(_tmp, "budget.json"),
+    "TOKENS_CACHE_FILE": "",
+    "SPAM_STATE_FILE": "",
+})
+
+from bscscan_client import BSCscanClient  # noqa: E402  (після налаштування оточення)
+
+RECEIPTS = {}
+LATENCY = 0.0
+
+
+def make_receipts(count: int):
+    for i in range(count):
+        tx_hash = "0x%064x" % (i + 1)
+        block = HEAD - 10_000 + i // 4  # ~4 перевірювані транзакції на блок
+        to = WALLET[2:] if i % 2 == 0 else "%040x" % (i + 7)
+        logs = [{
+            "address": USDT,
+            "topics": [TOPIC, "0x" + "00" * 12 + "%040x" % (i + 3), "0x" + "00" * 12 + to],
+            "data": "0x" + (10**18 * (i % 100 + 1)).to_bytes(32, "big").hex(),
+            "blockNumber": hex(block), "blockHash": "0x%064x" % block,
+            "transactionHash": tx_hash, "transactionIndex": "0x0", "logIndex": hex(j),
+            "removed": False,
+        } for j in range(3)]
+        RECEIPTS[tx_hash] = {
+            "transactionHash": tx_hash, "blockNumber": hex(block), "blockHash": "0x%064x" % block,
+            "status": "0x1", "logs": logs, "from": "0x%040x" % (i + 3), "to": USDT,
+            "transactionIndex": "0x0", "gasUsed": "0x5208", "cumulativeGasUsed": "0x5208",
+            "contractAddress": None, "logsBloom": "0x" + "00" * 256, "type": "0x0",
+            "effectiveGasPrice": "0x3b9aca00",
+        }
+
+
+def answer(req):
+    method, params = req["method"], req.get("params", [])
+    if method == "eth_blockNumber":
+        result = hex(HEAD)
+    elif method == "eth_chainId":
+        result = "0x38"
+    elif method == "eth_call":
+        if params[0]["data"] == "0x313ce567":
+            result = "0x" + (18).to_bytes(32, "big").hex()
+        else:
+            result = "0x" + (32).to_bytes(32, "big").hex() + (4).to_bytes(32, "big").hex() + b"USDT".ljust(32, b"\0").hex()
+    elif method == "eth_getTransactionReceipt":
+        result = RECEIPTS.get(params[0])
+    elif method == "eth_getBlockByNumber":
+        n = int(params[0], 16)
+        result = {
+            "number": hex(n), "hash": "0x%064x" % n, "parentHash": "0x%064x" % (n - 1),
+            "timestamp": hex(1_700_000_000 + n), "logsBloom": "0x" + "00" * 256,
+            "miner": "0x" + "00" * 20, "gasLimit": "0x1", "gasUsed": "0x1", "difficulty": "0x2",
+            "extraData": "0x", "size": "0x1", "stateRoot": "0x" + "00" * 32,
+            "receiptsRoot": "0x" + "00" * 32, "transactionsRoot": "0x" + "00" * 32,
+            "sha3Uncles": "0x" + "00" * 32, "uncles": [], "nonce": "0x" + "00" * 8,
+            "mixHash": "0x" + "00" * 32, "totalDifficulty": "0x1", "transactions": [],
+        }
+    else:
+        return {"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32601, "message": "not found"}}
+    return {"jsonrpc": "2.0", "id": req.get("id"), "result": result}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(LATENCY)
+        out = [answer(r) for r in body] if isinstance(body, list) else answer(body)
+        data = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_sequential(client, hashes):
+    found = 0
+    wallet = bytes.fromhex(WALLET[2:])
+    for tx_hash in hashes:
+        receipt = client.w3.eth.get_transaction_receipt(tx_hash)
+        for lg in receipt["logs"]:
+            if bytes(lg["topics"][2])[-20:] == wallet:
+                client.w3.eth.get_block(lg["blockNumber"])
+                found += 1
+    return found
+
+
+def run_bulk(client, hashes):
+    return sum(len(t or []) for t in client.check_transactions_by_hash(hashes).values())
+
+
+def main():
+    global LATENCY
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    LATENCY = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    make_receipts(count)
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = BSCscanClient()
+    hashes = list(RECEIPTS)
+    print(f"\nХешів: {count}, затримка вузла: {LATENCY * 1000:.0f} мс на HTTP-запит")
+    print(f"{'шлях':<12} {'хешів/сек':>10} {'секунд':>8}")
+    expected = None
+    for name, fn in (("послідовно", run_sequential), ("bulk", run_bulk)):
+        client._block_times.clear()
+        t0 = time.perf_counter()
+        found = fn(client, hashes)
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<12} {count / elapsed:>10.0f} {elapsed:>8.2f}")
+        expected = found if expected is None else expected
+        assert found == expected, (name, found, expected)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Бенчмарк маршрутизації сповіщень (routing.py):
+1. пошук чатів для переказу при 10/1000/10000 маршрутах по гаманцях
+   (плюс маршрути по токенах і чат ескалації) — переказів/сек
+2. розсилка в кілька чатів: TelegramSink (чат у своєму потоці) проти
+   послідовного надсилання; Telegram — локальний HTTP-сервер із затримкою
+
+Запуск: python bench_routing.py [чатів] [подій] [затримка_мс]
+"""
+import os
+import random
+import sys
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = 18548
+os.environ.update({
+    "TELEGRAM_API_URL": f"http://127.0.0.1:{PORT}",
+    "SINK_STATE_FILE": "",
+    "TELEGRAM_CHAT_RPS": "0",  # темп чату тут не міряється — лише паралельність
+    "TELEGRAM_GLOBAL_RPS": "0",
+})
+
+from routing import Router, _parse_route  # noqa: E402
+from sinks import PAYMENT, TelegramSink, make_event  # noqa: E402
+from telegram_bot import TelegramBot  # noqa: E402
+from transfer import Transfer  # noqa: E402
+
+DELAY = 0.0
+TOKENS = ["USDT", "USDC", "BUSD", "BNB"]
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(DELAY)
+        data = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_router(wallets, chats):
+    raw = [{"wallet": w, "chats": [chats[i % len(chats)]]} for i, w in enumerate(wallets)]
+    raw += [{"token": t, "min": "100", "chats": [f"@{t.lower()}"]} for t in TOKENS]
+    raw.append({"min": "10000", "chats": ["@escalation", "default"]})
+    return Router([_parse_route(r, "@main") for r in raw], "@main")
+
+
+def bench_lookup():
+    print(f"{'маршрутів':>10} {'компіляція, с':>14} {'пошуків/сек':>12}")
+    for count in (10, 1000, 10000):
+        wallets = ["0x" + os.urandom(20).hex() for _ in range(count)]
+        t0 = time.perf_counter()
+        router = make_router(wallets, ["@a", "@b", "@c"])
+        compiled = time.perf_counter() - t0
+        probes = [
+            (random.choice(wallets) if i % 2 else "0x" + os.urandom(20).hex(),
+             random.choice(TOKENS), Decimal(random.randint(1, 20000)))
+            for i in range(100_000)
+        ]
+        t0 = time.perf_counter()
+        for wallet, token, amount in probes:
+            router.route(wallet, token, amount)
+        elapsed = time.perf_counter() - t0
+        print(f"{count:>10} {compiled:>14.2f} {len(probes) / elapsed:>12,.0f}")
+
+
+def bench_send(chats_count: int, count: int):
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    chats = [f"@store{i}" for i in range(chats_count)]
+    wallets = ["0x" + os.urandom(20).hex() for _ in range(chats_count)]
+    telegram = TelegramBot()
+    sink = TelegramSink(telegram, make_router(wallets, chats))
+
+    def events():
+        result = []
+        for i in range(count):
+            tx = Transfer(
+                tx_hash=os.urandom(32), log_index=i, block_number=1, from_addr=os.urandom(20),
+                to_addr=bytes.fromhex(wallets[i % chats_count][2:]), value=10**18 * 5, timestamp=1,
+            )
+            result.append(make_event(PAYMENT, tx, message=f"Платіж {i}"))
+        return result
+
+    print(f"\nЧатів: {chats_count}, подій: {count}, затримка Telegram {DELAY * 1000:.0f} мс")
+    t0 = time.perf_counter()
+    for event in events():
+        for chat in sink.remaining(event):
+            assert telegram.send_message(event["message"], chat_id=chat)
+    sequential = time.perf_counter() - t0
+    print(f"{'послідовно':<14} {sequential:>6.2f} с")
+
+    items = [(event["key"], event) for event in events()]
+    t0 = time.perf_counter()
+    results = sink.deliver_many(items)
+    elapsed = time.perf_counter() - t0
+    assert all(ok for _, ok in results) and len(results) == count
+    print(f"{'TelegramSink':<14} {elapsed:>6.2f} с")
+    sink.close()
+    server.shutdown()
+
+
+def main():
+    global DELAY
+    chats_count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    DELAY = (float(sys.argv[3]) if len(sys.argv) > 3 else 50.0) / 1000
+    bench_lookup()
+    bench_send(chats_count, count)
+
+
+if __name__ == "__main__":
+    main()
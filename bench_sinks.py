@@ -0,0 +1,103 @@
+"""
+Бенчмарк розсилки подій у канали (sinks.py): Notifier (кожен канал у
+своєму потоці) проти послідовного надсилання подія за подією в усі
+канали по черзі.
+
+Telegram і webhook — локальний HTTP-сервер у цьому процесі з окремою
+затримкою на кожен канал; file — тимчасовий JSONL. Мережа не потрібна.
+
+Запуск: python bench_sinks.py [подій] [затримка_telegram_мс] [затримка_webhook_мс]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = 18547
+_tmp = tempfile.mkdtemp()
+os.environ.update({
+    "TELEGRAM_API_URL": f"http://127.0.0.1:{PORT}/tg",
+    "WEBHOOK_URL": f"http://127.0.0.1:{PORT}/hook",
+    "SINK_STATE_FILE": "",
+})
+
+from sinks import FileSink, Notifier, TelegramSink, WebhookSink, make_event, PAYMENT  # noqa: E402
+from telegram_bot import TelegramBot  # noqa: E402
+from transfer import Transfer  # noqa: E402
+
+DELAYS = {"tg": 0.0, "hook": 0.0}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(DELAYS[self.path.split("/")[1]])
+        data = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_events(count: int):
+    telegram = TelegramBot()
+    events = []
+    for i in range(count):
+        tx = Transfer(
+            tx_hash=os.urandom(32), log_index=i, block_number=50_000_000 + i,
+            from_addr=os.urandom(20), to_addr=os.urandom(20), value=10**18 * (i + 1),
+            timestamp=1_700_000_000 + i, decimals=18, symbol="USDT", contract=os.urandom(20),
+        )
+        events.append(make_event(PAYMENT, tx, message=telegram.format_payment_message(tx)))
+    return events
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    DELAYS["tg"] = (float(sys.argv[2]) if len(sys.argv) > 2 else 100.0) / 1000
+    DELAYS["hook"] = (float(sys.argv[3]) if len(sys.argv) > 3 else 250.0) / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    sinks = [
+        TelegramSink(TelegramBot()),
+        WebhookSink(os.environ["WEBHOOK_URL"]),
+        FileSink(os.path.join(_tmp, "notifications.jsonl")),
+    ]
+    print(
+        f"Подій: {count}, затримка telegram {DELAYS['tg'] * 1000:.0f} мс, "
+        f"webhook {DELAYS['hook'] * 1000:.0f} мс, file — локальний диск з fsync"
+    )
+    print(f"{'шлях':<14} {'секунд':>8} {'подій/сек':>10}")
+
+    events = make_events(count)
+    t0 = time.perf_counter()
+    for event in events:
+        for sink in sinks:
+            assert sink.deliver(event)
+    sequential = time.perf_counter() - t0
+    print(f"{'послідовно':<14} {sequential:>8.2f} {count / sequential:>10.1f}")
+
+    notifier = Notifier(sinks, state_file="")
+    events = make_events(count)
+    t0 = time.perf_counter()
+    done = notifier.publish(events)
+    elapsed = time.perf_counter() - t0
+    assert len(done) == count
+    print(f"{'Notifier':<14} {elapsed:>8.2f} {count / elapsed:>10.1f}")
+    print(
+        f"очікування: послідовно ≈ сума каналів ({count * (DELAYS['tg'] + DELAYS['hook']):.2f} с + file), "
+        f"Notifier ≈ найповільніший ({count * max(DELAYS.values()):.2f} с)"
+    )
+    notifier.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Бенчмарк старту bot.py з FAST_START і без нього:
+- готовий — від запуску процесу до готовності PaymentMonitorBot
+  (підключення, токени, діагностика, стартовий блок, Telegram)
+- web3 — до готовності web3, потрібного для першого get_logs
+
+Вузол і Telegram — локальний mock у цьому процесі із затримкою на
+кожен HTTP-запит; бот запускається окремим процесом, як при деплої.
+
+Запуск: python bench_startup.py [затримка_мс] [повторів]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = 18546
+REPO = os.path.dirname(os.path.abspath(__file__))
+HEAD = 50_000_000
+LATENCY = 0.0
+
+CHILD = """
+import time
+t0 = time.perf_counter()
+import bot
+b = bot.PaymentMonitorBot()
+print("READY", time.perf_counter() - t0)
+b.bscscan.w3
+print("WEB3", time.perf_counter() - t0)
+"""
+
+
+def answer(req):
+    method, params = req["method"], req.get("params", [])
+    if method == "eth_blockNumber":
+        result = hex(HEAD)
+    elif method == "eth_chainId":
+        result = "0x38"
+    elif method == "eth_call":
+        if params[0]["data"] == "0x313ce567":
+            result = "0x" + (18).to_bytes(32, "big").hex()
+        else:
+            result = "0x" + (32).to_bytes(32, "big").hex() + (4).to_bytes(32, "big").hex() + b"USDT".ljust(32, b"\0").hex()
+    elif method == "eth_getLogs":
+        result = []
+    else:
+        return {"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32601, "message": "not found"}}
+    return {"jsonrpc": "2.0", "id": req.get("id"), "result": result}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(LATENCY)
+        if self.path.endswith("/sendMessage"):
+            out = {"ok": True, "result": {"message_id": 1}}
+        else:
+            out = [answer(r) for r in body] if isinstance(body, list) else answer(body)
+        data = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_once(env, workdir):
+    """(до готовності бота, до готовності web3) в секундах від запуску процесу."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-u", "-c", CHILD], env=env, cwd=workdir,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    marks = {}
+    lines = []
+    for line in proc.stdout:
+        lines.append(line)
+        tag = line.split(" ", 1)[0]
+        if tag in ("READY", "WEB3"):
+            marks[tag] = time.perf_counter() - t0
+    proc.wait(timeout=120)
+    if len(marks) != 2:
+        raise RuntimeError("".join(lines[-40:]))
+    return marks["READY"], marks["WEB3"]
+
+
+def main():
+    global LATENCY
+    LATENCY = (float(sys.argv[1]) if len(sys.argv) > 1 else 50.0) / 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        base_env = dict(
+            os.environ,
+            PYTHONPATH=REPO,
+            QUICKNODE_BSC_NODE=f"http://127.0.0.1:{PORT}",
+            TELEGRAM_API_URL=f"http://127.0.0.1:{PORT}",
+            TOKEN_CONTRACTS="0x55d398326f99059fF775485246999027B3197955",
+            RPC_PROVIDER_LIMITS=json.dumps({"default": {"rps": 1000}}),
+            RPC_BUDGET_FILE=os.path.join(workdir, "budget.json"),
+            USE_CHAIN_CACHE="0",
+            TOKENS_CACHE_FILE="",
+            SPAM_STATE_FILE="",
+            RECONCILE_STATE_FILE="",
+            TRANSFER_STORE_DB="",
+            INITIAL_CONNECTION_DELAY="5",
+        )
+        print(f"Затримка вузла/Telegram: {LATENCY * 1000:.0f} мс на запит, повторів: {repeats}")
+        print(f"{'режим':<28} {'готовий, с':>11} {'web3, с':>8}")
+        for name, extra in (
+            ("FAST_START=false (5 с)", {"FAST_START": "false"}),
+            ("FAST_START=false, без паузи", {"FAST_START": "false", "INITIAL_CONNECTION_DELAY": "0"}),
+            ("FAST_START=true", {"FAST_START": "true"}),
+        ):
+            env = dict(base_env, **extra)
+            runs = [start_once(env, workdir) for _ in range(repeats)]
+            ready = sum(r for r, _ in runs) / repeats
+            web3 = sum(w for _, w in runs) / repeats
+            print(f"{name:<28} {ready:>11.2f} {web3:>8.2f}")
+        print("середнє за повторами; час включає запуск інтерпретатора")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
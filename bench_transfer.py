@@ -0,0 +1,156 @@
+"""
+Бенчмарк: вартість одного переказу (CPU і пам'ять) — старі рядкові dict
+проти Transfer. Мережа не потрібна, логи синтетичні.
+
+Запуск: python bench_transfer.py [кількість_логів]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+from hexbytes import HexBytes
+from transfer import decode_transfer_log
+
+WALLET = bytes.fromhex("ceb8658255151827b3fc99d257471120413d0f28")
+USDT = bytes.fromhex("55d398326f99059ff775485246999027b3197955")
+TRANSFER_TOPIC = HexBytes("0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef")
+
+
+def make_logs(n: int, match_rate: float):
+    logs = []
+    matched = int(n * match_rate)
+    for i in range(n):
+        to_addr = WALLET if i < matched else os.urandom(20)
+        logs.append({
+            "address": HexBytes(USDT),
+            "topics": [
+                TRANSFER_TOPIC,
+                HexBytes(b"\0" * 12 + os.urandom(20)),
+                HexBytes(b"\0" * 12 + to_addr),
+            ],
+            "data": HexBytes((i * 10**16 + 1).to_bytes(32, "big")),
+            "blockNumber": 40_000_000 + i // 50,
+            "blockHash": HexBytes(os.urandom(32)),
+            "transactionHash": HexBytes(os.urandom(32)),
+            "logIndex": i % 50,
+        })
+    return logs
+
+
+# --- стара реалізація (до Transfer), відтворена для порівняння ---
+
+def _to_hex(val):
+    if hasattr(val, "hex"):
+        h = val.hex()
+        return h if h.startswith("0x") else "0x" + h
+    return str(val)
+
+
+def _extract_address(topic):
+    return "0x" + _to_hex(topic).replace("0x", "").lower()[-40:]
+
+
+def legacy_parse(lg, block_num):
+    topics = lg["topics"]
+    data_hex = _to_hex(lg.get("data", "0x0"))
+    return {
+        "hash": _to_hex(lg.get("transactionHash", "")),
+        "from": _extract_address(topics[1]),
+        "to": _extract_address(topics[2]),
+        "value": str(int(data_hex, 16)),
+        "tokenSymbol": "USDT",
+        "tokenDecimal": "18",
+        "timeStamp": str(1_700_000_000),
+        "blockNumber": str(block_num),
+        "contractAddress": "0x55d398326f99059fF775485246999027B3197955",
+    }
+
+
+def legacy_format(tx):
+    value = int(tx.get("value", 0))
+    decimals = int(tx.get("tokenDecimal", 18))
+    ts = int(tx.get("timeStamp", 0))
+    time_str = datetime.fromtimestamp(ts, tz=timezone(timedelta(hours=2))).strftime("%Y-%m-%d %H:%M:%S (Київ)")
+    return {
+        "hash": tx.get("hash", ""),
+        "amount": value / (10 ** decimals),
+        "symbol": tx.get("tokenSymbol", "USDT"),
+        "from_address": tx.get("from", ""),
+        "to_address": tx.get("to", ""),
+        "timestamp": time_str,
+        "is_incoming": True,
+        "contract_address": tx.get("contractAddress", ""),
+        "block_number": tx.get("blockNumber", ""),
+    }
+
+
+def run_legacy(logs, wallet_lower):
+    out = []
+    for lg in logs:
+        if _extract_address(lg["topics"][2]) != wallet_lower:
+            continue
+        tx = legacy_parse(lg, lg["blockNumber"])
+        legacy_format(tx)  # фільтр у check_new_transactions
+        legacy_format(tx)  # повідомлення
+        out.append(tx)
+    return out
+
+
+def run_transfer(logs, wallet_bytes):
+    out = []
+    for lg in logs:
+        if not lg["topics"][2].endswith(wallet_bytes):
+            continue
+        tx = decode_transfer_log(lg, timestamp=1_700_000_000)
+        tx.amount     # фільтр у check_new_transactions
+        tx.formatted  # повідомлення (один раз)
+        out.append(tx)
+    return out
+
+
+def run_transfer_filter_only(logs, wallet_bytes):
+    out = []
+    for lg in logs:
+        if not lg["topics"][2].endswith(wallet_bytes):
+            continue
+        tx = decode_transfer_log(lg, timestamp=1_700_000_000)
+        tx.amount
+        out.append(tx)
+    return out
+
+
+def measure(fn, logs, arg):
+    t0 = time.perf_counter()
+    fn(logs, arg)
+    cpu = time.perf_counter() - t0
+
+    tracemalloc.start()
+    result = fn(logs, arg)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, retained, peak, len(result)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    wallet_lower = "0x" + WALLET.hex()
+    print(f"Логів: {n}  (T/filter — без побудови повідомлення)")
+    print(f"{'match':>6} {'метод':<9} {'мкс/переказ':>12} {'байт/переказ':>13} {'пік, КБ':>9}")
+    for rate in (1.0, 0.5, 0.1):
+        logs = make_logs(n, rate)
+        for name, fn, arg in (
+            ("dict", run_legacy, wallet_lower),
+            ("Transfer", run_transfer, WALLET),
+            ("T/filter", run_transfer_filter_only, WALLET),
+        ):
+            cpu, retained, peak, matched = measure(fn, logs, arg)
+            per = max(1, matched)
+            print(
+                f"{rate:>6.0%} {name:<9} {cpu / per * 1e6:>12.2f} "
+                f"{retained / per:>13.0f} {peak / 1024:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Бенчмарк зіставлення topics[2] зі списком адрес: 1k, 10k, 100k адрес.
+Порівнює AddressSet (watchlist.py) зі звичайним set з bytes:
+пропускна здатність (логів/сек) і пам'ять структури.
+
+Запуск: python bench_watchlist.py [кількість_логів]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from hexbytes import HexBytes
+from watchlist import AddressSet
+
+_TAIL = slice(-20, None)
+
+
+def build(kind, addresses):
+    tracemalloc.start()
+    if kind == "AddressSet":
+        struct = AddressSet(addresses, capacity=len(addresses) * 2)
+    else:
+        # нові bytes-об'єкти, щоб їхня пам'ять теж потрапила в замір
+        struct = set(bytes.fromhex(a.hex()) for a in addresses)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return struct, size
+
+
+def run(kind, struct, words):
+    matched = 0
+    t0 = time.perf_counter()
+    if kind == "AddressSet":
+        contains_word = struct.contains_word
+        for w in words:
+            if contains_word(w):
+                matched += 1
+    else:
+        for w in words:
+            if bytes.__getitem__(w, _TAIL) in struct:
+                matched += 1
+    return matched, time.perf_counter() - t0
+
+
+def main():
+    n_logs = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    print(f"Логів: {n_logs}, частка наших: 5%")
+    print(f"{'адрес':>7} {'структура':<11} {'логів/сек':>12} {'пам`ять, КБ':>12} {'байт/адресу':>12}")
+    for n_addr in (1_000, 10_000, 100_000):
+        addresses = [os.urandom(20) for _ in range(n_addr)]
+        words = []
+        for i in range(n_logs):
+            addr = addresses[i % n_addr] if i % 20 == 0 else os.urandom(20)
+            words.append(HexBytes(b"\0" * 12 + addr))
+        for kind in ("AddressSet", "set"):
+            struct, size = build(kind, addresses)
+            matched, elapsed = run(kind, struct, words)
+            print(
+                f"{n_addr:>7} {kind:<11} {n_logs / elapsed:>12,.0f} "
+                f"{size / 1024:>12,.0f} {size / n_addr:>12.1f}"
+            )
+            assert matched == n_logs // 20 + (1 if n_logs % 20 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Перевірка logsBloom заголовка блоку (2048 біт, 256 байт).
+
+Кожен елемент (адреса контракту або 32-байтовий topic) встановлює 3 біти:
+keccak256(елемент), пари байтів 0-1, 2-3, 4-5 -> номер біта (mod 2048).
+Bloom не дає хибно-негативних результатів: якщо біти не встановлені,
+логу з цим елементом у блоці точно немає.
+"""
+from typing import Iterable, List, Sequence, Tuple
+from eth_utils import keccak
+
+BLOOM_BYTES = 256
+
+# (індекс байта, маска) для кожного з 3 бітів елемента
+BloomMask = Tuple[Tuple[int, int], ...]
+
+
+def bloom_mask(item: bytes) -> BloomMask:
+    h = keccak(item)
+    mask = []
+    for i in (0, 2, 4):
+        bit = ((h[i] << 8) | h[i + 1]) & 2047
+        mask.append((BLOOM_BYTES - 1 - bit // 8, 1 << (bit % 8)))
+    return tuple(mask)
+
+
+def address_topic(address: bytes) -> bytes:
+    """20-байтова адреса -> 32-байтовий topic (з нулями зліва)."""
+    return b"\0" * 12 + address
+
+
+def bloom_contains(bloom: bytes, mask: BloomMask) -> bool:
+    for idx, bit in mask:
+        if not bloom[idx] & bit:
+            return False
+    return True
+
+
+class BloomQuery:
+    """
+    Запит до bloom з груп елементів: блок-кандидат, якщо з КОЖНОЇ групи
+    в bloom є хоча б один елемент (наприклад, будь-який з контрактів
+    токенів і будь-яка з адрес гаманців). Маски рахуються один раз.
+    """
+
+    def __init__(self, groups: Iterable[Iterable[bytes]]):
+        self.groups: List[List[BloomMask]] = [[bloom_mask(x) for x in group] for group in groups]
+
+    def matches(self, bloom: bytes) -> bool:
+        if len(bloom) != BLOOM_BYTES:
+            return True  # некоректний bloom — не ризикуємо пропустити блок
+        for group in self.groups:
+            for mask in group:
+                if bloom_contains(bloom, mask):
+                    break
+            else:
+                return False
+        return True
+
+
+def merge_ranges(blocks: Sequence[int], max_span: int = 0) -> List[Tuple[int, int]]:
+    """
+    Відсортовані номери блоків -> суміжні діапазони [(from, to), ...].
+    max_span > 0 обмежує довжину діапазону (ліміт get_logs провайдера).
+    """
+    ranges: List[Tuple[int, int]] = []
+    for bn in blocks:
+        if ranges:
+            start, end = ranges[-1]
+            if bn == end + 1 and (max_span <= 0 or bn - start < max_span):
+                ranges[-1] = (start, bn)
+                continue
+        ranges.append((bn, bn))
+    return ranges
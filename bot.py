@@ -1,30 +1,85 @@
 """
-Бот для моніторингу USDT платежів на BSC.
+Бот для моніторингу платежів у BEP-20 токенах (USDT, USDC, ...) на BSC.
 Використовує RPC (QuickNode/GetBlock) для пошуку транзакцій.
 """
 import time
 import json
-from typing import Set, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Set, Optional
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
+from aggregates import Aggregates
 from bscscan_client import BSCscanClient
+from rate_limiter import CreditBudgetExceeded
+from invoices import InvoiceBook
+from logging_setup import flush_logs, get_logger
+from reconcile import Reconciler
+from sinks import OUTGOING_EVENT, PAYMENT, Notifier, build_sinks, make_event
 from telegram_bot import TelegramBot
-from config import WALLET_ADDRESS, CHECK_INTERVAL, MIN_AMOUNT_USDT, TOKEN_SYMBOL
+from transfer_store import TransferStore
+from transfer import DEFAULT_CHAIN, INCOMING
+from config import (
+    WALLET_ADDRESS, CHECK_INTERVAL, DEGRADED_INTERVAL_FACTOR, RECONCILE_INTERVAL_SEC,
+    TRACK_NATIVE, INVOICES_DB, TRANSFER_STORE_DB, FAST_START, ASYNC_RUNTIME, CHAINS,
+    AGGREGATES_DB, DAILY_DIGEST,
+)
+
+log = get_logger("bot")
+
+QUIET_START_MESSAGE = "🌙 01:00 (Київ): моніторинг призупинено до 09:00."
+QUIET_END_MESSAGE = "🌅 09:00 (Київ): моніторинг відновлено, продовжую роботу."
 
 
 class PaymentMonitorBot:
     def __init__(self):
+        self._init_started = time.monotonic()
         self.bscscan = BSCscanClient()
         self.telegram = TelegramBot()
+        self._init_state()
+        self.startup()
+
+    def _init_state(self):
+        """Стан монітора без мережі; спільний з asyncio-монітором (async_bot.py)."""
         self.processed_txs: Set[str] = set()
+        self.legacy_hashes: Set[str] = set()  # хеші без індексу логу зі стану до ключів хеш:індекс
+        # Клієнти мереж за ключем; тут — лише основна, кілька мереж веде async_bot.py
+        self.clients: Dict[str, BSCscanClient] = {self.bscscan.chain.key: self.bscscan}
+        self.notifier = Notifier(build_sinks(self.telegram))
+        self.reconciler = Reconciler(self.bscscan) if RECONCILE_INTERVAL_SEC > 0 else None
+        self.last_reconcile: Optional[float] = None
+        self.invoices = InvoiceBook() if INVOICES_DB else None
+        self.store = TransferStore() if TRANSFER_STORE_DB else None
+        self.aggregates = Aggregates() if AGGREGATES_DB else None
         self.start_block: Optional[int] = None
         self.kyiv_tz = ZoneInfo("Europe/Kyiv")
         self.quiet_start_hour = 1
         self.quiet_end_hour = 9
         self.is_quiet_mode = False
         self.load_processed_txs()
-        self.bscscan.run_diagnostic()
-        self.init_start_block()
+
+    def startup(self):
+        """
+        Діагностика, стартовий блок і повідомлення про старт. З FAST_START —
+        паралельно: кожен крок чекає мережу, а не попередній крок.
+        """
+        steps = (self.bscscan.run_diagnostic, self.init_start_block, self._send_start_message)
+        if FAST_START:
+            with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="startup") as pool:
+                for future in [pool.submit(step) for step in steps]:
+                    future.result()
+        else:
+            for step in steps:
+                step()
+        print(f"⚡ Старт за {time.monotonic() - self._init_started:.1f} с")
+
+    def _send_start_message(self):
+        try:
+            if self.telegram.send_message("✅ Бот стартував! Моніторинг активний."):
+                print("✅ Telegram OK")
+            else:
+                print("⚠️ Telegram: повідомлення про старт не надіслано")
+        except Exception as e:
+            print(f"⚠️ Telegram: {e}")
 
     def _now_kyiv(self) -> datetime:
         return datetime.now(self.kyiv_tz)
@@ -61,6 +116,10 @@ class PaymentMonitorBot:
                 data = json.load(f)
                 self.processed_txs = set(data.get('txs', []))
                 print(f"✅ Завантажено {len(self.processed_txs)} оброблених транзакцій")
+            # Старий формат — голий хеш: вважаємо обробленими всі логи цієї транзакції (bsc)
+            self.legacy_hashes = {key.lower() for key in self.processed_txs if ":" not in key}
+            if self.legacy_hashes:
+                print(f"   ℹ️ З них без індексу логу (старий формат): {len(self.legacy_hashes)}")
         except FileNotFoundError:
             self.processed_txs = set()
             print("📝 Файл processed_txs.json не знайдено, створю новий")
@@ -81,82 +140,228 @@ class PaymentMonitorBot:
             print(f"❌ Помилка збереження: {e}")
 
     def check_new_transactions(self):
-        print(f"\n{'='*60}")
-        print(f"🔍 Перевірка транзакцій для {WALLET_ADDRESS}")
-        print(f"{'='*60}")
+        log.info("\n%s\n🔍 Перевірка транзакцій для %s\n%s", "=" * 60, WALLET_ADDRESS, "=" * 60)
 
         latest_block = self.bscscan.get_latest_block()
         if not latest_block:
-            print("❌ Не вдалося отримати останній блок")
+            log.error("❌ Не вдалося отримати останній блок")
             return
 
         if not self.start_block:
             self.start_block = latest_block
-            print(f"✅ Встановлено стартовий блок: {self.start_block}")
+            log.info("✅ Встановлено стартовий блок: %d", self.start_block)
             return
 
         if latest_block <= self.start_block:
-            print("⏳ Нових блоків немає")
+            log.info("⏳ Нових блоків немає")
             return
 
         start = self.start_block + 1
-        print(f"📊 Перевірка блоків {start} - {latest_block} ({latest_block - start + 1} блоків)")
+        log.info("📊 Перевірка блоків %d - %d (%d блоків)", start, latest_block, latest_block - start + 1)
 
-        transactions = self.bscscan.get_token_transactions(
-            start_block=start,
-            end_block=latest_block
-        )
+        try:
+            # Блоки з платежами, що змінились після реорганізації, — повторним range-сканом
+            rescanned = []
+            changed = self.check_reorgs(self.bscscan, latest_block)
+            if changed:
+                if TRACK_NATIVE:
+                    rescanned.extend(self.bscscan.get_native_transactions(min(changed), self.start_block))
+                rescanned.extend(self.bscscan.get_token_transactions(min(changed), self.start_block))
+            transactions = []
+            # BNB першим: якщо блоки не отримано, дельту log-фільтра ще не забрано
+            if TRACK_NATIVE:
+                transactions.extend(self.bscscan.get_native_transactions(start, latest_block))
+            transactions.extend(self.bscscan.get_new_token_transactions(
+                start_block=start,
+                end_block=latest_block
+            ))
+        except CreditBudgetExceeded as e:
+            log.warning("⛔ %s. Блоки %d-%d перевіримо пізніше", e, start, latest_block)
+            return
+        except ConnectionError as e:
+            log.warning("⚠️ %s. Блоки %d-%d перевіримо пізніше", e, start, latest_block)
+            return
 
         self.start_block = latest_block
+        if changed:
+            self.retract_reorged(self.bscscan, changed)
+        if self.reconciler is not None:
+            self.reconciler.record(transactions)
+            self.reconciler.save()
+
+        self.process_transactions(rescanned + transactions)
+
+    def check_reorgs(self, client: BSCscanClient, head: int) -> Set[int]:
+        """
+        Неостаточні блоки з платежами (з журналу агрегатів), чий хеш на вузлі вже інший.
+        Збій batch хешів — ConnectionError: цикл відкладається, курсор не зсувається.
+        """
+        if self.aggregates is None:
+            return set()
+        recorded = self.aggregates.unconfirmed_blocks(client.chain.key, head - client.chain.finality)
+        if not recorded:
+            return set()
+        current = client.get_block_hashes(sorted(recorded))
+        return {bn for bn, block_hash in recorded.items() if current.get(bn) != block_hash}
+
+    def retract_reorged(self, client: BSCscanClient, changed: Set[int]):
+        """Після успішного повторного скану: внески змінених блоків — геть з агрегатів."""
+        retracted = self.aggregates.retract_blocks(client.chain.key, changed)
+        self.aggregates.commit()
+        if self.store is not None and retracted:
+            try:
+                self.store.remove(retracted)  # повторно знайдені запишуться знову в select_new
+            except Exception as e:
+                log.warning("⚠️ Сховище переказів: %s", e)
+        log.warning(
+            "↩️ %sРеорганізація: змінилось блоків з платежами %d (від %d), відкликано з агрегатів %d",
+            client.tag, len(changed), min(changed), len(retracted),
+        )
 
+    def process_transactions(self, transactions):
+        events = self.build_events(*self.select_new(transactions))
+        if events or self.notifier.pending:
+            self.mark_delivered(self.notifier.publish(events))
+
+    def build_events(self, new_incoming, new_outgoing):
+        """Події для каналів сповіщень; текст Telegram форматується один раз."""
+        events = []
+        if new_outgoing:
+            log.info("📤 Вихідних переказів: %d", len(new_outgoing))
+        for tx in new_outgoing:
+            log.info("   %.2f %s: %s → %s", tx.amount, tx.symbol, tx.from_address, tx.to_address)
+            events.append(make_event(OUTGOING_EVENT, tx, message=self.telegram.format_outgoing_message(tx)))
+        if new_incoming:
+            log.info("💰 Знайдено %d нових транзакцій!", len(new_incoming))
+        else:
+            log.info("✅ Нових платежів не знайдено")
+        for tx, invoice in new_incoming:
+            self._print_payment(tx, invoice)
+            events.append(make_event(PAYMENT, tx, invoice, self.telegram.format_payment_message(tx, invoice)))
+        return events
+
+    def mark_delivered(self, keys):
+        """Оброблені — лише події, завершені в усіх каналах."""
+        if keys:
+            self.processed_txs.update(keys)
+            self.save_processed_txs()
+
+    def is_processed(self, tx) -> bool:
+        """Вхідний переказ уже оброблений: за ключем хеш:індекс або голим хешем старого стану."""
+        if tx.key in self.processed_txs:
+            return True
+        return tx.chain == DEFAULT_CHAIN and tx.hash in self.legacy_hashes
+
+    def select_new(self, transactions):
+        """
+        Зберігає перекази в сховище і відбирає ще не надіслані:
+        ([(вхідний, рахунок або None)], [вихідний]).
+        """
+        if self.store is not None and transactions:
+            try:
+                self.store.add(transactions)
+            except Exception as e:
+                log.warning("⚠️ Сховище переказів: %s", e)
+        if self.invoices is not None:
+            self.invoices.refresh()
         new_incoming = []
+        new_outgoing = []
         for tx in transactions:
-            tx_hash = tx.get('hash', '')
-            if not tx_hash:
+            if tx.direction != INCOMING:
+                # Вихідні не фільтруються за мінімумом: важливий кожен
+                key = "out:" + tx.key
+                if key not in self.processed_txs and not self.notifier.is_pending(key):
+                    new_outgoing.append(tx)
                 continue
-            if tx.get('to', '').lower() != WALLET_ADDRESS.lower():
+            client = self.clients.get(tx.chain, self.bscscan)
+            if tx.to_addr not in client.watch:
                 continue
-            if tx_hash in self.processed_txs:
+            token = client.tokens.get(tx.contract)
+            if token is None:
                 continue
-
-            formatted = self.bscscan.format_transaction(tx)
-            if formatted['symbol'].upper() != TOKEN_SYMBOL.upper():
+            # Ключ хеш:індекс — одна транзакція може платити на кілька наших адрес
+            if self.is_processed(tx) or self.notifier.is_pending(tx.key):
+                if self.aggregates is not None:
+                    self.aggregates.add(tx, known=True)  # знову — лише після реорганізації
                 continue
-            if formatted['amount'] < MIN_AMOUNT_USDT:
+            invoice = self.invoices.match(tx) if self.invoices is not None else None
+            # Платіж за рахунком повідомляємо навіть нижче мінімуму (часткова оплата)
+            if invoice is None and tx.amount < token.min_amount:
                 continue
-
-            new_incoming.append(tx)
-
-        if not new_incoming:
-            print("✅ Нових платежів не знайдено")
+            if self.aggregates is not None:
+                self.aggregates.add(tx)
+
+            new_incoming.append((tx, invoice))
+
+        if self.invoices is not None:
+            self.invoices.commit()
+        if self.aggregates is not None:
+            self.aggregates.commit()
+        return new_incoming, new_outgoing
+
+    @staticmethod
+    def _print_payment(tx, invoice):
+        lines = [
+            f"\n💸 НОВА ОПЛАТА!",
+            f"   Хеш: {tx.hash}",
+            f"   Сума: {tx.amount:.2f} {tx.symbol}",
+            f"   Від: {tx.from_address}",
+            f"   Час: {tx.time_str}",
+        ]
+        if invoice is not None:
+            lines.append(f"   Рахунок: {invoice.id} ({invoice.status_text})")
+        # один запис на платіж; поля extra — окремими ключами в LOG_FORMAT=json
+        log.info("\n".join(lines), extra={
+            "tx": tx.hash, "block": tx.block_number, "amount": str(tx.amount), "symbol": tx.symbol,
+            "invoice": invoice.id if invoice is not None else None,
+        })
+
+    def reconcile(self):
+        """Звірка балансів раз на RECONCILE_INTERVAL_SEC; пропущені сканером платежі обробляються як нові."""
+        if self.reconciler is None:
             return
+        if self.last_reconcile is not None and time.monotonic() - self.last_reconcile < RECONCILE_INTERVAL_SEC:
+            return
+        self.last_reconcile = time.monotonic()
+        try:
+            missed = self.reconciler.run(safe_block=self.start_block)
+        except CreditBudgetExceeded as e:
+            log.warning("⛔ Звірку відкладено: %s", e)
+            return
+        except Exception as e:
+            log.warning("⚠️ Помилка звірки: %s", e)
+            return
+        if missed:
+            log.info("🧮 Звірка знайшла %d пропущених переказів", len(missed))
+            self.process_transactions(missed)
+
+    def build_digest(self) -> Optional[str]:
+        """Підсумок за минулу добу з агрегатів (без RPC); None — вимкнено."""
+        if self.aggregates is None or not DAILY_DIGEST:
+            return None
+        try:
+            self.aggregates.prune()
+            return self.aggregates.digest(self._now_kyiv() - timedelta(days=1))
+        except Exception as e:
+            log.warning("⚠️ Підсумок за добу: %s", e)
+            return None
 
-        print(f"💰 Знайдено {len(new_incoming)} нових транзакцій >= {MIN_AMOUNT_USDT} USDT!")
-
-        for tx in new_incoming:
-            tx_hash = tx.get('hash', '')
-            formatted = self.bscscan.format_transaction(tx)
-            print(f"\n💸 НОВА ОПЛАТА!")
-            print(f"   Хеш: {tx_hash}")
-            print(f"   Сума: {formatted['amount']:.2f} {formatted['symbol']}")
-            print(f"   Від: {formatted['from_address']}")
-            print(f"   Час: {formatted['timestamp']}")
-
-            if self.telegram.send_payment_notification(formatted):
-                print(f"   ✅ Повідомлення надіслано в Telegram!")
-                self.processed_txs.add(tx_hash)
-            else:
-                print(f"   ❌ Помилка надсилання в Telegram")
-
-        self.save_processed_txs()
+    def sweep_invoices(self):
+        """Після обробки платежів: рахунки з вичерпаним терміном -> прострочені."""
+        if self.invoices is None:
+            return
+        self.invoices.refresh()
+        expired = self.invoices.sweep()
+        if expired:
+            log.info("⌛ Прострочено рахунків: %d (відкритих: %d)", len(expired), len(self.invoices))
 
-    def run(self):
+    def print_banner(self):
         print("=" * 60)
         print("🤖 БОТ ЗАПУЩЕНО!")
         print("=" * 60)
         print(f"📍 Адреса: {WALLET_ADDRESS}")
-        print(f"💰 Токен: {TOKEN_SYMBOL}")
-        print(f"💵 Мінімум: {MIN_AMOUNT_USDT} {TOKEN_SYMBOL}")
+        print(f"📨 Канали: {self.notifier.describe()}")
+        print(f"💰 Токени (мінімум): {self.bscscan.tokens.describe()}")
         if CHECK_INTERVAL >= 60:
             print(f"⏱️ Інтервал: {CHECK_INTERVAL // 60} хв ({CHECK_INTERVAL} сек)")
         else:
@@ -166,6 +371,28 @@ class PaymentMonitorBot:
         print("=" * 60)
         print("Натисніть Ctrl+C для зупинки\n")
 
+    def report_cycle(self):
+        """Підсумок циклу: кредити, кеш, спам; зберігає стан лімітера і фільтра."""
+        limiter = self.bscscan.limiter
+        log.info("💳 %s", limiter.summary())
+        if self.bscscan.cache is not None:
+            log.info("🗄️ %s", self.bscscan.cache.summary())
+        if self.bscscan.spam is not None:
+            log.info("🧹 %s", self.bscscan.spam.summary())
+            self.bscscan.spam.save()
+        limiter.save()
+
+    def next_interval(self, client: Optional[BSCscanClient] = None) -> int:
+        """CHECK_INTERVAL; у degraded-режимі квоти — у DEGRADED_INTERVAL_FACTOR разів довше."""
+        limiter = (client or self.bscscan).limiter
+        if limiter.degraded:
+            interval = CHECK_INTERVAL * DEGRADED_INTERVAL_FACTOR
+            log.warning("🐢 Квота RPC %.0f%% — інтервал %d сек", limiter.day_usage * 100, interval)
+            return interval
+        return CHECK_INTERVAL
+
+    def run(self):
+        self.print_banner()
         try:
             while True:
                 now_kyiv = self._now_kyiv()
@@ -174,10 +401,8 @@ class PaymentMonitorBot:
                 if in_quiet:
                     if not self.is_quiet_mode:
                         self.is_quiet_mode = True
-                        self._send_status_message(
-                            "🌙 01:00 (Київ): моніторинг призупинено до 09:00."
-                        )
-                        print("🌙 Тихий період: моніторинг призупинено до 09:00 (Київ)")
+                        self._send_status_message(QUIET_START_MESSAGE)
+                        log.info("🌙 Тихий період: моніторинг призупинено до 09:00 (Київ)")
 
                     sleep_seconds = self._seconds_to_next_transition(now_kyiv, is_quiet=True)
                     time.sleep(sleep_seconds)
@@ -185,28 +410,37 @@ class PaymentMonitorBot:
 
                 if self.is_quiet_mode:
                     self.is_quiet_mode = False
-                    self._send_status_message(
-                        "🌅 09:00 (Київ): моніторинг відновлено, продовжую роботу."
-                    )
-                    print("🌅 Моніторинг відновлено о 09:00 (Київ)")
-
+                    self._send_status_message(QUIET_END_MESSAGE)
+                    log.info("🌅 Моніторинг відновлено о 09:00 (Київ)")
+                    digest = self.build_digest()
+                    if digest:
+                        self._send_status_message(digest)
+
+                self.bscscan.limiter.start_cycle()
+                self.notifier.start_cycle()
                 self.check_new_transactions()
+                self.reconcile()
+                self.mark_delivered(self.notifier.retry())
+                self.sweep_invoices()
+                self.report_cycle()
+
+                interval = self.next_interval()
                 now_after_check = self._now_kyiv()
                 sleep_seconds = min(
-                    CHECK_INTERVAL, self._seconds_to_next_transition(now_after_check, is_quiet=False)
+                    interval, self._seconds_to_next_transition(now_after_check, is_quiet=False)
                 )
                 time.sleep(sleep_seconds)
         except KeyboardInterrupt:
-            print("\n\n🛑 Бот зупинено")
+            log.info("\n\n🛑 Бот зупинено")
             self.save_processed_txs()
+            flush_logs()
 
 
 if __name__ == "__main__":
-    bot = PaymentMonitorBot()
-    try:
-        tg = TelegramBot()
-        tg.send_message("✅ Бот стартував! Моніторинг активний.")
-        print("✅ Telegram OK")
-    except Exception as e:
-        print(f"⚠️ Telegram: {e}")
-    bot.run()
+    if ASYNC_RUNTIME or len(CHAINS) > 1:
+        # Кілька мереж — лише в asyncio-моніторі: сканування мереж паралельне
+        from async_bot import main
+        main()
+    else:
+        bot = PaymentMonitorBot()
+        bot.run()
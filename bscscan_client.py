@@ -1,21 +1,59 @@
 """
-Модуль для моніторингу USDT транзакцій на BSC.
+Модуль для моніторингу BEP-20 (USDT, USDC, ...) транзакцій на BSC
+та інших EVM-мережах з реєстру chains.py (клієнт на мережу).
 
 Стратегія:
-- QuickNode RPC: get_logs з topics[0] + фільтрація в Python
+- Bloom-префільтр: заголовки блоків пакетом, get_logs лише для блоків-кандидатів
+- QuickNode RPC: get_logs з topics[0] + фільтрація в Python по списку адрес;
+  для малого списку (WATCH_SERVER_FILTER_MAX) — OR-список у topics[2]
+- Опційний режим фільтра: eth_newFilter + eth_getFilterChanges (лише нові логи)
 - Опційний fallback на GetBlock RPC, якщо QuickNode недоступний
+- Усі токени з TOKEN_CONTRACTS — в одному get_logs (address = список)
+- Опційно BNB: повні блоки паралельними batch-запитами (TRACK_NATIVE)
+- Спам (пил, схожі адреси, часті відправники) відкидається до декодування
+- Перевірка переказів за хешем: receipts пакетами, паралельно
+- Усі RPC (web3 і batch) проходять через спільний RpcLimiter провайдера
+- Остаточні блоки (логи, заголовки, receipts) читаються з дискового кешу
+- FAST_START: web3 імпортується у фоні, поки з'єднання перевіряється
+  сирим JSON-RPC; замість фіксованої затримки — повтори при помилці
+- Профіль ендпоінта (profiler.py) задає чанк get_logs, розміри batch,
+  паралельність, стелю rps і вимикає непідтримувані можливості
 """
 import time
-from web3 import Web3
-from typing import List, Dict, Optional, Any
+import requests
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Optional, Any, Tuple
+from bloom import BloomQuery, address_topic, merge_ranges
+from chain_cache import ChainCache, shared_cache
+from chains import MULTI_CHAIN, Chain, get_chain, state_file
+from logging_setup import get_logger
+from native import match_native_block
+from profiler import load_profile
+from rate_limiter import CreditBudgetExceeded, RpcLimiter, limiter_for, provider_name
+from spam_filter import DUST, SpamFilter
+from tokens import TokenRegistry
+from transfer import INCOMING, OUTGOING, SELF, Transfer, decode_transfer_log, raw_bytes, raw_int
+from watchlist import WatchList
 from config import (
-    WALLET_ADDRESS, QUICKNODE_BSC_NODE, GETBLOCK_BSC_NODE,
-    INITIAL_CONNECTION_DELAY, USE_FALLBACK_ENDPOINT,
+    WALLET_ADDRESS, INITIAL_CONNECTION_DELAY,
+    USE_BLOOM_PRESCREEN, HEADER_BATCH_SIZE, USE_LOG_FILTER,
+    WATCH_SERVER_FILTER_MAX, BLOOM_MAX_ADDRESSES, TRACK_OUTGOING,
+    NATIVE_BLOCK_BATCH, NATIVE_CONCURRENCY, USE_SPAM_FILTER,
+    RECEIPT_BATCH_SIZE, HASH_CHECK_CONCURRENCY, BLOCK_TIME_CACHE_SIZE,
+    FAST_START, CONNECT_RETRIES, LOGS_CONCURRENCY, TOKENS_CACHE_FILE, SPAM_STATE_FILE,
 )
 
-USDT_CONTRACT_BSC = "0x55d398326f99059fF775485246999027B3197955"
+LOGS_CHUNK_BLOCKS = 20  # чанк get_logs без профілю ендпоінта (для bsc; інші мережі — з реєстру)
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
 TRANSFER_EVENT_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
 
+log = get_logger("client")
+_startup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="web3-import")
+
 
 def _to_hex(val: Any) -> str:
     if val is None:
@@ -33,50 +71,217 @@ def _extract_address(topic: Any) -> str:
     return "0x" + h[-40:]
 
 
+def make_web3(rpc_url: str, chain: Optional[Chain] = None) -> "Web3":
+    """
+    Web3 з кешем остаточних даних мережі і rate limiter провайдера.
+    Порядок: кеш -> limiter -> транспорт, тож влучання в кеш не
+    витрачає ні запитів, ні кредитів.
+    """
+    from web3 import Web3  # ~1.5 с імпорту; з FAST_START — у фоновому потоці
+
+    w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 30}))
+    cache = shared_cache(chain.key, chain.finality) if chain is not None else shared_cache()
+    if cache is not None:
+        w3.middleware_onion.inject(cache.middleware, "chain_cache", layer=0)
+    w3.middleware_onion.inject(limiter_for(rpc_url).middleware, "rate_limiter", layer=0)
+    return w3
+
+
 class BSCscanClient:
-    def __init__(self, rpc_url: str = None):
-        self.rpc_url = (rpc_url or QUICKNODE_BSC_NODE).rstrip("/")
+    def __init__(self, rpc_url: str = None, chain: Optional[Chain] = None):
+        self._setup(rpc_url, chain)
+
+        if INITIAL_CONNECTION_DELAY > 0 and not FAST_START:
+            print(f"⏳ Очікування {INITIAL_CONNECTION_DELAY} сек...", flush=True)
+            time.sleep(INITIAL_CONNECTION_DELAY)
+
+        self._verify_connection()
+        self._apply_profile()
+        self._resolve_tokens()
+        self._sync_watch()
+
+    def _setup(self, rpc_url: Optional[str], chain: Optional[Chain] = None):
+        """Стан клієнта без мережевих запитів."""
+        self.chain = chain or get_chain()
+        self.fallback_urls = [] if rpc_url else self.chain.rpc_urls[1:]
+        self.rpc_url = (rpc_url or (self.chain.rpc_urls or [""])[0]).rstrip("/")
         if not self.rpc_url:
             raise ValueError("QUICKNODE_BSC_NODE не встановлено!")
+        # У логах кількох мереж — назва мережі перед повідомленням
+        self.tag = f"[{self.chain.key}] " if MULTI_CHAIN else ""
 
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url, request_kwargs={"timeout": 30}))
-        self.usdt_contract = Web3.to_checksum_address(USDT_CONTRACT_BSC)
+        self._make_w3(self.rpc_url)
         self.wallet_lower = WALLET_ADDRESS.lower()
+        self.wallet_bytes = bytes.fromhex(self.wallet_lower[2:])
+        self.tokens = TokenRegistry(
+            self.chain.tokens, state_file(TOKENS_CACHE_FILE, self.chain.key), self.chain.native_symbol,
+        )
+        self.spam: Optional[SpamFilter] = (
+            SpamFilter(state_file(SPAM_STATE_FILE, self.chain.key)) if USE_SPAM_FILTER else None
+        )
+        self.watch = WatchList()
+        self._watch_version = -1
+        self.bloom_query: Optional[BloomQuery] = None
+        self.server_topics: Optional[List[str]] = None
+        self._header_method = "eth_getHeaderByNumber"
+        self._block_times: Dict[int, int] = {}  # спільний кеш часу блоків
+
+        self.use_log_filter = USE_LOG_FILTER
+        self.use_bloom = USE_BLOOM_PRESCREEN
+        self.logs_chunk = self.chain.logs_chunk or LOGS_CHUNK_BLOCKS
+        self.header_batch = HEADER_BATCH_SIZE
+        self.batch_supported = True  # False — профіль: вузол не приймає JSON-масив, _rpc_batch шле по одному
+        self.native_batch = NATIVE_BLOCK_BATCH
+        self.native_concurrency = NATIVE_CONCURRENCY
+        self.logs_concurrency = LOGS_CONCURRENCY
+        self.receipt_batch = RECEIPT_BATCH_SIZE
+        self.hash_concurrency = HASH_CHECK_CONCURRENCY
+        self.server_topics_max = WATCH_SERVER_FILTER_MAX
+        self.profile: Optional[Dict[str, Any]] = None
+        self._filter_id: Optional[str] = None
+        self._filter_covered_to = 0
 
         self.use_etherscan = False
 
-        if INITIAL_CONNECTION_DELAY > 0:
-            print(f"⏳ Очікування {INITIAL_CONNECTION_DELAY} сек...", flush=True)
-            time.sleep(INITIAL_CONNECTION_DELAY)
-
-        self._verify_connection()
+    def _make_w3(self, rpc_url: str):
+        self.limiter: RpcLimiter = limiter_for(rpc_url)
+        self.cache: Optional[ChainCache] = shared_cache(self.chain.key, self.chain.finality)
+        self._w3: Optional["Web3"] = None
+        self._w3_future: Optional[Future] = None
+        if FAST_START:
+            self._w3_future = _startup_pool.submit(make_web3, rpc_url, self.chain)
+        else:
+            self._w3 = make_web3(rpc_url, self.chain)
+
+    @property
+    def w3(self) -> "Web3":
+        """Web3; з FAST_START перше звернення чекає завершення фонового імпорту."""
+        if self._w3 is None:
+            self._w3 = self._w3_future.result() if self._w3_future else make_web3(self.rpc_url, self.chain)
+        return self._w3
+
+    def _rpc_call(self, method: str, params: Optional[list] = None) -> Any:
+        """Один JSON-RPC запит без web3 — доступний до завершення його імпорту."""
+        self.limiter.acquire(method)
+        resp = requests.post(
+            self.rpc_url,
+            json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params or []},
+            timeout=30,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        if "error" in data:
+            raise ValueError(data["error"].get("message", data["error"]))
+        return data.get("result")
+
+    def _block_number(self) -> int:
+        n = raw_int(self._rpc_call("eth_blockNumber"))
+        if self.cache is not None:
+            self.cache.observe_head(n)
+        return n
 
     def _verify_connection(self):
-        print(f"🔌 Підключення: {self.rpc_url[:50]}...", flush=True)
-        try:
-            n = self.w3.eth.block_number
-            print(f"✅ RPC OK. Блок: {n}", flush=True)
-            return
-        except Exception as e:
-            print(f"⚠️ QuickNode: {e}", flush=True)
+        print(f"🔌 {self.tag}Підключення: {self.rpc_url[:50]}...", flush=True)
+        for attempt in range(1, CONNECT_RETRIES + 1):
+            try:
+                n = self._block_number()
+                print(f"✅ {self.tag}RPC OK. Блок: {n}", flush=True)
+                return
+            except CreditBudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"⚠️ {self.tag}{provider_name(self.rpc_url)} (спроба {attempt}/{CONNECT_RETRIES}): {e}", flush=True)
+                if attempt < CONNECT_RETRIES:
+                    time.sleep(2 ** (attempt - 1))
 
-        if USE_FALLBACK_ENDPOINT and GETBLOCK_BSC_NODE:
-            print("⚠️ Спробуємо GetBlock...", flush=True)
+        # Резервні RPC мережі (для bsc — GetBlock з USE_FALLBACK_ENDPOINT)
+        for url in self.fallback_urls:
+            print(f"⚠️ {self.tag}Спробуємо резервний RPC {url[:50]}...", flush=True)
             try:
-                self.rpc_url = GETBLOCK_BSC_NODE.rstrip("/")
-                self.w3 = Web3(Web3.HTTPProvider(self.rpc_url, request_kwargs={"timeout": 30}))
-                n = self.w3.eth.block_number
-                print(f"✅ GetBlock OK. Блок: {n}", flush=True)
+                self.rpc_url = url
+                self._make_w3(self.rpc_url)
+                n = self._block_number()
+                print(f"✅ {self.tag}Резервний RPC OK. Блок: {n}", flush=True)
                 return
             except Exception as e2:
-                print(f"❌ GetBlock: {e2}", flush=True)
-        raise ConnectionError("Не вдалося підключитися до RPC")
+                print(f"❌ {self.tag}{e2}", flush=True)
+        raise ConnectionError(f"{self.tag}Не вдалося підключитися до RPC")
+
+    def _apply_profile(self):
+        """
+        Налаштування з профілю ендпоінта (profiler.py). Профіль лише
+        зменшує значення з config: чанк і batch не більші за виміряні межі,
+        rps не вищий за стійкий, непідтримувані можливості вимикаються.
+        """
+        self.profile = load_profile(self.rpc_url)
+        if not self.profile:
+            return
+        p = self.profile
+        rec = p["recommended"]
+        self.logs_chunk = rec["logs_chunk"] or self.logs_chunk
+        if p["batch"]:
+            self.header_batch = min(self.header_batch, rec["header_batch"])
+            self.native_batch = min(self.native_batch, rec["native_batch"])
+            self.receipt_batch = min(self.receipt_batch, rec["receipt_batch"])
+        else:
+            # bloom-префільтр без batch коштував би запит на кожен заголовок
+            self.use_bloom = False
+            self.batch_supported = False
+            self.header_batch = self.native_batch = self.receipt_batch = 1
+        self.native_concurrency = min(self.native_concurrency, rec["concurrency"])
+        self.logs_concurrency = min(self.logs_concurrency, rec["concurrency"])
+        self.hash_concurrency = min(self.hash_concurrency, rec["concurrency"])
+        self.server_topics_max = min(self.server_topics_max, rec["server_topics_max"])
+        if not rec["use_log_filter"]:
+            self.use_log_filter = False
+        self._header_method = p["header_method"]
+        self.limiter.cap_rate(rec["rps"])
+        print(
+            f"📐 Профіль ({p['measured_at']}): чанк get_logs {self.logs_chunk}, "
+            f"batch {self.header_batch}, паралельність {self.native_concurrency}, "
+            f"{self.limiter.bucket.rate:g} зап/с",
+            flush=True,
+        )
+
+    def _resolve_tokens(self):
+        """decimals/symbol для всіх контрактів; без них суми були б хибними."""
+        self.tokens.resolve(self._rpc_batch, self._rpc_call)
+        if self.tokens.unresolved:
+            raise ConnectionError(f"Не вдалося отримати метадані токенів: {', '.join(self.tokens.unresolved)}")
+        print(f"🪙 {self.tag}Токени: {self.tokens.describe()}", flush=True)
+        if self.spam is not None:
+            self.spam.set_tokens(self.tokens)
+
+    def _sync_watch(self):
+        """
+        Перебудовує bloom-запит і стратегію get_logs після зміни списку адрес.
+        Для великого списку bloom майже завжди позитивний — префільтр вимикається.
+        """
+        self.watch.refresh()
+        if self.watch.version == self._watch_version:
+            return
+        self._watch_version = self.watch.version
+        if self.spam is not None:
+            # підробки під наші власні адреси теж відсікаються
+            for addr in self.watch:
+                self.spam.learn(addr, trusted=True)
+
+        # Вихідні видно лише у topics[1], тож з TRACK_OUTGOING фільтр на вузлі не використовуємо
+        self.server_topics = None if TRACK_OUTGOING else self.watch.server_topics(self.server_topics_max)
+        self.bloom_query = None
+        if len(self.watch) <= BLOOM_MAX_ADDRESSES:
+            self.bloom_query = BloomQuery([
+                self.tokens.address_bytes,
+                [address_topic(addr) for addr in self.watch],
+            ])
+        mode = "topics[2] на вузлі" if self.server_topics else "фільтрація в Python"
+        print(f"📋 {self.tag}Адрес у моніторингу: {len(self.watch)} ({mode})", flush=True)
 
     def get_latest_block(self) -> Optional[int]:
         try:
-            return self.w3.eth.block_number
+            return self._block_number()
         except Exception as e:
-            print(f"❌ get_latest_block: {e}", flush=True)
+            print(f"❌ {self.tag}get_latest_block: {e}", flush=True)
             return None
 
     # =====================================================
@@ -100,30 +305,52 @@ class BSCscanClient:
         self._test_rpc(latest)
         print(f"🌐 Метод: QuickNode RPC", flush=True)
 
+        print(f"\n--- Профіль ендпоінта ---", flush=True)
+        if self.profile:
+            p = self.profile
+            logs = p["get_logs"]
+            print(f"📐 Виміряно: {p['measured_at']}", flush=True)
+            print(
+                f"   затримка p50/p90/p99: {p['latency_ms']['p50']}/{p['latency_ms']['p90']}/"
+                f"{p['latency_ms']['p99']} мс, стійко {p['rps']:g} зап/с",
+                flush=True,
+            )
+            print(
+                f"   batch: {'до ' + str(p['batch_max']) if p['batch'] else 'ні'}, "
+                f"get_logs: до {logs['max_range']} блоків ({logs['max_bytes'] / 1024:.0f} КБ), "
+                f"topics[2]: {'до ' + str(p['topics_or_max']) if p['topics_filter'] else 'ні'}, "
+                f"eth_newFilter: {'так' if p['log_filter'] else 'ні'}",
+                flush=True,
+            )
+        else:
+            print("ℹ️ Профілю немає — значення з config. Виміряти: python profiler.py", flush=True)
+
         print(f"{'='*60}", flush=True)
         return True
 
     def _test_rpc(self, latest_block: int):
-        print(f"🔍 RPC get_logs для блоку {latest_block} (всі USDT події)...", flush=True)
+        """Transfer-події токенів мережі в одному блоці (контракти — з chain.tokens)."""
+        print(f"🔍 RPC get_logs для блоку {latest_block} (токени мережі {self.chain.key})...", flush=True)
         try:
-            logs = self.w3.eth.get_logs({
-                "fromBlock": latest_block,
-                "toBlock": latest_block,
-                "address": self.usdt_contract,
+            logs = self._rpc_call("eth_getLogs", [{
+                "fromBlock": hex(latest_block),
+                "toBlock": hex(latest_block),
+                "address": self.tokens.addresses,
                 "topics": [TRANSFER_EVENT_TOPIC],
-            })
-            print(f"   📋 Блок {latest_block}: {len(logs)} USDT подій", flush=True)
+            }])
+            print(f"   📋 Блок {latest_block}: {len(logs)} подій Transfer", flush=True)
 
             our_count = 0
             for lg in logs:
                 topics = lg.get("topics", [])
-                if len(topics) >= 3:
+                token = self.tokens.get(raw_bytes(lg.get("address")))
+                if len(topics) >= 3 and token is not None:
                     to_addr = _extract_address(topics[2])
                     if to_addr == self.wallet_lower:
                         our_count += 1
                         data_hex = _to_hex(lg.get("data", "0x0"))
                         value = int(data_hex, 16) if data_hex and data_hex != "0x" else 0
-                        print(f"   💰 НАШ ПЛАТІЖ! {value/1e18:.2f} USDT", flush=True)
+                        print(f"   💰 НАШ ПЛАТІЖ! {value / 10**token.decimals:.2f} {token.symbol}", flush=True)
 
             if our_count == 0:
                 print(f"   ℹ️ Немає наших транзакцій у цьому блоці (нормально)", flush=True)
@@ -137,24 +364,214 @@ class BSCscanClient:
 
     def get_token_transactions(
         self, start_block: int = 0, end_block: int = 99999999
-    ) -> List[Dict]:
+    ) -> List[Transfer]:
         start_block = max(0, start_block)
         if start_block > end_block:
             return []
+        self._sync_watch()
 
         block_count = end_block - start_block + 1
 
-        print(f"🔍 RPC: блоки {start_block}-{end_block} ({block_count})", flush=True)
+        log.info("🔍 %sRPC: блоки %d-%d (%d)", self.tag, start_block, end_block, block_count, extra={"sample": self.tag + "range"})
         txs = self._rpc_get_transfers(start_block, end_block)
         self._log_found(txs)
         return txs
 
-    def _log_found(self, txs: List[Dict]):
-        if txs:
-            for tx in txs:
-                amount = int(tx.get("value", 0)) / (10 ** int(tx.get("tokenDecimal", 18)))
-                print(f"   💰 Блок {tx.get('blockNumber')}: {amount:.2f} USDT від {tx.get('from', '')[:16]}...", flush=True)
-        print(f"   ✅ Знайдено {len(txs)} вхідних USDT транзакцій", flush=True)
+    def _log_found(self, txs: List[Transfer]):
+        incoming = 0
+        for tx in txs:
+            if tx.direction == INCOMING:
+                incoming += 1
+                log.debug("   💰 Блок %d: %.2f %s від %s...", tx.block_number, tx.amount, tx.symbol, tx.from_address[:16])
+            else:
+                log.debug("   📤 Блок %d: %.2f %s на %s...", tx.block_number, tx.amount, tx.symbol, tx.to_address[:16])
+        log.info(
+            "   ✅ %sЗнайдено %d вхідних транзакцій", self.tag, incoming,
+            extra={"sample": self.tag + "found"} if not txs else None,
+        )
+        if len(txs) > incoming:
+            log.info("   ✅ %sВихідних / між нашими адресами: %d", self.tag, len(txs) - incoming)
+
+    # =====================================================
+    #  BLOOM-ПРЕФІЛЬТР
+    # =====================================================
+
+    def _rpc_batch(self, calls: List[Tuple[str, list]]) -> List[Any]:
+        """
+        JSON-RPC batch одним HTTP-запитом (без підтримки batch у профілі —
+        по одному _rpc_call). Повертає результати в порядку calls; None для
+        елементів з помилкою. Елементи, знайдені в кеші, у запит не потрапляють.
+        Збій самого запиту (таймаут, HTTP-помилка, не JSON) — ConnectionError.
+        """
+        results: List[Any] = [None] * len(calls)
+        pending = list(range(len(calls)))
+        if self.cache is not None:
+            found, pending = self.cache.lookup_batch(calls)
+            for idx, result in found.items():
+                results[idx] = result
+            if not pending:
+                return results
+
+        if not self.batch_supported:
+            for idx in pending:
+                try:
+                    results[idx] = self._rpc_call(*calls[idx])
+                except CreditBudgetExceeded:
+                    raise
+                except Exception:
+                    continue
+                if self.cache is not None:
+                    self.cache.put(calls[idx][0], calls[idx][1], results[idx])
+            return results
+
+        payload = [
+            {"jsonrpc": "2.0", "id": idx, "method": calls[idx][0], "params": calls[idx][1]}
+            for idx in pending
+        ]
+        for method, count in Counter(calls[idx][0] for idx in pending).items():
+            self.limiter.acquire(method, count)
+        try:
+            resp = requests.post(self.rpc_url, json=payload, timeout=30)
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            # Timeout/HTTPError requests — не builtin ConnectionError: цикл бота їх не ловить
+            raise ConnectionError(f"batch {calls[pending[0]][0]} ({len(pending)}): {e}") from e
+        if not isinstance(data, list):
+            raise ConnectionError(f"batch не підтримується: {data.get('error', data)}")
+
+        for item in data:
+            idx = item.get("id")
+            if isinstance(idx, int) and 0 <= idx < len(calls):
+                results[idx] = item.get("result")
+                if self.cache is not None:
+                    self.cache.put(calls[idx][0], calls[idx][1], results[idx])
+        return results
+
+    def get_block_timestamps(self, blocks: List[int]) -> Dict[int, int]:
+        """
+        Час блоків пакетами заголовків (header_batch на batch), без
+        get_block на кожен. Відомі блоки беруться зі спільного кешу в пам'яті.
+        ConnectionError — час отримати не вдалося: курсор не зсувається,
+        діапазон перевіримо наступного циклу.
+        """
+        out, missing = self._cached_block_times(blocks)
+        for part in self._batches(missing, self.header_batch):
+            headers = self._rpc_batch(self._block_calls(part))
+            out.update(self._header_fields(part, headers, "timestamp", raw_int))
+        self._remember_block_times(out, missing)
+        return out
+
+    def get_block_hashes(self, blocks: List[int]) -> Dict[int, bytes]:
+        """Поточні хеші блоків пакетами заголовків — для перевірки реорганізацій."""
+        out: Dict[int, bytes] = {}
+        for part in self._batches(blocks, self.header_batch):
+            headers = self._rpc_batch(self._block_calls(part))
+            out.update(self._header_fields(part, headers, "hash", raw_bytes))
+        return out
+
+    # Нижче — розбір запитів і відповідей без транспорту: спільний з AsyncBSCscanClient
+
+    @staticmethod
+    def _batches(items: List[Any], size: int) -> List[List[Any]]:
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    @staticmethod
+    def _block_calls(numbers: List[int], full: bool = False) -> List[Tuple[str, list]]:
+        return [("eth_getBlockByNumber", [hex(bn), full]) for bn in numbers]
+
+    @staticmethod
+    def _header_fields(part: List[int], headers: List[Any], field: str, convert) -> Dict[int, Any]:
+        """Поле заголовків пакета за номером блоку; ConnectionError — вузол не повернув блок."""
+        out = {}
+        for bn, header in zip(part, headers):
+            if not header:
+                raise ConnectionError(f"Немає заголовка блоку {bn}")
+            out[bn] = convert(header.get(field))
+        return out
+
+    def _cached_block_times(self, blocks: List[int]) -> Tuple[Dict[int, int], List[int]]:
+        """(відомий час блоків, блоки, яких немає в кеші)."""
+        times = self._block_times
+        out = {bn: times[bn] for bn in blocks if bn in times}
+        return out, [bn for bn in blocks if bn not in out]
+
+    def _remember_block_times(self, out: Dict[int, int], missing: List[int]):
+        if missing:
+            times = self._block_times
+            if len(times) > BLOCK_TIME_CACHE_SIZE:
+                times.clear()
+            times.update((bn, out[bn]) for bn in missing)
+
+    def _fetch_blooms(self, start_block: int, end_block: int) -> Dict[int, bytes]:
+        """
+        logsBloom для діапазону блоків пакетами по header_batch.
+        eth_getHeaderByNumber не тягне список транзакцій; якщо провайдер
+        його не знає — переходимо на eth_getBlockByNumber(n, false).
+        """
+        blooms: Dict[int, bytes] = {}
+        for numbers in self._batches(list(range(start_block, end_block + 1)), self.header_batch):
+            method = self._header_method
+            headers = self._rpc_batch(self._bloom_calls(numbers, method))
+            if self._header_unsupported(method, headers):
+                headers = self._rpc_batch(self._bloom_calls(numbers, self._header_method))
+            self._read_blooms(numbers, headers, blooms)
+        return blooms
+
+    def _bloom_calls(self, numbers: List[int], method: str) -> List[Tuple[str, list]]:
+        if method == "eth_getHeaderByNumber":
+            return [(method, [hex(bn)]) for bn in numbers]
+        return self._block_calls(numbers)
+
+    def _header_unsupported(self, method: str, headers: List[Any]) -> bool:
+        """
+        True — eth_getHeaderByNumber не повернув жодного заголовка: метод
+        перемкнено на eth_getBlockByNumber, пакет треба запитати ще раз.
+        """
+        if method != "eth_getHeaderByNumber" or any(headers):
+            return False
+        # паралельний пакет міг уже перемкнути метод, поки чекали відповідь
+        if self._header_method == method:
+            log.info("      ℹ️ eth_getHeaderByNumber недоступний → eth_getBlockByNumber")
+            self._header_method = "eth_getBlockByNumber"
+        return True
+
+    @staticmethod
+    def _read_blooms(numbers: List[int], headers: List[Any], blooms: Dict[int, bytes]):
+        for bn, header in zip(numbers, headers):
+            if header and header.get("logsBloom"):
+                blooms[bn] = raw_bytes(header["logsBloom"])
+
+    def _bloom_candidate_ranges(
+        self, start_block: int, end_block: int
+    ) -> Optional[List[Tuple[int, int]]]:
+        """
+        Діапазони блоків, у яких bloom містить один з контрактів токенів і topic однієї з адрес.
+        Блоки без bloom вважаються кандидатами. None — префільтр не вдався,
+        треба сканувати весь діапазон.
+        """
+        try:
+            blooms = self._fetch_blooms(start_block, end_block)
+        except CreditBudgetExceeded:
+            raise
+        except Exception as e:
+            log.warning("      ⚠️ Bloom-префільтр: %s", e, extra={"sample": "bloom_error"})
+            return None
+        return self._candidate_ranges(start_block, end_block, blooms)
+
+    def _candidate_ranges(self, start_block: int, end_block: int, blooms: Dict[int, bytes]) -> List[Tuple[int, int]]:
+        """Блоки, чий bloom може містити наш переказ (або bloom невідомий), злиті в діапазони."""
+        candidates = [
+            bn for bn in range(start_block, end_block + 1)
+            if bn not in blooms or self.bloom_query.matches(blooms[bn])
+        ]
+        ranges = merge_ranges(candidates)
+        total = end_block - start_block + 1
+        log.debug(
+            "      🌸 Bloom: %d/%d блоків-кандидатів, %d діапазонів get_logs",
+            len(candidates), total, len(ranges), extra={"sample": "bloom"},
+        )
+        return ranges
 
     # =====================================================
     #  МЕТОД: RPC — без topics[2], фільтрація в Python
@@ -162,119 +579,388 @@ class BSCscanClient:
 
     def _rpc_get_transfers(
         self, start_block: int, end_block: int
-    ) -> List[Dict]:
+    ) -> List[Transfer]:
         """
-        Отримує ВСІ USDT Transfer логи і фільтрує для нашого гаманця в Python.
-        Спочатку пробує чанки по 5 блоків (5x менше API calls).
-        Якщо 413 — зменшує розмір чанку.
+        Отримує ВСІ Transfer логи токенів і фільтрує для наших адрес в Python.
+        З bloom-префільтром get_logs йде лише по блоках-кандидатах.
+        Чанк — з профілю ендпоінта (без нього 20 блоків); якщо 413 — зменшується.
+        Час блоків знайдених логів — пакетами заголовків після всіх чанків.
         """
-        all_txs = []
-        chunk_size = 20
-        pos = start_block
+        ranges = [(start_block, end_block)]
+        if self.use_bloom and self.bloom_query is not None:
+            candidates = self._bloom_candidate_ranges(start_block, end_block)
+            if candidates is not None:
+                ranges = candidates
+
+        selected = []
+        chunk_size = self.logs_chunk
+
+        for range_start, range_end in ranges:
+            pos = range_start
+            while pos <= range_end:
+                chunk_end = min(pos + chunk_size - 1, range_end)
+
+                try:
+                    logs = self.w3.eth.get_logs(self._logs_filter(pos, chunk_end))
+
+                    selected.extend(self._select_logs(logs))
+                    pos = chunk_end + 1
+
+                except CreditBudgetExceeded:
+                    raise
+                except Exception as e:
+                    if self._too_large(e) and chunk_size > 1:
+                        chunk_size = max(1, chunk_size // 2)
+                        log.warning("      ⚠️ 413 — чанк → %d", chunk_size, extra={"sample": "chunk_413"})
+                        continue
 
-        while pos <= end_block:
-            chunk_end = min(pos + chunk_size - 1, end_block)
+                    log.warning("      ⚠️ %d-%d: %s", pos, chunk_end, e, extra={"sample": "chunk_error"})
+                    pos = chunk_end + 1
 
-            try:
-                logs = self.w3.eth.get_logs({
-                    "fromBlock": pos,
-                    "toBlock": chunk_end,
-                    "address": self.usdt_contract,
-                    "topics": [TRANSFER_EVENT_TOPIC],
-                })
-
-                for lg in logs:
-                    topics = lg.get("topics", [])
-                    if len(topics) < 3:
-                        continue
+        return self._decode_with_times(selected)
 
-                    to_addr = _extract_address(topics[2])
-                    if to_addr != self.wallet_lower:
-                        continue
+    def _logs_filter(self, start: int, end: int) -> Dict[str, Any]:
+        """Параметри eth_getLogs: Transfer усіх токенів; для малого списку адрес — OR у topics[2]."""
+        topics = [TRANSFER_EVENT_TOPIC]
+        if self.server_topics:
+            topics = [TRANSFER_EVENT_TOPIC, None, self.server_topics]
+        return {
+            "fromBlock": hex(start),
+            "toBlock": hex(end),
+            "address": self.tokens.addresses,
+            "topics": topics,
+        }
 
-                    bn = lg.get("blockNumber", pos)
-                    tx = self._parse_log_rpc(lg, bn)
-                    if tx:
-                        all_txs.append(tx)
-                        amount = int(tx["value"]) / 1e18
-                        print(f"      🎯 Блок {bn}: {amount:.2f} USDT", flush=True)
+    @staticmethod
+    def _too_large(e: Exception) -> bool:
+        """Вузол відмовив через розмір відповіді (413) — чанк треба зменшити."""
+        err_str = str(e).lower()
+        return "413" in err_str or "too large" in err_str
 
-                pos = chunk_end + 1
+    def _match_logs(self, logs: List[Any]) -> List[Transfer]:
+        """
+        Відбирає Transfer-логи, що стосуються адрес зі списку, і декодує їх.
+        Напрямок визначається в тому ж проході: topics[2] — вхідний,
+        topics[1] (з TRACK_OUTGOING) — вихідний, обидва — між нашими адресами.
+        """
+        return self._decode_with_times(self._select_logs(logs))
 
-            except Exception as e:
-                err_str = str(e).lower()
-                if ("413" in err_str or "too large" in err_str) and chunk_size > 1:
-                    chunk_size = max(1, chunk_size // 2)
-                    print(f"      ⚠️ 413 — чанк → {chunk_size}", flush=True)
-                    continue
+    def _decode_with_times(self, selected: List[Tuple[Any, Any, str, str]]) -> List[Transfer]:
+        """Час усіх блоків сторінки — одним get_block_timestamps(), не get_block на лог."""
+        blocks = self._selected_blocks(selected)
+        times = self.get_block_timestamps(blocks) if blocks else {}
+        return self._decode_selected(selected, times)
+
+    def _select_logs(self, logs: List[Any]) -> List[Tuple[Any, Any, str, str]]:
+        """
+        (лог, токен, напрямок, підозра) для логів, що стосуються наших адрес.
+        Пил відкидається; схожа адреса чи частота — лише позначка (spam_filter.py).
+        """
+        selected = []
+        contains_word = self.watch.contains_word
+        spam = self.spam
+        for lg in logs:
+            topics = lg.get("topics", [])
+            if len(topics) < 3:
+                continue
+
+            direction = self._direction(contains_word, topics)
+            if direction is None:
+                continue
+
+            # до декодування і заголовків: пил не коштує RPC-викликів
+            suspect = spam.check(lg, direction) if spam is not None else ""
+            if suspect == DUST:
+                continue
+
+            token = self.tokens.get(raw_bytes(lg.get("address")))
+            if token is None:
+                continue
+            selected.append((lg, token, direction, suspect))
+        return selected
+
+    def _decode_selected(self, selected: List[Tuple[Any, Any, str, str]], times: Dict[int, int]) -> List[Transfer]:
+        """Декодує відібрані _select_logs() логи з часом блоків з get_block_timestamps()."""
+        txs = []
+        for lg, token, direction, suspect in selected:
+            tx = decode_transfer_log(
+                lg, timestamp=times[raw_int(lg.get("blockNumber"))],
+                decimals=token.decimals, symbol=token.symbol, direction=direction, chain=self.chain.key,
+                suspect=suspect,
+            )
+            txs.append(tx)
+            mark = "🎯" if direction == INCOMING else "📤"
+            log.debug("      %s Блок %d: %.2f %s", mark, tx.block_number, tx.amount, tx.symbol)
+        return txs
+
+    @staticmethod
+    def _selected_blocks(selected: List[Tuple[Any, ...]]) -> List[int]:
+        return sorted({raw_int(item[0].get("blockNumber")) for item in selected})
+
+    @staticmethod
+    def _direction(contains_word, topics: List[Any]) -> Optional[str]:
+        """Напрямок переказу відносно наших адрес; None — не наш."""
+        to_ours = contains_word(topics[2])
+        from_ours = TRACK_OUTGOING and contains_word(topics[1])
+        if to_ours:
+            return SELF if from_ours else INCOMING
+        if from_ours:
+            return OUTGOING
+        return None
 
-                print(f"      ⚠️ {pos}-{chunk_end}: {e}", flush=True)
-                pos = chunk_end + 1
+    # =====================================================
+    #  МЕТОД: ФІЛЬТР — eth_newFilter + eth_getFilterChanges
+    # =====================================================
 
-            if pos <= end_block:
-                time.sleep(0.3)
+    def get_new_token_transactions(self, start_block: int, end_block: int) -> List[Transfer]:
+        """
+        Нові перекази з моменту попереднього виклику.
+        З USE_LOG_FILTER вузол сам накопичує нові логи, і ми забираємо лише
+        дельту; без фільтра (або якщо він не підтримується) — звичайний
+        range-скан start_block..end_block.
+        """
+        if not self.use_log_filter:
+            return self.get_token_transactions(start_block, end_block)
+        self._sync_watch()
+
+        if self._filter_id is None:
+            head = self._install_filter(end_block + 1)
+            if head is None:
+                return self.get_token_transactions(start_block, end_block)
+            # Логи до встановлення фільтра (і блоки, що з'явились після end_block) добираємо range-сканом
+            covered = max(end_block, head)
+            txs = self.get_token_transactions(start_block, covered)
+            self._filter_covered_to = covered
+            return txs
 
-        return all_txs
+        try:
+            logs = self.w3.eth.get_filter_changes(self._filter_id)
+        except CreditBudgetExceeded:
+            raise
+        except Exception as e:
+            err = str(e).lower()
+            if "filter" not in err or ("not found" not in err and "not exist" not in err):
+                log.warning("⚠️ eth_getFilterChanges: %s", e)
+                return []
+            log.warning("⚠️ Фільтр протермінований — перевстановлюю і добираю пропуск")
+            self._filter_id = None
+            gap_start = self._filter_covered_to + 1
+            head = self._install_filter(end_block + 1)
+            if head is None:
+                return self.get_token_transactions(gap_start, end_block)
+            covered = max(end_block, head)
+            txs = self.get_token_transactions(gap_start, covered)
+            self._filter_covered_to = covered
+            return txs
+
+        fresh = []
+        for lg in logs:
+            if lg.get("removed"):
+                continue
+            # Блоки, вже покриті range-сканом, пропускаємо
+            if lg.get("blockNumber", 0) <= self._filter_covered_to:
+                continue
+            fresh.append(lg)
+
+        log.info("🔍 Фільтр: %d нових Transfer подій", len(logs))
+        try:
+            txs = self._match_logs(fresh)
+        except Exception as e:
+            # eth_getFilterChanges уже віддав ці логи і вдруге їх не поверне:
+            # скидаємо фільтр, _filter_covered_to не чіпаємо — наступний цикл
+            # перевстановить його і добере range-сканом усе після covered_to
+            self._filter_id = None
+            log.warning("⚠️ Дельта фільтра не розібрана — наступний цикл перескане діапазон: %s", e)
+            if isinstance(e, (CreditBudgetExceeded, ConnectionError)):
+                raise
+            raise ConnectionError(f"Дельта фільтра: {e}") from e
+        # eth_getFilterChanges віддає все до поточної голови вузла (>= end_block)
+        self._filter_covered_to = max(
+            [end_block] + [lg["blockNumber"] for lg in fresh]
+        )
+        self._log_found(txs)
+        return txs
 
-    def _parse_log_rpc(self, lg: Any, block_num: int) -> Optional[Dict]:
+    def _install_filter(self, from_block: int) -> Optional[int]:
+        """
+        Встановлює log-фільтр на Transfer усіх токенів від from_block.
+        Повертає голову вузла після встановлення: більшість вузлів віддає
+        в eth_getFilterChanges лише логи нових блоків, тож from_block..голову
+        викликач добирає range-сканом. None — вузол не підтримує фільтри.
+        """
         try:
-            topics = lg.get("topics", [])
-            from_addr = _extract_address(topics[1])
-            to_addr = _extract_address(topics[2])
+            log_filter = self.w3.eth.filter({
+                "fromBlock": hex(from_block),
+                "address": self.tokens.addresses,
+                "topics": [TRANSFER_EVENT_TOPIC],
+            })
+            self._filter_id = log_filter.filter_id
+        except CreditBudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"⚠️ eth_newFilter недоступний, працюю range-сканом: {e}", flush=True)
+            self.use_log_filter = False
+            return None
+        try:
+            head = self._block_number()
+        except CreditBudgetExceeded:
+            self._filter_id = None
+            raise
+        except Exception as e:
+            # без голови не знаємо, що добирати: фільтр вузла сам протермінується
+            self._filter_id = None
+            raise ConnectionError(f"Голова після eth_newFilter: {e}")
+        print(f"✅ Log-фільтр встановлено: {self._filter_id} (блок {head})", flush=True)
+        return head
 
-            data_hex = _to_hex(lg.get("data", "0x0"))
-            value = int(data_hex, 16) if data_hex and data_hex != "0x" else 0
+    # =====================================================
+    #  МЕТОД: BNB — повні блоки пакетами
+    # =====================================================
 
-            tx_hash = _to_hex(lg.get("transactionHash", ""))
-            if not tx_hash.startswith("0x"):
-                tx_hash = "0x" + tx_hash
+    def get_native_transactions(self, start_block: int, end_block: int) -> List[Transfer]:
+        """
+        Вхідні перекази BNB на адреси зі списку.
+        Повні блоки пакетами по native_batch, до native_concurrency
+        пакетів паралельно (спільний limiter тримає ліміт провайдера).
+        Якщо блок не вдалося отримати — ConnectionError: курсор не
+        зсувається, діапазон перевіримо наступного циклу.
+        """
+        start_block = max(0, start_block)
+        if start_block > end_block:
+            return []
+        self._sync_watch()
 
-            timestamp = 0
+        def fetch(numbers: List[int]) -> List[Transfer]:
+            calls = self._block_calls(numbers, full=True)
             try:
-                block = self.w3.eth.get_block(block_num)
-                timestamp = block.get("timestamp", 0) if block else 0
-            except Exception:
-                pass
-
-            return {
-                "hash": tx_hash,
-                "from": from_addr,
-                "to": to_addr,
-                "value": str(value),
-                "tokenSymbol": "USDT",
-                "tokenDecimal": "18",
-                "timeStamp": str(timestamp),
-                "blockNumber": str(block_num),
-                "contractAddress": USDT_CONTRACT_BSC,
-            }
-        except Exception as e:
-            print(f"   ⚠️ _parse_log: {e}", flush=True)
-            return None
+                blocks = self._rpc_batch(calls)
+                if None in blocks:
+                    blocks = self._rpc_batch(calls)
+            except CreditBudgetExceeded:
+                raise
+            except Exception as e:
+                raise ConnectionError(f"{self.chain.native_symbol}: блоки {numbers[0]}-{numbers[-1]}: {e}")
+            return self._match_native(numbers, blocks)
+
+        batches = self._native_batches(start_block, end_block)
+        txs: List[Transfer] = []
+        with ThreadPoolExecutor(max_workers=self.native_concurrency) as pool:
+            for found in pool.map(fetch, batches):
+                txs.extend(found)
+        self._log_native_found(txs)
+        return txs
+
+    def _native_batches(self, start_block: int, end_block: int) -> List[List[int]]:
+        batches = self._batches(list(range(start_block, end_block + 1)), self.native_batch)
+        log.info(
+            "🔍 %s%s: блоки %d-%d (%d batch)", self.tag, self.chain.native_symbol, start_block, end_block,
+            len(batches), extra={"sample": self.tag + "native_range"},
+        )
+        return batches
+
+    def _match_native(self, numbers: List[int], blocks: List[Any]) -> List[Transfer]:
+        """Вхідні перекази пакета повних блоків; ConnectionError — вузол не повернув блок."""
+        symbol = self.chain.native_symbol
+        if None in blocks:
+            raise ConnectionError(f"{symbol}: вузол не повернув блок {numbers[blocks.index(None)]}")
+        contains = self.watch.addresses.__contains__
+        found = []
+        for block in blocks:
+            found.extend(match_native_block(block, contains, symbol, self.chain.key))
+        return found
+
+    def _log_native_found(self, txs: List[Transfer]):
+        symbol = self.chain.native_symbol
+        for tx in txs:
+            log.debug("   💰 Блок %d: %s %s від %s...", tx.block_number, tx.amount, symbol, tx.from_address[:16])
+        log.info(
+            "   ✅ %sЗнайдено %d вхідних %s переказів", self.tag, len(txs), symbol,
+            extra={"sample": self.tag + "native_found"} if not txs else None,
+        )
 
     # =====================================================
-    #  ФОРМАТУВАННЯ
+    #  ПЕРЕВІРКА ЗА ХЕШЕМ ТРАНЗАКЦІЇ
     # =====================================================
 
-    def format_transaction(self, tx: Dict) -> Dict:
-        value = int(tx.get("value", 0))
-        decimals = int(tx.get("tokenDecimal", 18))
-        amount = value / (10 ** decimals)
+    def check_transactions_by_hash(self, tx_hashes: List[str]) -> Dict[str, Optional[List[Transfer]]]:
+        """
+        Перекази токенів на/з наших адрес у заданих транзакціях.
+        Receipts — пакетами по receipt_batch, до hash_concurrency
+        пакетів паралельно; час блоків — одним пакетом зі спільного кешу.
+        Результат для кожного хешу (у нижньому регістрі): None — receipt
+        немає (невідомий хеш або ще не в блоці), [] — немає наших переказів.
+        """
+        self._sync_watch()
+        hashes = self._normalize_hashes(tx_hashes)
+        batches = self._batches(hashes, self.receipt_batch)
+
+        def fetch(batch: List[str]) -> List[Any]:
+            return self._rpc_batch(self._receipt_calls(batch))
+
+        receipts: Dict[str, Any] = {}
+        with ThreadPoolExecutor(max_workers=self.hash_concurrency) as pool:
+            for batch, results in zip(batches, pool.map(fetch, batches)):
+                receipts.update(zip(batch, results))
+
+        matched = self._match_receipts(receipts)
+        blocks = self._selected_blocks([item for found in matched.values() for item in found])
+        times = self.get_block_timestamps(blocks) if blocks else {}
+        return self._decode_matched(hashes, matched, times)
+
+    @staticmethod
+    def _normalize_hashes(tx_hashes: List[str]) -> List[str]:
+        return list(dict.fromkeys(h.strip().lower() for h in tx_hashes if h.strip()))
+
+    @staticmethod
+    def _receipt_calls(batch: List[str]) -> List[Tuple[str, list]]:
+        return [("eth_getTransactionReceipt", [h]) for h in batch]
+
+    def _match_receipts(self, receipts: Dict[str, Any]) -> Dict[str, List[Tuple[Any, Any, str]]]:
+        """Transfer-логи токенів з наших адрес/на наші адреси в кожному receipt."""
+        contains_word = self.watch.contains_word
+        transfer_topic = raw_bytes(TRANSFER_EVENT_TOPIC)
+        matched: Dict[str, List[Tuple[Any, Any, str]]] = {}
+        for tx_hash, receipt in receipts.items():
+            if receipt is None:
+                continue
+            found = matched[tx_hash] = []
+            for lg in receipt.get("logs") or []:
+                topics = [raw_bytes(t) for t in lg.get("topics") or []]
+                if len(topics) < 3 or topics[0] != transfer_topic:
+                    continue
+                token = self.tokens.get(raw_bytes(lg.get("address")))
+                if token is None:
+                    continue
+                direction = self._direction(contains_word, topics)
+                if direction is not None:
+                    found.append((lg, token, direction))
+        return matched
+
+    def _decode_matched(
+        self, hashes: List[str], matched: Dict[str, List[Tuple[Any, Any, str]]], times: Dict[int, int]
+    ) -> Dict[str, Optional[List[Transfer]]]:
+        results: Dict[str, Optional[List[Transfer]]] = {h: None for h in hashes}
+        for tx_hash, found in matched.items():
+            results[tx_hash] = [
+                decode_transfer_log(
+                    lg, timestamp=times[raw_int(lg.get("blockNumber"))],
+                    decimals=token.decimals, symbol=token.symbol, direction=direction, chain=self.chain.key,
+                )
+                for lg, token, direction in found
+            ]
+        return results
+
+    def check_transaction_by_hash(self, tx_hash: str) -> Optional[Transfer]:
+        """Перший переказ на наші адреси (або з них) у транзакції; None — немає."""
+        found = self.check_transactions_by_hash([tx_hash]).get(tx_hash.strip().lower())
+        if not found:
+            return None
+        incoming = [tx for tx in found if tx.is_incoming]
+        return (incoming or found)[0]
 
-        ts = int(tx.get("timeStamp", 0))
-        time_str = "N/A"
-        if ts:
-            from datetime import datetime, timezone, timedelta
-            kyiv_tz = timezone(timedelta(hours=2))
-            time_str = datetime.fromtimestamp(ts, tz=kyiv_tz).strftime("%Y-%m-%d %H:%M:%S (Київ)")
+    # =====================================================
+    #  ФОРМАТУВАННЯ
+    # =====================================================
 
-        return {
-            "hash": tx.get("hash", ""),
-            "amount": amount,
-            "symbol": tx.get("tokenSymbol", "USDT"),
-            "from_address": tx.get("from", ""),
-            "to_address": tx.get("to", ""),
-            "timestamp": time_str,
-            "is_incoming": True,
-            "contract_address": tx.get("contractAddress", ""),
-            "block_number": tx.get("blockNumber", ""),
-        }
+    def format_transaction(self, tx: Transfer) -> Dict:
+        return tx.formatted
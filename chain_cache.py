@@ -0,0 +1,218 @@
+"""
+Персистентний кеш незмінних даних ланцюга (логи, заголовки, receipts).
+
+Ключ — sha256 від методу та канонічного JSON параметрів. Зберігаються
+лише відповіді для блоків, глибших за FINALITY_DEPTH від останньої
+відомої голови, тож закешоване значення ніколи не застаріває.
+Розмір обмежений: при перевищенні видаляються найдавніше використані
+записи. Кеш стоїть перед rate limiter — влучання не витрачає кредитів.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from chains import state_file
+from config import USE_CHAIN_CACHE, CHAIN_CACHE_FILE, CHAIN_CACHE_MAX_MB, FINALITY_DEPTH
+from transfer import DEFAULT_CHAIN, raw_int
+
+MISS = object()
+
+# Методи, відповідь яких визначається номером блоку в параметрах
+_BLOCK_PARAM = {
+    "eth_getBlockByNumber": 0,
+    "eth_getHeaderByNumber": 0,
+    "eth_call": 1,
+    "eth_getBalance": 1,
+}
+# Методи, номер блоку яких видно лише у відповіді
+_BLOCK_IN_RESULT = {"eth_getTransactionReceipt", "eth_getBlockByHash", "eth_getTransactionByHash"}
+
+
+def cache_key(method: str, params: Any) -> str:
+    raw = json.dumps([method, params], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _block_number(val: Any) -> Optional[int]:
+    """Номер блоку з параметра; None для тегів latest/pending/safe."""
+    if isinstance(val, int):
+        return val
+    if isinstance(val, str) and val.startswith("0x"):
+        return raw_int(val)
+    return None
+
+
+class ChainCache:
+    def __init__(self, path: str, max_bytes: int, finality_depth: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.finality_depth = finality_depth
+        self.head = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # WAL: бот і скрипти можуть ділити один файл кешу
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # --- фінальність ---
+
+    @property
+    def safe_head(self) -> int:
+        return self.head - self.finality_depth if self.head else -1
+
+    def observe_head(self, block_number: int):
+        if block_number > self.head:
+            self.head = block_number
+
+    def _is_final(self, block_number: Optional[int]) -> bool:
+        return block_number is not None and 0 <= block_number <= self.safe_head
+
+    def may_hit(self, method: str, params: Any) -> bool:
+        """Чи має сенс шукати запит у кеші (не рахуємо промахи для latest тощо)."""
+        if method == "eth_chainId" or method in _BLOCK_IN_RESULT:
+            return True
+        if method == "eth_getLogs":
+            flt = params[0] if params else {}
+            return "blockHash" not in flt and _block_number(flt.get("toBlock")) is not None
+        if method in _BLOCK_PARAM:
+            idx = _BLOCK_PARAM[method]
+            return len(params) > idx and _block_number(params[idx]) is not None
+        return False
+
+    def cacheable(self, method: str, params: Any, result: Any) -> bool:
+        """Чи можна назавжди зберегти цю відповідь."""
+        if result is None:
+            return False
+        if method == "eth_chainId":
+            return True
+        if method == "eth_getLogs":
+            flt = params[0] if params else {}
+            if "blockHash" in flt:
+                return False
+            return self._is_final(_block_number(flt.get("toBlock")))
+        if method in _BLOCK_PARAM:
+            idx = _BLOCK_PARAM[method]
+            return len(params) > idx and self._is_final(_block_number(params[idx]))
+        if method in _BLOCK_IN_RESULT:
+            return isinstance(result, dict) and self._is_final(
+                _block_number(result.get("blockNumber") or result.get("number"))
+            )
+        return False
+
+    # --- сховище ---
+
+    def get(self, method: str, params: Any) -> Any:
+        if not self.may_hit(method, params):
+            return MISS
+        key = cache_key(method, params)
+        with self.lock:
+            row = self.db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return MISS
+            self.hits += 1
+            self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+        return json.loads(row[0])
+
+    def put(self, method: str, params: Any, result: Any):
+        if not self.cacheable(method, params, result):
+            return
+        key = cache_key(method, params)
+        value = json.dumps(result, separators=(",", ":")).encode()
+        with self.lock:
+            old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self.total_bytes += len(value) - (old[0] if old else 0)
+            self.stores += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Видаляє найдавніше використані записи до 90% ліміту."""
+        target = int(self.max_bytes * 0.9)
+        while self.total_bytes > target:
+            rows = self.db.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_bytes <= target:
+                    break
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.evictions += 1
+
+    def lookup_batch(self, calls) -> Tuple[Dict[int, Any], list]:
+        """Для batch: ({індекс: результат з кешу}, [індекси промахів])."""
+        found: Dict[int, Any] = {}
+        missing = []
+        for i, (method, params) in enumerate(calls):
+            result = self.get(method, params)
+            if result is MISS:
+                missing.append(i)
+            else:
+                found[i] = result
+        return found, missing
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (
+            f"кеш: {self.hits} влучань / {self.misses} промахів ({rate:.0%}), "
+            f"{self.total_bytes / 1_048_576:.1f}/{self.max_bytes / 1_048_576:.0f} МБ, "
+            f"витіснено {self.evictions}"
+        )
+
+    # --- web3 ---
+
+    def middleware(self, make_request: Callable, w3: Any) -> Callable:
+        """web3 middleware: відповідь з кешу або запит далі з подальшим збереженням."""
+        def inner(method, params):
+            cached = self.get(method, params)
+            if cached is not MISS:
+                return {"jsonrpc": "2.0", "id": 0, "result": cached}
+            response = make_request(method, params)
+            result = response.get("result") if isinstance(response, dict) else None
+            if method == "eth_blockNumber" and result is not None:
+                self.observe_head(raw_int(result))
+            self.put(method, params, result)
+            return response
+        return inner
+
+
+_caches: Dict[str, ChainCache] = {}
+_cache_lock = threading.Lock()
+
+
+def shared_cache(chain_key: str = DEFAULT_CHAIN, finality_depth: int = FINALITY_DEPTH) -> Optional[ChainCache]:
+    """Один ChainCache на мережу в процесі; None, якщо кеш вимкнено в config."""
+    if not USE_CHAIN_CACHE:
+        return None
+    with _cache_lock:
+        cache = _caches.get(chain_key)
+        if cache is None:
+            path = state_file(CHAIN_CACHE_FILE, chain_key)
+            cache = _caches[chain_key] = ChainCache(path, CHAIN_CACHE_MAX_MB * 1_048_576, finality_depth)
+        return cache
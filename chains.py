@@ -0,0 +1,163 @@
+"""
+Реєстр EVM-мереж: RPC, контракти токенів, час блоку, глибина
+остаточності і блок-експлорер для кожної мережі з CHAINS.
+
+- Вбудовані: bsc, ethereum, polygon, arbitrum (USDT у кожній)
+- bsc бере RPC з QUICKNODE_BSC_NODE/GETBLOCK_BSC_NODE і токени з
+  TOKEN_CONTRACTS; іншим мережам RPC задаються в CHAIN_RPC_URLS
+- CHAINS_FILE — JSON з полями поверх вбудованих або з новими мережами
+- Стан, що залежить від мережі (кеш ланцюга, метадані токенів, спам),
+  для bsc лежить у тих самих файлах, що й раніше, для інших —
+  з ключем мережі в назві: tokens_cache.ethereum.json
+- Ключі переказів bsc не змінюються, інших мереж — з префіксом мережі
+  (transfer.DEFAULT_CHAIN), тож processed_txs спільний для всіх мереж
+
+Перевірка: python chains.py
+"""
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+from transfer import DEFAULT_CHAIN
+from config import (
+    CHAINS, CHAIN_RPC_URLS, CHAINS_FILE, QUICKNODE_BSC_NODE, GETBLOCK_BSC_NODE,
+    USE_FALLBACK_ENDPOINT, TOKEN_CONTRACTS, FINALITY_DEPTH,
+)
+
+BUILTIN_CHAINS: Dict[str, Dict[str, Any]] = {
+    "bsc": {
+        "name": "BNB Smart Chain", "chain_id": 56, "block_time": 3.0, "finality": FINALITY_DEPTH,
+        "logs_chunk": 20, "explorer": "https://bscscan.com", "native_symbol": "BNB",
+        "tokens": TOKEN_CONTRACTS,
+        "rpc_urls": [QUICKNODE_BSC_NODE] + ([GETBLOCK_BSC_NODE] if USE_FALLBACK_ENDPOINT else []),
+    },
+    "ethereum": {
+        "name": "Ethereum", "chain_id": 1, "block_time": 12.0, "finality": 64,
+        "logs_chunk": 10, "explorer": "https://etherscan.io", "native_symbol": "ETH",
+        "tokens": ["0xdAC17F958D2ee523a2206206994597C13D831ec7"],
+    },
+    "polygon": {
+        "name": "Polygon", "chain_id": 137, "block_time": 2.0, "finality": 128,
+        "logs_chunk": 20, "explorer": "https://polygonscan.com", "native_symbol": "POL",
+        "tokens": ["0xc2132D05D31c914a87C6611C10748AEb04B58e8F"],
+    },
+    "arbitrum": {
+        "name": "Arbitrum One", "chain_id": 42161, "block_time": 0.25, "finality": 240,
+        "logs_chunk": 200, "explorer": "https://arbiscan.io", "native_symbol": "ETH",
+        "tokens": ["0xFd086bC7CD5C481DCC9C85ebE478A1C0b69FCbb9"],
+    },
+}
+
+
+class Chain:
+    def __init__(
+        self,
+        key: str,
+        name: str,
+        chain_id: int,
+        rpc_urls: List[str],
+        tokens: List[str],
+        block_time: float,
+        finality: int,
+        explorer: str,
+        native_symbol: str,
+        logs_chunk: int = 20,
+        confirmations: int = 0,
+    ):
+        self.key = key
+        self.name = name
+        self.chain_id = chain_id
+        self.rpc_urls = [u.rstrip("/") for u in rpc_urls if u]
+        self.tokens = tokens
+        self.block_time = block_time
+        self.finality = finality  # блоків від голови, після яких дані незмінні (кеш ланцюга)
+        self.explorer = explorer.rstrip("/")
+        self.native_symbol = native_symbol
+        self.logs_chunk = logs_chunk
+        self.confirmations = confirmations  # сканування відстає від голови на стільки блоків
+
+    def __repr__(self) -> str:
+        return f"Chain({self.key}, id={self.chain_id})"
+
+    def tx_url(self, tx_hash: str) -> str:
+        return f"{self.explorer}/tx/{tx_hash}"
+
+    def describe(self) -> str:
+        return (
+            f"{self.name} (id {self.chain_id}): блок ~{self.block_time:g} с, остаточність {self.finality} бл, "
+            f"токенів {len(self.tokens)}, RPC {len(self.rpc_urls)}"
+        )
+
+
+def state_file(path: Optional[str], chain_key: str) -> Optional[str]:
+    """Файл стану мережі: для bsc — без змін, для інших — з ключем мережі перед розширенням."""
+    if not path or chain_key == DEFAULT_CHAIN:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{chain_key}{ext}"
+
+
+def _load_overrides() -> Dict[str, Dict[str, Any]]:
+    if not CHAINS_FILE:
+        return {}
+    with open(CHAINS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_chains(keys: Optional[List[str]] = None) -> Dict[str, Chain]:
+    """Мережі з CHAINS у порядку переліку (перша — основна)."""
+    overrides = _load_overrides()
+    chains: Dict[str, Chain] = {}
+    for key in keys if keys is not None else CHAINS:
+        fields = dict(BUILTIN_CHAINS.get(key, {}))
+        fields.update(overrides.get(key, {}))
+        if key in CHAIN_RPC_URLS:
+            urls = CHAIN_RPC_URLS[key]
+            fields["rpc_urls"] = [urls] if isinstance(urls, str) else urls
+        if not fields:
+            raise ValueError(f"Невідома мережа {key!r}: додайте її в CHAINS_FILE")
+        if not fields.get("rpc_urls") or not any(fields["rpc_urls"]):
+            raise ValueError(f"Мережа {key}: немає RPC — задайте CHAIN_RPC_URLS")
+        chains[key] = Chain(key=key, **fields)
+    return chains
+
+
+_registry: Optional[Dict[str, Chain]] = None
+
+
+def get_chain(key: Optional[str] = None) -> Chain:
+    """Мережа з реєстру (без ключа — основна, перша в CHAINS); інші підвантажуються на вимогу."""
+    global _registry
+    if _registry is None:
+        _registry = load_chains()
+    key = key or CHAINS[0]
+    if key not in _registry:
+        _registry.update(load_chains([key]))
+    return _registry[key]
+
+
+def tx_url(chain_key: str, tx_hash: str) -> str:
+    try:
+        return get_chain(chain_key or DEFAULT_CHAIN).tx_url(tx_hash)
+    except ValueError:
+        builtin = BUILTIN_CHAINS.get(chain_key) or BUILTIN_CHAINS[DEFAULT_CHAIN]
+        return f"{builtin['explorer']}/tx/{tx_hash}"
+
+
+MULTI_CHAIN = len(CHAINS) > 1
+
+
+def main():
+    try:
+        chains = load_chains()
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for chain in chains.values():
+        print(f"⛓ {chain.key}: {chain.describe()}")
+        for url in chain.rpc_urls:
+            print(f"   🔌 {url[:50]}...")
+
+
+if __name__ == "__main__":
+    main()
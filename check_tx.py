@@ -1,51 +1,66 @@
 """
-Швидка перевірка конкретної транзакції та надсилання в Telegram
+Швидка перевірка конкретної транзакції та надсилання в Telegram.
+Для кількох хешів (або файлу з хешами, по одному в рядку) — пакетна
+перевірка без надсилання.
+
+Запуск:
+    python check_tx.py [хеш]
+    python check_tx.py <хеш> <хеш> ...
+    python check_tx.py @hashes.txt
 """
+import sys
+import time
 from bscscan_client import BSCscanClient
 from telegram_bot import TelegramBot
-from config import WALLET_ADDRESS, MIN_AMOUNT_USDT
+from config import WALLET_ADDRESS
 
 # Хеш транзакції для перевірки
 TX_HASH = "0xc76a2b45c012aadc0fb56bb4f64621e9818598296548b5a9a1b0034e14133eae"
 
-def check_and_send():
+
+def check_and_send(tx_hash: str = TX_HASH):
     """Перевірка транзакції та надсилання в Telegram"""
     print("=" * 60)
     print("ПЕРЕВІРКА ТРАНЗАКЦІЇ ТА НАДСИЛАННЯ В TELEGRAM")
     print("=" * 60)
-    print(f"Хеш: {TX_HASH}")
+    print(f"Хеш: {tx_hash}")
     print(f"Адреса: {WALLET_ADDRESS}")
     print("=" * 60)
-    
+
     # Створюємо клієнт
     client = BSCscanClient()
     telegram = TelegramBot()
-    
+
     # Перевіряємо транзакцію
     print("\n🔍 Перевірка транзакції...")
-    tx = client.check_transaction_by_hash(TX_HASH)
-    
+    tx = client.check_transaction_by_hash(tx_hash)
+
     if not tx:
-        print("❌ Транзакція не знайдена або не містить USDT Transfer на вашу адресу")
+        print("❌ Транзакція не знайдена або не містить Transfer токена на ваші адреси")
         return
-    
+
     print(f"✅ Транзакція знайдена!")
-    print(f"   Блок: {tx['blockNumber']}")
-    print(f"   Від: {tx['from']}")
-    print(f"   До: {tx['to']}")
-    
+    print(f"   Блок: {tx.block_number}")
+    print(f"   Від: {tx.from_address}")
+    print(f"   До: {tx.to_address}")
+
     # Форматуємо транзакцію
     formatted_tx = client.format_transaction(tx)
-    
+
     print(f"\n💰 Деталі:")
     print(f"   Сума: {formatted_tx['amount']:.2f} {formatted_tx['symbol']}")
     print(f"   Час: {formatted_tx['timestamp']}")
-    
+
+    if not tx.is_incoming:
+        print("ℹ️ Це вихідний переказ — повідомлення не надсилається")
+        return
+
     # Перевіряємо мінімальну суму
-    if formatted_tx['amount'] < MIN_AMOUNT_USDT:
-        print(f"⚠️ Сума {formatted_tx['amount']:.2f} USDT менша за мінімум {MIN_AMOUNT_USDT} USDT")
+    min_amount = client.tokens.get(tx.contract).min_amount
+    if formatted_tx['amount'] < min_amount:
+        print(f"⚠️ Сума {formatted_tx['amount']:.2f} {tx.symbol} менша за мінімум {min_amount} {tx.symbol}")
         return
-    
+
     # Надсилаємо в Telegram
     print(f"\n📱 Надсилання повідомлення в Telegram...")
     if telegram.send_payment_notification(formatted_tx):
@@ -53,5 +68,47 @@ def check_and_send():
     else:
         print(f"❌ Помилка надсилання повідомлення")
 
+
+def check_many(tx_hashes):
+    """Пакетна перевірка: по рядку на хеш, без Telegram."""
+    client = BSCscanClient()
+    t0 = time.perf_counter()
+    results = client.check_transactions_by_hash(tx_hashes)
+    elapsed = time.perf_counter() - t0
+
+    found = 0
+    for tx_hash, transfers in results.items():
+        if transfers is None:
+            print(f"❌ {tx_hash}  не знайдено")
+        elif not transfers:
+            print(f"➖ {tx_hash}  немає переказів на ваші адреси")
+        else:
+            found += 1
+            for tx in transfers:
+                mark = "💰" if tx.is_incoming else "📤"
+                print(
+                    f"{mark} {tx_hash}  {tx.amount:.2f} {tx.symbol}  {tx.from_address} → {tx.to_address}  "
+                    f"блок {tx.block_number}, {tx.time_str}"
+                )
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print(f"\nПеревірено {len(results)} хешів за {elapsed:.2f} с ({rate:.0f} хешів/с), з переказами: {found}")
+    print(f"💳 {client.limiter.summary()}")
+
+
+def main():
+    args = sys.argv[1:]
+    hashes = []
+    for arg in args:
+        if arg.startswith("@"):
+            with open(arg[1:], "r", encoding="utf-8") as f:
+                hashes.extend(line.strip() for line in f if line.strip())
+        else:
+            hashes.append(arg)
+    if len(hashes) > 1:
+        check_many(hashes)
+    else:
+        check_and_send(hashes[0] if hashes else TX_HASH)
+
+
 if __name__ == "__main__":
-    check_and_send()
+    main()
@@ -25,3 +25,10 @@ TELEGRAM_CHANNEL_ID = "@YOUR_CHANNEL_USERNAME"  # Або ID каналу (нап
 CHECK_INTERVAL = 30  # Інтервал перевірки нових транзакцій (секунди)
 MIN_CONFIRMATIONS = 1  # Мінімальна кількість підтверджень
 
+# Опційні можливості (у config.py за замовчуванням вимкнені, тут — увімкнені)
+FAST_START = True  # Імпорт web3 у фоні, повтори підключення замість фіксованої паузи
+RECONCILE_INTERVAL_SEC = 3600  # Звірка балансів через Multicall3 раз на годину
+TRANSFER_STORE_DB = "transfers.sqlite"  # Локальне сховище знайдених переказів (transfer_store.py)
+AGGREGATES_DB = "aggregates.sqlite"  # Погодинні й добові суми вхідних платежів (aggregates.py)
+DAILY_DIGEST = True  # Підсумок за минулу добу о 09:00 (потрібен AGGREGATES_DB)
+
@@ -1,4 +1,5 @@
 # Конфігураційний файл для бота моніторингу USDT платежів (BSC)
+import json
 import os
 
 
@@ -26,14 +27,174 @@ WALLET_ADDRESS = os.getenv("WALLET_ADDRESS", "0xCEB8658255151827b3fc99d257471120
 # Telegram налаштування
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "8456055614:AAFeuIrPgQKDdfl_e9ULHi1oAJimxkaeLWM")
 TELEGRAM_CHANNEL_ID = os.getenv("TELEGRAM_CHANNEL_ID", "@payment_trc20_001")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")  # Або локальний Bot API сервер
 
 # Налаштування моніторингу
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "180"))  # Інтервал перевірки (секунди) — 3 хвилини
-MIN_AMOUNT_USDT = float(os.getenv("MIN_AMOUNT_USDT", "1.0"))  # Мінімальна сума транзакції в USDT
-TOKEN_SYMBOL = os.getenv("TOKEN_SYMBOL", "USDT")  # Токен для моніторингу
+MIN_AMOUNT_USDT = float(os.getenv("MIN_AMOUNT_USDT", "1.0"))  # Мінімальна сума за замовчуванням (для токенів без MIN_AMOUNTS)
 
 # Налаштування підключення
 INITIAL_CONNECTION_DELAY = float(
     os.getenv("INITIAL_CONNECTION_DELAY", "5.0")
 )  # Затримка перед першим підключенням (секунди)
 USE_FALLBACK_ENDPOINT = _env_bool("USE_FALLBACK_ENDPOINT", True)  # Використовувати GetBlock якщо QuickNode недоступний
+FAST_START = _env_bool("FAST_START", False)  # Без фіксованої затримки: імпорт web3 у фоні, старт паралельно
+CONNECT_RETRIES = int(os.getenv("CONNECT_RETRIES", "3"))  # Спроб підключення (пауза 1, 2, 4... с) перед GetBlock
+
+# Bloom-префільтр: get_logs лише для блоків, logsBloom яких може містити наш платіж
+USE_BLOOM_PRESCREEN = _env_bool("USE_BLOOM_PRESCREEN", True)
+HEADER_BATCH_SIZE = int(os.getenv("HEADER_BATCH_SIZE", "50"))  # Заголовків в одному batch-запиті
+
+# Режим log-фільтра: eth_newFilter один раз, далі лише eth_getFilterChanges.
+# Фільтр на вузлі живе ~5 хв без опитування; після тихих годин він
+# перевстановлюється, а пропуск добирається range-сканом.
+USE_LOG_FILTER = _env_bool("USE_LOG_FILTER", False)
+
+# Ліміти RPC-провайдерів: запити/сек, добова квота кредитів (0 — без обліку)
+# і вартість методів у кредитах. Значення орієнтовні — звірте з вашим тарифом.
+# Перевизначення: RPC_PROVIDER_LIMITS='{"quicknode": {"rps": 25, ...}}'
+RPC_PROVIDER_LIMITS = {
+    "quicknode": {
+        "rps": 15,
+        "daily_credits": 0,
+        "credits": {"default": 20, "eth_getLogs": 20},
+    },
+    "getblock": {
+        "rps": 20,
+        "daily_credits": 0,
+        "credits": {"default": 1, "eth_getLogs": 1},
+    },
+    "default": {
+        "rps": 10,
+        "daily_credits": 0,
+        "credits": {"default": 1},
+    },
+}
+RPC_PROVIDER_LIMITS.update(json.loads(os.getenv("RPC_PROVIDER_LIMITS", "{}")))
+RPC_THROTTLE_AT = float(os.getenv("RPC_THROTTLE_AT", "0.7"))  # Частка квоти, після якої витрата розтягується до кінця доби
+RPC_DEGRADE_AT = float(os.getenv("RPC_DEGRADE_AT", "0.85"))  # Частка квоти, після якої бот опитує рідше
+DEGRADED_INTERVAL_FACTOR = int(os.getenv("DEGRADED_INTERVAL_FACTOR", "3"))  # У скільки разів збільшити інтервал
+RPC_BUDGET_FILE = os.getenv("RPC_BUDGET_FILE", "rpc_budget.json")  # Добова витрата кредитів між перезапусками
+
+# Кеш незмінних даних ланцюга (логи, заголовки, receipts старші за FINALITY_DEPTH)
+USE_CHAIN_CACHE = _env_bool("USE_CHAIN_CACHE", True)
+CHAIN_CACHE_FILE = os.getenv("CHAIN_CACHE_FILE", "chain_cache.sqlite")
+CHAIN_CACHE_MAX_MB = int(os.getenv("CHAIN_CACHE_MAX_MB", "512"))  # Ліміт розміру кешу
+FINALITY_DEPTH = int(os.getenv("FINALITY_DEPTH", "15"))  # Блоків від голови, після яких дані вважаються остаточними
+
+# Список адрес для моніторингу (крім WALLET_ADDRESS): файл з адресою на рядок
+# або SQLite з таблицею watch_addresses(address). Порожньо — лише WALLET_ADDRESS.
+WATCHLIST_FILE = os.getenv("WATCHLIST_FILE", "")
+WATCHLIST_DB = os.getenv("WATCHLIST_DB", "")
+WATCHLIST_RELOAD_SEC = float(os.getenv("WATCHLIST_RELOAD_SEC", "60"))  # Як часто перечитувати БД
+# До скількох адрес фільтрувати на вузлі через OR-список у topics[2].
+# 0 — завжди всі логи + фільтрація в Python (не всі провайдери коректно фільтрують topics[2]).
+WATCH_SERVER_FILTER_MAX = int(os.getenv("WATCH_SERVER_FILTER_MAX", "0"))
+# Вихідні перекази з наших адрес (повернення, виведення) з тих самих логів.
+# Потребує фільтрації в Python: OR-список у topics[2] вихідні не поверне.
+TRACK_OUTGOING = _env_bool("TRACK_OUTGOING", False)
+BLOOM_MAX_ADDRESSES = int(os.getenv("BLOOM_MAX_ADDRESSES", "32"))  # Більше адрес — bloom-префільтр вимикається
+
+# Токени для моніторингу (BEP-20 контракти через кому) — всі в одному get_logs.
+# USDC: 0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d, BUSD: 0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56,
+# FDUSD: 0xc5f0f7b66764F6ec8C8Dff7BA683102295E16409
+TOKEN_CONTRACTS = [
+    c.strip() for c in os.getenv(
+        "TOKEN_CONTRACTS", "0x55d398326f99059fF775485246999027B3197955"
+    ).split(",") if c.strip()
+]
+# Мінімальна сума для кожного токена: "USDT=1,USDC=1,FDUSD=5" (символ або адреса контракту)
+MIN_AMOUNTS = {
+    k.strip().upper() if not k.strip().startswith("0x") else k.strip().lower(): float(v)
+    for k, v in (
+        item.split("=", 1) for item in os.getenv("MIN_AMOUNTS", "").split(",") if "=" in item
+    )
+}
+TOKENS_CACHE_FILE = os.getenv("TOKENS_CACHE_FILE", "tokens_cache.json")  # decimals/symbol контрактів
+
+# Звірка балансів (reconcile.py): balanceOf через Multicall3 на остаточному блоці
+RECONCILE_INTERVAL_SEC = int(os.getenv("RECONCILE_INTERVAL_SEC", "0"))  # 0 — вимкнено; напр. 3600 — щогодини
+RECONCILE_BATCH = int(os.getenv("RECONCILE_BATCH", "500"))  # balanceOf на один eth_call
+RECONCILE_SCAN_CHUNK = int(os.getenv("RECONCILE_SCAN_CHUNK", "2000"))  # блоків на get_logs при re-scan
+RECONCILE_STATE_FILE = os.getenv("RECONCILE_STATE_FILE", "reconcile_state.json")
+
+# Вхідні перекази BNB (нативна монета): повні блоки, дорожче за get_logs
+TRACK_NATIVE = _env_bool("TRACK_NATIVE", False)
+NATIVE_BLOCK_BATCH = int(os.getenv("NATIVE_BLOCK_BATCH", "10"))  # повних блоків в одному batch
+NATIVE_CONCURRENCY = int(os.getenv("NATIVE_CONCURRENCY", "4"))  # паралельних batch-запитів
+
+# Рахунки магазину (invoices.py): платіж зіставляється з рахунком за адресою і сумою
+INVOICES_DB = os.getenv("INVOICES_DB", "")  # SQLite з рахунками; порожньо — вимкнено
+INVOICE_TTL_SEC = int(os.getenv("INVOICE_TTL_SEC", "3600"))  # Термін дії рахунку за замовчуванням
+
+# Фільтр спаму (address poisoning) до декодування логу
+USE_SPAM_FILTER = _env_bool("USE_SPAM_FILTER", True)
+SPAM_DUST_AMOUNT = float(os.getenv("SPAM_DUST_AMOUNT", "0.01"))  # Менші суми (у токенах) — пил
+SPAM_SENDER_MAX = int(os.getenv("SPAM_SENDER_MAX", "20"))  # Переказів від невідомого відправника...
+SPAM_SENDER_WINDOW_BLOCKS = int(os.getenv("SPAM_SENDER_WINDOW_BLOCKS", "1200"))  # ...за стільки блоків
+SPAM_STATE_FILE = os.getenv("SPAM_STATE_FILE", "spam_state.json")  # Відомі контрагенти
+
+# Локальне сховище знайдених переказів (transfer_store.py); порожньо — вимкнено
+TRANSFER_STORE_DB = os.getenv("TRANSFER_STORE_DB", "")  # Напр. transfers.sqlite
+
+# Історичний backfill (backfill.py) у сховище переказів
+BACKFILL_SHARD_BLOCKS = int(os.getenv("BACKFILL_SHARD_BLOCKS", "10000"))  # блоків в одному шарді
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))  # паралельних шардів
+BACKFILL_LOG_CHUNK = int(os.getenv("BACKFILL_LOG_CHUNK", "2000"))  # блоків на get_logs з фільтром адрес
+BACKFILL_STATE_FILE = os.getenv("BACKFILL_STATE_FILE", "backfill_state.json")  # завершені шарди
+RESCAN_QUEUE_FILE = os.getenv("RESCAN_QUEUE_FILE", "rescan_queue.json")  # діапазони з csv_import.py для backfill.py --queue
+BACKFILL_PROCESSES = int(os.getenv("BACKFILL_PROCESSES", "0"))  # >0 — сирі сторінки get_logs, розбір у процесах
+PIPELINE_PAGE_BLOCKS = int(os.getenv("PIPELINE_PAGE_BLOCKS", "20"))  # блоків на сторінку get_logs без фільтра адрес
+
+# Перевірка переказів за хешем транзакції (check_tx.py)
+RECEIPT_BATCH_SIZE = int(os.getenv("RECEIPT_BATCH_SIZE", "50"))  # receipts в одному batch-запиті
+HASH_CHECK_CONCURRENCY = int(os.getenv("HASH_CHECK_CONCURRENCY", "4"))  # паралельних batch-запитів
+BLOCK_TIME_CACHE_SIZE = int(os.getenv("BLOCK_TIME_CACHE_SIZE", "100000"))  # блоків у кеші часу в пам'яті
+
+# Профіль можливостей RPC-ендпоінта (profiler.py): чанки, batch, паралельність, rps.
+# Клієнт читає його на старті; порожньо — лише значення з цього файлу.
+ENDPOINT_PROFILE_FILE = os.getenv("ENDPOINT_PROFILE_FILE", "endpoint_profile.json")
+PROFILE_MAX_RPS = int(os.getenv("PROFILE_MAX_RPS", "80"))  # Верхня сходинка тесту частоти запитів
+
+# asyncio-режим (async_bot.py): сканування, доставка, звірка і статуси — задачі одного циклу подій
+ASYNC_RUNTIME = _env_bool("ASYNC_RUNTIME", False)  # bot.py запускає asyncio-монітор замість циклу з time.sleep
+LOGS_CONCURRENCY = int(os.getenv("LOGS_CONCURRENCY", "4"))  # Паралельних get_logs чанків в asyncio-клієнті
+
+# Канали сповіщень (sinks.py) через кому: telegram, webhook, file — розсилка паралельна
+NOTIFY_SINKS = [s.strip().lower() for s in os.getenv("NOTIFY_SINKS", "telegram").split(",") if s.strip()]
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # POST JSON кожної події
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # HMAC-SHA256 тіла в заголовку X-Signature; порожньо — без підпису
+NOTIFY_FILE = os.getenv("NOTIFY_FILE", "notifications.jsonl")  # append-only журнал подій
+SINK_STATE_FILE = os.getenv("SINK_STATE_FILE", "sink_state.json")  # непідтверджені події; порожньо — лише в пам'яті
+SINK_RETRIES = int(os.getenv("SINK_RETRIES", "3"))  # Спроб одного каналу за розсилку (пауза 1, 2, 4… с)
+SINK_MAX_ATTEMPTS = int(os.getenv("SINK_MAX_ATTEMPTS", "20"))  # Розсилок, після яких канал для події відмовлено
+SINK_BACKOFF_SEC = float(os.getenv("SINK_BACKOFF_SEC", "30"))  # Пауза каналу після невдалої розсилки, далі подвоюється
+SINK_BACKOFF_MAX_SEC = float(os.getenv("SINK_BACKOFF_MAX_SEC", "1800"))  # Стеля паузи (20 розсилок ≈ 7 год)
+
+# Маршрутизація сповіщень Telegram (routing.py): JSON-список маршрутів
+# [{"wallet": "0x…", "token": "USDT", "min": "0", "max": "1000", "chats": ["@store_a"]}, ...]
+# Поля wallet/token/min/max необов'язкові; "default" у chats — TELEGRAM_CHANNEL_ID.
+ROUTES_FILE = os.getenv("ROUTES_FILE", "")  # Порожньо — все в TELEGRAM_CHANNEL_ID
+TELEGRAM_CHAT_RPS = float(os.getenv("TELEGRAM_CHAT_RPS", "1"))  # Повідомлень/сек в один чат (ліміт Telegram ~1/с)
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))  # Короткий сплеск в один чат без паузи
+TELEGRAM_GLOBAL_RPS = float(os.getenv("TELEGRAM_GLOBAL_RPS", "25"))  # Усього по боту (ліміт Telegram 30/с)
+TELEGRAM_SEND_THREADS = int(os.getenv("TELEGRAM_SEND_THREADS", "8"))  # Чатів, у які надсилається паралельно
+
+# Логування (logging_setup.py): гарячі цикли пишуть через чергу, не блокуючись на stdout
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG — кожен знайдений лог і чанк; WARNING — лише збої
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text або json (об'єкт на рядок для збирачів логів)
+LOG_SAMPLE_SEC = float(os.getenv("LOG_SAMPLE_SEC", "5"))  # Повторювані повідомлення чанків — раз на N сек на тип; 0 — усі
+
+# Кілька EVM-мереж в одному процесі (chains.py): ключі реєстру через кому.
+# Перша — основна: діагностика, звірка балансів і сховище переказів працюють лише для неї.
+# bsc бере RPC з QUICKNODE_BSC_NODE/GETBLOCK_BSC_NODE і токени з TOKEN_CONTRACTS.
+CHAINS = [c.strip().lower() for c in os.getenv("CHAINS", "bsc").split(",") if c.strip()] or ["bsc"]
+CHAIN_RPC_URLS = json.loads(os.getenv("CHAIN_RPC_URLS", "{}"))  # {"ethereum": ["https://основний", "https://резервний"], ...}
+CHAINS_FILE = os.getenv("CHAINS_FILE", "")  # JSON поверх вбудованого реєстру: {"polygon": {"tokens": [...], "finality": 64}, ...}
+
+# Агрегати платежів (aggregates.py): суми й кількість вхідних по годинах і днях (Київ)
+# у розрізі токена, відправника і гаманця; оновлюються при кожному новому переказі.
+AGGREGATES_DB = os.getenv("AGGREGATES_DB", "")  # Порожньо — вимкнено; напр. aggregates.sqlite
+AGG_HOURLY_DAYS = int(os.getenv("AGG_HOURLY_DAYS", "14"))  # Скільки днів зберігати погодинні кошики (денні — завжди)
+DAILY_DIGEST = _env_bool("DAILY_DIGEST", False)  # Підсумок за минулу добу о 09:00 (кінець тихого періоду)
+DIGEST_TOP = int(os.getenv("DIGEST_TOP", "5"))  # Відправників і гаманців у підсумку
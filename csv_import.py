@@ -0,0 +1,333 @@
+"""
+Імпорт CSV-експорту BscScan (token transfers) і звірка з локальним
+сховищем TRANSFER_STORE_DB.
+
+- Файл читається потоково (csv.reader), пакетами по CSV_BATCH рядків:
+  пам'ять не залежить від розміру експорту
+- Кожен пакет шукається в сховищі одним запитом tx_hash IN (...) по
+  первинному ключу (tx_hash, log_index); зіставлені рядки записуються
+  в тимчасову таблицю csv_seen того ж з'єднання
+- Якщо в експорті є LogIndex — зіставлення точне за (hash, log index);
+  без нього (стандартний експорт BscScan) — за hash + від/кому + токен
+- missing — є в CSV, немає в сховищі; mismatch — блок, адреси, токен або
+  сума відрізняються; extra — є в сховищі в діапазоні блоків експорту для
+  адреси експорту, але немає в CSV (anti-join з csv_seen)
+- Звіт — <експорт>.report.csv; блоки пропущених переказів зливаються в
+  діапазони і додаються в RESCAN_QUEUE_FILE для python backfill.py --queue
+- Лише токени з TOKEN_CONTRACTS (за контрактом або символом) і рядки,
+  де отримувач (з TRACK_OUTGOING — і відправник) є у списку моніторингу
+
+Запуск:
+    python csv_import.py <export.csv> [адреса ...]
+Адреси — додатково до списку моніторингу (наприклад, адреса експорту).
+"""
+import csv
+import sqlite3
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+from backfill import RescanQueue
+from tokens import TokenRegistry
+from transfer import DEFAULT_CHAIN, Transfer
+from transfer_store import TransferStore, _COLUMNS, _row_to_transfer
+from watchlist import WatchList, parse_address
+from config import TOKEN_CONTRACTS, TRACK_OUTGOING, TRANSFER_STORE_DB
+
+CSV_BATCH = 500  # рядків CSV на один запит до сховища
+EXAMPLES = 5  # прикладів кожного виду розбіжностей у виводі
+
+# Назви колонок у різних версіях експорту BscScan -> поле
+_HEADERS = {
+    "transactionhash": "hash", "txhash": "hash",
+    "blockno": "block", "blocknumber": "block",
+    "unixtimestamp": "timestamp",
+    "from": "from", "to": "to",
+    "tokenvalue": "value", "value": "value", "quantity": "value",
+    "contractaddress": "contract",
+    "tokensymbol": "symbol", "token": "symbol",
+    "logindex": "log_index",
+}
+
+REPORT_COLUMNS = (
+    "status", "hash", "log_index", "block", "from", "to", "symbol", "csv_amount", "store_amount", "fields",
+)
+
+
+class CsvRow:
+    """Один переказ з експорту."""
+
+    __slots__ = ("tx_hash", "log_index", "block_number", "from_addr", "to_addr", "amount", "contract", "symbol")
+
+    def __init__(self, tx_hash: bytes, log_index: Optional[int], block_number: int, from_addr: bytes,
+                 to_addr: bytes, amount: Decimal, contract: bytes, symbol: str):
+        self.tx_hash = tx_hash
+        self.log_index = log_index
+        self.block_number = block_number
+        self.from_addr = from_addr
+        self.to_addr = to_addr
+        self.amount = amount
+        self.contract = contract
+        self.symbol = symbol
+
+    @property
+    def hash(self) -> str:
+        return "0x" + self.tx_hash.hex()
+
+
+def _symbol(text: str) -> str:
+    """'Tether USD (USDT)' -> 'USDT'."""
+    text = text.strip()
+    if text.endswith(")") and "(" in text:
+        text = text[text.rindex("(") + 1:-1]
+    return text.upper()
+
+
+def _amount(text: str) -> Decimal:
+    return Decimal(text.replace(",", "").replace('"', "").strip())
+
+
+def read_rows(path: str) -> Iterator[CsvRow]:
+    """Рядки експорту по одному; некоректні пропускаються з попередженням."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = [_HEADERS.get(h.replace(" ", "").replace("_", "").lower()) for h in header]
+        missing = {"hash", "block", "from", "to", "value"} - set(fields)
+        if missing:
+            raise ValueError(f"У {path} немає колонок: {', '.join(sorted(missing))}")
+        for line_no, values in enumerate(reader, start=2):
+            row = {f: v for f, v in zip(fields, values) if f}
+            try:
+                log_index = row.get("log_index", "").strip()
+                contract = row.get("contract", "").strip()
+                yield CsvRow(
+                    tx_hash=bytes.fromhex(row["hash"].strip().lower().removeprefix("0x")),
+                    log_index=int(log_index) if log_index else None,
+                    block_number=int(row["block"]),
+                    from_addr=parse_address(row["from"]),
+                    to_addr=parse_address(row["to"]),
+                    amount=_amount(row["value"]),
+                    contract=parse_address(contract) if contract else b"",
+                    symbol=_symbol(row.get("symbol", "")),
+                )
+            except (KeyError, ValueError, InvalidOperation) as e:
+                print(f"⚠️ Рядок {line_no} пропущено: {e}", flush=True)
+
+
+class CsvReconciler:
+    def __init__(self, store: TransferStore, extra_addresses: Sequence[bytes] = ()):
+        self.store = store
+        self.watch = WatchList()
+        self.extra = set(extra_addresses)
+        self.contracts = {bytes.fromhex(c.lower()[2:]) for c in TOKEN_CONTRACTS}
+        # символи: з кешу метаданих токенів і зі сховища (індекс transfers_symbol)
+        cache = TokenRegistry()._load_cache()
+        self.symbols = {
+            meta["symbol"].upper() for contract, meta in cache.items()
+            if bytes.fromhex(contract.lower()[2:]) in self.contracts and meta.get("symbol")
+        }
+        self.symbols.update(
+            s.upper() for (s,) in store.db.execute("SELECT DISTINCT symbol FROM transfers WHERE chain = ?", (DEFAULT_CHAIN,))
+        )
+        store.db.execute("CREATE TEMP TABLE IF NOT EXISTS csv_seen (tx_hash BLOB, log_index INTEGER,"
+                         " PRIMARY KEY (tx_hash, log_index)) WITHOUT ROWID")
+        store.db.execute("DELETE FROM csv_seen")
+        self.counts = {"rows": 0, "skipped": 0, "ok": 0, "missing": 0, "mismatch": 0, "extra": 0}
+        self.examples: Dict[str, List[str]] = {"missing": [], "mismatch": [], "extra": []}
+        self.min_block: Optional[int] = None
+        self.max_block: Optional[int] = None
+        self.seen_symbols: Set[str] = set()
+        self.seen_contracts: Set[bytes] = set()
+        self.export_addresses: Optional[Set[bytes]] = None  # спільні для всіх рядків {from, to}
+        self.queue = RescanQueue()
+
+    def _ours(self, row: CsvRow) -> Optional[bytes]:
+        """Адреса моніторингу, якої стосується рядок, або None."""
+        if row.to_addr in self.watch or row.to_addr in self.extra:
+            return row.to_addr
+        if TRACK_OUTGOING and (row.from_addr in self.watch or row.from_addr in self.extra):
+            return row.from_addr
+        return None
+
+    def _tracked(self, row: CsvRow) -> bool:
+        if row.contract:
+            return row.contract in self.contracts
+        return row.symbol in self.symbols
+
+    @staticmethod
+    def _same_token(row: CsvRow, tx: Transfer) -> bool:
+        if row.contract:
+            return row.contract == tx.contract
+        return row.symbol == tx.symbol.upper()
+
+    @staticmethod
+    def _diff(row: CsvRow, tx: Transfer) -> List[str]:
+        fields = []
+        if row.block_number != tx.block_number:
+            fields.append("block")
+        if row.from_addr != tx.from_addr:
+            fields.append("from")
+        if row.to_addr != tx.to_addr:
+            fields.append("to")
+        if not CsvReconciler._same_token(row, tx):
+            fields.append("token")
+        # в експорті сума може бути округлена: порівняння з точністю до останнього знака CSV
+        unit = Decimal(1).scaleb(min(row.amount.as_tuple().exponent, 0))
+        if abs(tx.amount - row.amount) >= unit:
+            fields.append("amount")
+        return fields
+
+    def _candidates(self, batch: List[CsvRow]) -> Dict[bytes, List[Transfer]]:
+        hashes = list({row.tx_hash for row in batch})
+        sql = (
+            f"SELECT {_COLUMNS} FROM transfers t WHERE tx_hash IN ({','.join('?' * len(hashes))})"
+            " AND NOT EXISTS (SELECT 1 FROM csv_seen s WHERE s.tx_hash = t.tx_hash AND s.log_index = t.log_index)"
+        )
+        found: Dict[bytes, List[Transfer]] = {}
+        for r in self.store.db.execute(sql, hashes):
+            tx = _row_to_transfer(r)
+            found.setdefault(tx.tx_hash, []).append(tx)
+        return found
+
+    def _match(self, row: CsvRow, candidates: List[Transfer]) -> Optional[Transfer]:
+        if row.log_index is not None:
+            return next((tx for tx in candidates if tx.log_index == row.log_index), None)
+        same = [
+            tx for tx in candidates
+            if tx.from_addr == row.from_addr and tx.to_addr == row.to_addr and self._same_token(row, tx)
+        ]
+        # кілька однакових переказів в одній транзакції — першим той, що збігається за сумою
+        same.sort(key=lambda tx: "amount" in self._diff(row, tx))
+        return same[0] if same else None
+
+    def _report(self, status: str, row: Optional[CsvRow], tx: Optional[Transfer], fields: Sequence[str] = ()):
+        self.counts[status] += 1
+        src = row or tx
+        record = (
+            status, src.hash,
+            row.log_index if row and row.log_index is not None else (tx.log_index if tx else ""),
+            src.block_number,
+            "0x" + src.from_addr.hex(), "0x" + src.to_addr.hex(),
+            row.symbol if row else tx.symbol,
+            row.amount if row else "", tx.amount if tx else "", ";".join(fields),
+        )
+        self.writer.writerow(record)
+        if len(self.examples[status]) < EXAMPLES:
+            detail = f" ({', '.join(fields)})" if fields else ""
+            self.examples[status].append(f"{record[1]} блок {record[3]} {record[6]}{detail}")
+
+    def _process(self, batch: List[CsvRow]):
+        found = self._candidates(batch)
+        seen = []
+        for row in batch:
+            tx = self._match(row, found.get(row.tx_hash, []))
+            if tx is None:
+                self._report("missing", row, None)
+                self.queue.add(row.block_number, row.block_number, ["0x" + self._ours(row).hex()])
+                continue
+            found[row.tx_hash].remove(tx)
+            seen.append((tx.tx_hash, tx.log_index))
+            fields = self._diff(row, tx)
+            if fields:
+                self._report("mismatch", row, tx, fields)
+            else:
+                self.counts["ok"] += 1
+        with self.store.db:
+            self.store.db.executemany("INSERT OR IGNORE INTO csv_seen VALUES (?, ?)", seen)
+
+    def _extras(self):
+        """Перекази сховища в діапазоні експорту для адрес експорту, яких немає в CSV."""
+        addresses = (self.export_addresses or set()) | self.extra
+        if self.min_block is None:
+            return
+        if not addresses:
+            print("⚠️ Адресу експорту не визначено — extra не перевіряються (передайте її аргументом)")
+            return
+        addr_in = ",".join("?" * len(addresses))
+        contract_in = ",".join("?" * len(self.seen_contracts))
+        sym_in = ",".join("?" * len(self.seen_symbols))
+        sql = (
+            f"SELECT {_COLUMNS} FROM transfers t WHERE chain = ? AND block_number BETWEEN ? AND ?"
+            f" AND (to_addr IN ({addr_in}) OR from_addr IN ({addr_in}))"
+            f" AND (contract IN ({contract_in}) OR UPPER(symbol) IN ({sym_in}))"
+            " AND NOT EXISTS (SELECT 1 FROM csv_seen s WHERE s.tx_hash = t.tx_hash AND s.log_index = t.log_index)"
+            " ORDER BY block_number, log_index"
+        )
+        params = (
+            DEFAULT_CHAIN, self.min_block, self.max_block, *addresses, *addresses, *self.seen_contracts, *self.seen_symbols,
+        )
+        for r in self.store.db.execute(sql, params):
+            self._report("extra", None, _row_to_transfer(r))
+
+    def run(self, path: str, report_path: str) -> Dict[str, int]:
+        with open(report_path, "w", encoding="utf-8", newline="") as out:
+            self.writer = csv.writer(out)
+            self.writer.writerow(REPORT_COLUMNS)
+            batch: List[CsvRow] = []
+            for row in read_rows(path):
+                self.counts["rows"] += 1
+                pair = {row.from_addr, row.to_addr}
+                self.export_addresses = pair if self.export_addresses is None else self.export_addresses & pair
+                if not self._tracked(row) or self._ours(row) is None:
+                    self.counts["skipped"] += 1
+                    continue
+                if row.contract:
+                    self.seen_contracts.add(row.contract)
+                else:
+                    self.seen_symbols.add(row.symbol)
+                if self.min_block is None or row.block_number < self.min_block:
+                    self.min_block = row.block_number
+                if self.max_block is None or row.block_number > self.max_block:
+                    self.max_block = row.block_number
+                batch.append(row)
+                if len(batch) >= CSV_BATCH:
+                    self._process(batch)
+                    batch = []
+            if batch:
+                self._process(batch)
+            self._extras()
+        self.queue.save()
+        return self.counts
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    if not TRANSFER_STORE_DB:
+        print("❌ Не задано TRANSFER_STORE_DB")
+        return
+    path = sys.argv[1]
+    try:
+        addresses = [parse_address(a) for a in sys.argv[2:]]
+    except ValueError as e:
+        print(f"❌ {e}\n{__doc__}")
+        return
+    report_path = path.rsplit(".", 1)[0] + ".report.csv"
+    reconciler = CsvReconciler(TransferStore(), addresses)
+    t0 = time.perf_counter()
+    try:
+        counts = reconciler.run(path, report_path)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(
+        f"📄 Рядків: {counts['rows']}, поза токенами/адресами: {counts['skipped']}, "
+        f"збігається: {counts['ok']} ({time.perf_counter() - t0:.1f} с)"
+    )
+    if reconciler.min_block is not None:
+        print(f"📦 Блоки: {reconciler.min_block} - {reconciler.max_block}")
+    for status, title in (("missing", "❗ Немає в сховищі"), ("mismatch", "⚠️ Розбіжності"), ("extra", "➕ Немає в CSV")):
+        print(f"{title}: {counts[status]}")
+        for line in reconciler.examples[status]:
+            print(f"   {line}")
+    print(f"📝 Звіт: {report_path}")
+    if counts["missing"]:
+        print(f"🔁 У черзі повторного скану: {len(reconciler.queue)} діапазонів — python backfill.py --queue")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Рахунки (замовлення магазину) і зіставлення з ними вхідних платежів.
+
+- Рахунки зберігаються в SQLite (INVOICES_DB); CLI і бот пишуть в одну
+  базу, бот підхоплює зміни інкрементально за лічильником seq
+- У пам'яті відкриті рахунки проіндексовані за (мережа, адреса, токен,
+  сума до сплати) і за (мережа, адреса, токен): платіж зіставляється за
+  O(1); USDT в іншій мережі на ту саму адресу рахунок не закриває
+- Точна сума -> "paid"; менша -> "partial" (залишок знову в індексі);
+  більша -> "overpaid"; платіж без точного збігу йде на найстаріший
+  відкритий рахунок цієї адреси
+- Термін дії — купа heapq за expires_at; прострочені знімаються sweep()
+
+Запуск:
+    python invoices.py add <адреса|-> <сума> [токен] [хвилин] [номер_замовлення] [мережа]
+    python invoices.py list
+    python invoices.py cancel <id>
+"""
+import heapq
+import json
+import sqlite3
+import sys
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from transfer import DEFAULT_CHAIN, Transfer
+from watchlist import parse_address
+from config import WALLET_ADDRESS, INVOICES_DB, INVOICE_TTL_SEC
+
+OPEN = "open"
+PARTIAL = "partial"
+PAID = "paid"
+OVERPAID = "overpaid"
+EXPIRED = "expired"
+CANCELLED = "cancelled"
+ACTIVE = (OPEN, PARTIAL)
+
+STATUS_TEXT = {
+    OPEN: "очікує оплати",
+    PARTIAL: "частково сплачено",
+    PAID: "сплачено",
+    OVERPAID: "переплата",
+    EXPIRED: "прострочено",
+    CANCELLED: "скасовано",
+}
+
+_COLUMNS = "id, address, token, amount, received, status, created_at, expires_at, order_ref, payments, chain"
+
+
+class Invoice:
+    __slots__ = (
+        "id", "address", "token", "amount", "received", "status",
+        "created_at", "expires_at", "order_ref", "payments", "chain",
+    )
+
+    def __init__(
+        self, id: str, address: bytes, token: str, amount: Decimal,
+        received: Decimal = Decimal(0), status: str = OPEN,
+        created_at: float = 0.0, expires_at: float = 0.0,
+        order_ref: str = "", payments: Optional[List[str]] = None,
+        chain: str = DEFAULT_CHAIN,
+    ):
+        self.id = id
+        self.address = address
+        self.token = token.upper()
+        self.amount = amount
+        self.received = received
+        self.status = status
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.order_ref = order_ref
+        self.payments = payments or []
+        self.chain = chain
+
+    @property
+    def due(self) -> Decimal:
+        return self.amount - self.received
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE
+
+    @property
+    def status_text(self) -> str:
+        return STATUS_TEXT.get(self.status, self.status)
+
+    def snapshot(self) -> "Invoice":
+        return Invoice(
+            self.id, self.address, self.token, self.amount, self.received, self.status,
+            self.created_at, self.expires_at, self.order_ref, list(self.payments), self.chain,
+        )
+
+    def __repr__(self) -> str:
+        return f"Invoice({self.id}, {self.amount} {self.token}, {self.status})"
+
+
+def _insert_ordered(bucket: Dict[str, Invoice], inv: Invoice):
+    """
+    Додає рахунок у кошик індексу, зберігаючи порядок створення: частковий
+    платіж і refresh() повертають у кошик старий рахунок, і без цього він
+    опинився б після новіших. Пересортування — лише для такої вставки.
+    """
+    last = next(reversed(bucket.values()), None)
+    bucket[inv.id] = inv
+    if last is not None and last.created_at > inv.created_at:
+        ordered = sorted(bucket.values(), key=lambda i: i.created_at)
+        bucket.clear()
+        bucket.update((i.id, i) for i in ordered)
+
+
+class InvoiceBook:
+    def __init__(self, db_path: str = INVOICES_DB):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS invoices ("
+            " id TEXT PRIMARY KEY, address TEXT NOT NULL, token TEXT NOT NULL,"
+            " amount TEXT NOT NULL, received TEXT NOT NULL, status TEXT NOT NULL,"
+            " created_at REAL NOT NULL, expires_at REAL NOT NULL,"
+            " order_ref TEXT NOT NULL DEFAULT '', payments TEXT NOT NULL DEFAULT '[]',"
+            " seq INTEGER NOT NULL)"
+        )
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(invoices)")}
+        if "chain" not in columns:  # база до chains.py: усі рахунки — основної мережі
+            self.db.execute(f"ALTER TABLE invoices ADD COLUMN chain TEXT NOT NULL DEFAULT '{DEFAULT_CHAIN}'")
+        self.db.execute("CREATE INDEX IF NOT EXISTS invoices_seq ON invoices(seq)")
+        self.db.commit()
+
+        self.invoices: Dict[str, Invoice] = {}
+        # (мережа, адреса, токен, сума до сплати) -> {id: Invoice}, у порядку створення
+        self.by_due: Dict[Tuple[str, bytes, str, Decimal], Dict[str, Invoice]] = {}
+        # (мережа, адреса, токен) -> {id: Invoice}
+        self.by_address: Dict[Tuple[str, bytes, str], Dict[str, Invoice]] = {}
+        self.expiry: List[Tuple[float, str]] = []
+        self.applied: Dict[str, str] = {}  # ключ переказу -> id рахунку
+        self._seq = 0
+        self.refresh()
+
+    def __len__(self) -> int:
+        return sum(1 for inv in self.invoices.values() if inv.active)
+
+    # --- індекси ---
+
+    def _index(self, inv: Invoice):
+        if not inv.active:
+            return
+        _insert_ordered(self.by_due.setdefault((inv.chain, inv.address, inv.token, inv.due), {}), inv)
+        _insert_ordered(self.by_address.setdefault((inv.chain, inv.address, inv.token), {}), inv)
+        heapq.heappush(self.expiry, (inv.expires_at, inv.id))
+
+    def _unindex(self, inv: Invoice):
+        for index, key in (
+            (self.by_due, (inv.chain, inv.address, inv.token, inv.due)),
+            (self.by_address, (inv.chain, inv.address, inv.token)),
+        ):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(inv.id, None)
+                if not bucket:
+                    del index[key]
+
+    # --- база ---
+
+    def refresh(self):
+        """Підхоплює рахунки, створені або змінені після попереднього refresh()."""
+        rows = self.db.execute(
+            f"SELECT {_COLUMNS}, seq FROM invoices WHERE seq > ? ORDER BY seq", (self._seq,)
+        ).fetchall()
+        for row in rows:
+            inv = Invoice(
+                id=row[0], address=bytes.fromhex(row[1][2:]), token=row[2],
+                amount=Decimal(row[3]), received=Decimal(row[4]), status=row[5],
+                created_at=row[6], expires_at=row[7], order_ref=row[8],
+                payments=json.loads(row[9]), chain=row[10],
+            )
+            old = self.invoices.get(inv.id)
+            if old is not None:
+                self._unindex(old)
+            self.invoices[inv.id] = inv
+            for key in inv.payments:
+                self.applied[key] = inv.id
+            self._index(inv)
+            self._seq = row[11]
+
+    def _write(self, inv: Invoice, verb: str = "INSERT OR REPLACE"):
+        self.db.execute(
+            f"{verb} INTO invoices ({_COLUMNS}, seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,"
+            " (SELECT COALESCE(MAX(seq), 0) + 1 FROM invoices))",
+            (
+                inv.id, "0x" + inv.address.hex(), inv.token, str(inv.amount), str(inv.received),
+                inv.status, inv.created_at, inv.expires_at, inv.order_ref, json.dumps(inv.payments),
+                inv.chain,
+            ),
+        )
+
+    def create(
+        self, address: bytes, amount: Decimal, token: str = "USDT",
+        ttl_sec: int = INVOICE_TTL_SEC, order_ref: str = "", chain: str = DEFAULT_CHAIN,
+    ) -> Invoice:
+        now = time.time()
+        inv = Invoice(
+            id=order_ref or uuid.uuid4().hex[:12], address=address, token=token, amount=amount,
+            created_at=now, expires_at=now + ttl_sec, order_ref=order_ref, chain=chain,
+        )
+        with self.db:
+            self._write(inv, verb="INSERT")  # існуючий номер замовлення -> IntegrityError
+        self.refresh()
+        return inv
+
+    def cancel(self, invoice_id: str) -> bool:
+        self.refresh()
+        inv = self.invoices.get(invoice_id)
+        if inv is None or not inv.active:
+            return False
+        self._unindex(inv)
+        inv.status = CANCELLED
+        with self.db:
+            self._write(inv)
+        return True
+
+    # --- зіставлення ---
+
+    def match(self, tx: Transfer) -> Optional[Invoice]:
+        """
+        Зараховує вхідний платіж на рахунок. Точна сума до сплати має
+        пріоритет; інакше — найстаріший відкритий рахунок цієї адреси.
+        Повертає знімок стану рахунку після цього платежу; повторний
+        виклик для того самого переказу повертає поточний стан рахунку.
+        Зміни фіксуються в БД викликом commit() — один раз за цикл.
+        """
+        if tx.key in self.applied:
+            inv = self.invoices.get(self.applied[tx.key])
+            return inv.snapshot() if inv is not None else None
+        token = tx.symbol.upper()
+        amount = tx.amount
+        bucket = self.by_due.get((tx.chain, tx.to_addr, token, amount))
+        if not bucket:
+            bucket = self.by_address.get((tx.chain, tx.to_addr, token))
+        if not bucket:
+            return None
+
+        inv = next(iter(bucket.values()))
+        self._unindex(inv)
+        inv.received += amount
+        inv.payments.append(tx.key)
+        if inv.received == inv.amount:
+            inv.status = PAID
+        elif inv.received > inv.amount:
+            inv.status = OVERPAID
+        else:
+            inv.status = PARTIAL
+            self._index(inv)
+        self.applied[tx.key] = inv.id
+        self._write(inv)
+        return inv.snapshot()
+
+    def commit(self):
+        self.db.commit()
+
+    def sweep(self, now: Optional[float] = None) -> List[Invoice]:
+        """Позначає прострочені рахунки; повертає щойно прострочені."""
+        now = time.time() if now is None else now
+        expired = []
+        while self.expiry and self.expiry[0][0] <= now:
+            _, invoice_id = heapq.heappop(self.expiry)
+            inv = self.invoices.get(invoice_id)
+            if inv is None or not inv.active or inv.expires_at > now:
+                continue  # вже закритий або термін подовжено
+            self._unindex(inv)
+            inv.status = EXPIRED
+            expired.append(inv)
+        if expired:
+            with self.db:
+                for inv in expired:
+                    self._write(inv)
+        return expired
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("add", "list", "cancel"):
+        print(__doc__)
+        return
+    if not INVOICES_DB:
+        print("❌ Не задано INVOICES_DB")
+        return
+    book = InvoiceBook()
+    cmd = sys.argv[1]
+    if cmd == "add":
+        if len(sys.argv) < 4:
+            print(__doc__)
+            return
+        address = parse_address(WALLET_ADDRESS if sys.argv[2] == "-" else sys.argv[2])
+        token = sys.argv[4] if len(sys.argv) > 4 else "USDT"
+        ttl = int(sys.argv[5]) * 60 if len(sys.argv) > 5 else INVOICE_TTL_SEC
+        order_ref = sys.argv[6] if len(sys.argv) > 6 else ""
+        chain = sys.argv[7] if len(sys.argv) > 7 else DEFAULT_CHAIN
+        inv = book.create(address, Decimal(sys.argv[3]), token, ttl, order_ref, chain)
+        print(f"✅ Рахунок {inv.id}: {inv.amount} {inv.token} ({inv.chain}) на 0x{inv.address.hex()}")
+    elif cmd == "cancel":
+        for invoice_id in sys.argv[2:]:
+            print(f"{'✅' if book.cancel(invoice_id) else '❌'} {invoice_id}")
+    else:
+        for inv in book.invoices.values():
+            if inv.active:
+                left = int(inv.expires_at - time.time()) // 60
+                print(f"{inv.id}  {inv.due.normalize():f} з {inv.amount.normalize():f} {inv.token} ({inv.chain})  0x{inv.address.hex()}  {inv.status_text}, {left} хв")
+        print(f"Відкритих рахунків: {len(book)}")
+
+
+if __name__ == "__main__":
+    main()
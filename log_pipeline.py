@@ -0,0 +1,156 @@
+"""
+Конвеєр get_logs для щільних діапазонів: мережа в потоках, розбір у процесах.
+
+На історичних діапазонах без фільтра topics (великий список адрес) один
+потік Python упирається в json.loads і перебір мільйонів логів USDT, а
+мережа простоює. Тут:
+- I/O-потоки (пул backfill) тягнуть сторінки get_logs по PIPELINE_PAGE_BLOCKS
+  блоків як сирі bytes відповіді, без розбору
+- пул з N процесів розбирає і фільтрує сторінку (decode_page): між
+  процесами ходять лише bytes сторінки і кортежі знайдених переказів
+- результати збираються в порядку сторінок, тобто в порядку блоків
+
+Сирі сторінки йдуть повз дисковий кеш: щільні історичні діапазони
+однаково витіснили б з нього корисні дані.
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+import requests
+from bscscan_client import TRANSFER_EVENT_TOPIC
+from rate_limiter import CreditBudgetExceeded
+from transfer import INCOMING, OUTGOING, SELF, Transfer
+from config import PIPELINE_PAGE_BLOCKS
+
+# (блок, індекс логу, tx hash, block hash, контракт, від, кому, сума, напрямок)
+Row = Tuple[int, int, bytes, bytes, bytes, bytes, bytes, int, str]
+
+# --- стан процесу-обробника (задається initializer-ом) ---
+_watch: frozenset = frozenset()
+_thresholds: Dict[str, str] = {}
+_track_outgoing = False
+
+
+def init_worker(watch_hex: Sequence[str], thresholds: Dict[str, str], track_outgoing: bool):
+    """
+    watch_hex — адреси як 40 hex-символів у нижньому регістрі (хвіст topic),
+    thresholds — {контракт 0x.. : поріг пилу як 64 hex-символи}.
+    """
+    global _watch, _thresholds, _track_outgoing
+    _watch = frozenset(watch_hex)
+    _thresholds = thresholds
+    _track_outgoing = track_outgoing
+
+
+def decode_page(body: bytes) -> List[Row]:
+    """
+    Розбирає сиру відповідь eth_getLogs і повертає лише наші перекази.
+    Адреси й суми порівнюються як hex-рядки: 64 hex-символи однакової
+    довжини порівнюються так само, як числа.
+    """
+    data = json.loads(body)
+    if "error" in data:
+        raise ValueError(data["error"].get("message", data["error"]))
+    watch = _watch
+    thresholds = _thresholds
+    zero = "0" * 64
+    out: List[Row] = []
+    for lg in data["result"]:
+        topics = lg["topics"]
+        if len(topics) < 3:
+            continue
+        to_hex = topics[2][26:]
+        from_hex = topics[1][26:]
+        to_ours = to_hex in watch
+        from_ours = _track_outgoing and from_hex in watch
+        if to_ours:
+            direction = SELF if from_ours else INCOMING
+        elif from_ours:
+            direction = OUTGOING
+        else:
+            continue
+        word = lg["data"][2:]
+        if len(word) == 64:
+            threshold = thresholds.get(lg["address"].lower())
+            if word == zero or (threshold is not None and word < threshold):
+                continue  # пил
+        out.append((
+            int(lg["blockNumber"], 16), int(lg["logIndex"], 16),
+            bytes.fromhex(lg["transactionHash"][2:]), bytes.fromhex(lg["blockHash"][2:]),
+            bytes.fromhex(lg["address"][2:]), bytes.fromhex(from_hex), bytes.fromhex(to_hex),
+            int(word or "0", 16), direction,
+        ))
+    return out
+
+
+class LogPipeline:
+    def __init__(self, client, addresses: Sequence[bytes], processes: int, track_outgoing: bool):
+        self.client = client
+        thresholds = {}
+        if client.spam is not None:
+            thresholds = {"0x" + c.hex(): t.hex() for c, t in client.spam.thresholds.items()}
+        self.pool = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=init_worker,
+            initargs=([a.hex() for a in addresses], thresholds, track_outgoing),
+        )
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def fetch_page(self, start: int, end: int) -> bytes:
+        """Сира відповідь eth_getLogs (усі Transfer токенів) — bytes без розбору."""
+        payload = {
+            "jsonrpc": "2.0", "id": 1, "method": "eth_getLogs",
+            "params": [{
+                "fromBlock": hex(start), "toBlock": hex(end),
+                "address": self.client.tokens.addresses, "topics": [TRANSFER_EVENT_TOPIC],
+            }],
+        }
+        self.client.limiter.acquire("eth_getLogs")
+        resp = requests.post(self.client.rpc_url, json=payload, timeout=30)
+        resp.raise_for_status()
+        body = resp.content
+        # помилка — коротка відповідь; великі сторінки тут не розбираються
+        if len(body) < 2048 and b'"error"' in body:
+            raise ValueError(json.loads(body)["error"].get("message", "eth_getLogs error"))
+        return body
+
+    def scan(self, start_block: int, end_block: int) -> List[Transfer]:
+        """
+        Перекази діапазону в порядку блоків. Сторінка віддається на розбір
+        одразу після завантаження — наступна вантажиться паралельно з ним.
+        """
+        futures = []
+        page = PIPELINE_PAGE_BLOCKS
+        pos = start_block
+        while pos <= end_block:
+            page_end = min(pos + page - 1, end_block)
+            try:
+                body = self.fetch_page(pos, page_end)
+            except CreditBudgetExceeded:
+                raise
+            except Exception as e:
+                if page > 1 and any(s in str(e).lower() for s in ("413", "too large", "limit", "range")):
+                    page = max(1, page // 2)
+                    continue
+                raise
+            futures.append(self.pool.submit(decode_page, body))
+            pos = page_end + 1
+
+        rows: List[Row] = []
+        for future in futures:
+            rows.extend(future.result())
+        if not rows:
+            return []
+        times = self.client.get_block_timestamps(sorted({r[0] for r in rows}))
+        return [self._to_transfer(row, times[row[0]]) for row in rows]
+
+    def _to_transfer(self, row: Row, timestamp: int) -> Transfer:
+        block, log_index, tx_hash, block_hash, contract, from_addr, to_addr, value, direction = row
+        token = self.client.tokens.get(contract)
+        return Transfer(
+            tx_hash, log_index, block, from_addr, to_addr, value,
+            timestamp=timestamp, decimals=token.decimals, symbol=token.symbol,
+            contract=contract, block_hash=block_hash, direction=direction, chain=self.client.chain.key,
+        )
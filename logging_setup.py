@@ -0,0 +1,141 @@
+"""
+Логування гарячих циклів (пошук переказів, цикл бота) замість
+print(..., flush=True), де кожен рядок — окремий блокуючий write.
+
+- Рівні (LOG_LEVEL): DEBUG — кожен знайдений лог і чанк, INFO — підсумки
+  діапазонів і циклів, WARNING — збої чанків і запитів
+- LOG_FORMAT=json — об'єкт на рядок: ts, level, logger, msg і поля з extra
+- Неблокуючий вивід: QueueHandler лише кладе запис у чергу; окремий потік
+  забирає все накопичене і пише пакет одним write + flush
+- Семплінг: записи з extra={"sample": "тип"} виводяться не частіше
+  LOG_SAMPLE_SEC на тип; до наступного виведеного дописується кількість
+  пропущених
+
+Стартові повідомлення і діагностика лишаються print — вони одноразові.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from typing import Dict, List, Optional, TextIO, Tuple
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_SEC
+
+ROOT = "payments"
+_BATCH = 512  # записів на один write
+_RECORD_FIELDS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "sample"}
+
+_listener: Optional["_Writer"] = None
+_setup_lock = threading.Lock()
+
+
+class SampleFilter(logging.Filter):
+    """Один запис на тип за LOG_SAMPLE_SEC; пропущені рахуються."""
+
+    def __init__(self, interval: float = LOG_SAMPLE_SEC):
+        super().__init__()
+        self.interval = interval
+        self.state: Dict[str, Tuple[float, int]] = {}  # тип -> (час останнього виводу, пропущено)
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample", None)
+        if key is None or self.interval <= 0:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            last, skipped = self.state.get(key, (float("-inf"), 0))
+            if now - last < self.interval:
+                self.state[key] = (last, skipped + 1)
+                return False
+            self.state[key] = (now, 0)
+        if skipped:
+            record.msg = f"{record.getMessage()} (+{skipped} подібних)"
+            record.args = ()
+            record.suppressed = skipped
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value if isinstance(value, (int, float, bool, type(None))) else str(value)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _Writer:
+    """Потік, що переносить записи з черги в stream пакетами."""
+
+    def __init__(self, records: "queue.Queue", stream: TextIO, formatter: logging.Formatter):
+        self.records = records
+        self.stream = stream
+        self.formatter = formatter
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            batch: List[Optional[logging.LogRecord]] = [self.records.get()]
+            while len(batch) < _BATCH:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [self.formatter.format(r) for r in batch if r is not None]
+            try:
+                if lines:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+            except Exception:
+                pass  # недоступний stdout не має зупиняти моніторинг
+            for _ in batch:
+                self.records.task_done()
+            if batch[-1] is None:
+                return
+
+    def flush(self):
+        self.records.join()
+
+    def stop(self):
+        self.records.put(None)
+        self.thread.join(timeout=5)
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream: Optional[TextIO] = None):
+    """Налаштовує логер ROOT один раз; повторні виклики нічого не змінюють."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        records: "queue.Queue" = queue.Queue()
+        formatter = JsonFormatter() if fmt == "json" else logging.Formatter("%(message)s")
+        handler = QueueHandler(records)
+        handler.addFilter(SampleFilter())
+        logger = logging.getLogger(ROOT)
+        logger.setLevel(getattr(logging, level, logging.INFO))
+        logger.addHandler(handler)
+        logger.propagate = False
+        _listener = _Writer(records, stream or sys.stdout, formatter)
+        atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def flush_logs():
+    """Чекає, доки все з черги буде записано (перед print і при зупинці)."""
+    if _listener is not None:
+        _listener.flush()
@@ -0,0 +1,51 @@
+"""
+Вхідні перекази нативної монети мережі (BNB, ETH, POL; без Transfer-логів).
+
+Повні блоки (eth_getBlockByNumber з транзакціями) читаються сирим
+JSON-RPC batch без web3-форматерів: поле `to` кожної транзакції
+переводиться в 20 байтів і перевіряється в AddressSet списку адрес;
+решта полів розбирається лише для збігів.
+"""
+from typing import Any, Callable, Dict, List
+from transfer import DEFAULT_CHAIN, Transfer, raw_bytes, raw_int
+
+NATIVE_SYMBOL = "BNB"
+NATIVE_DECIMALS = 18
+NATIVE_LOG_INDEX = -1  # у нативного переказу немає логу
+
+
+def match_native_block(
+    block: Dict[str, Any],
+    contains: Callable[[bytes], bool],
+    symbol: str = NATIVE_SYMBOL,
+    chain: str = DEFAULT_CHAIN,
+) -> List[Transfer]:
+    """Транзакції блоку з ненульовою сумою на адреси, для яких contains(addr) істинне."""
+    if not block:
+        return []
+    found = []
+    fromhex = bytes.fromhex
+    timestamp = None
+    for tx in block.get("transactions", ()):
+        to = tx.get("to")
+        if not to or not contains(fromhex(to[2:])):
+            continue
+        value = raw_int(tx.get("value"))
+        if not value:
+            continue
+        if timestamp is None:
+            timestamp = raw_int(block.get("timestamp"))
+        found.append(Transfer(
+            tx_hash=raw_bytes(tx.get("hash")),
+            log_index=NATIVE_LOG_INDEX,
+            block_number=raw_int(block.get("number")),
+            from_addr=raw_bytes(tx.get("from")),
+            to_addr=fromhex(to[2:]),
+            value=value,
+            timestamp=timestamp,
+            decimals=NATIVE_DECIMALS,
+            symbol=symbol,
+            block_hash=raw_bytes(block.get("hash")),
+            chain=chain,
+        ))
+    return found
@@ -0,0 +1,353 @@
+"""
+Профіль можливостей RPC-ендпоінта: що саме витримує провайдер.
+
+Вимірює для кожного налаштованого ендпоінта (QUICKNODE_BSC_NODE,
+GETBLOCK_BSC_NODE або адреси з командного рядка):
+- затримку (p50/p90/p99) на eth_blockNumber
+- підтримку JSON-RPC batch і найбільший робочий розмір пакета
+- eth_getHeaderByNumber (легкі заголовки для bloom-префільтра)
+- найбільший діапазон get_logs без фільтра адрес і розмір відповіді
+- фільтр topics[2] на вузлі і найбільший OR-список адрес
+- eth_newFilter / eth_getFilterChanges
+- стійку частоту запитів (сходинки до PROFILE_MAX_RPS, до 2% помилок)
+
+Результат і рекомендовані налаштування пишуться в ENDPOINT_PROFILE_FILE
+(ключ — хост ендпоінта, без шляху з ключем API). BSCscanClient читає
+профіль на старті й бере з нього розміри чанків і пакетів, паралельність,
+стратегію get_logs і стелю частоти запитів.
+
+Запити профайлера йдуть повз rate limiter (він і шукає межу), але
+кредити за них записуються в добовий облік провайдера.
+
+Запуск: python profiler.py [rpc_url ...]
+"""
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import requests
+from rate_limiter import limiter_for
+from config import (
+    QUICKNODE_BSC_NODE, GETBLOCK_BSC_NODE, WALLET_ADDRESS, TOKEN_CONTRACTS,
+    FINALITY_DEPTH, ENDPOINT_PROFILE_FILE, PROFILE_MAX_RPS,
+)
+
+TRANSFER_EVENT_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+LATENCY_SAMPLES = 20
+BATCH_SIZES = (10, 50, 100, 200)
+LOG_RANGES = (1, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+LOG_MAX_BYTES = 50 * 1_048_576  # більші відповіді профайлер не запитує
+TOPIC_LIST_SIZES = (10, 100, 1000)
+RPS_STEP_SEC = 2.0
+ERROR_RATE_MAX = 0.02
+RATE_RETRIES = 3  # повтори запиту-проби після відмови за rate limit
+
+
+def endpoint_key(rpc_url: str) -> str:
+    """
+    Хост і відбиток шляху: в одного провайдера шлях розрізняє мережі й
+    ключі, тож профілі не змішуються. Шлях (часто з ключем API) —
+    лише як хеш, облікові дані в профіль не потрапляють.
+    """
+    parsed = urlparse(rpc_url)
+    host = parsed.hostname or rpc_url
+    path = parsed.path.strip("/")
+    if not path:
+        return host
+    return f"{host}/{hashlib.sha256(path.encode()).hexdigest()[:12]}"
+
+
+def load_profile(rpc_url: str, path: str = ENDPOINT_PROFILE_FILE) -> Optional[Dict[str, Any]]:
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get(endpoint_key(rpc_url))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _is_rate_error(text: str) -> bool:
+    text = text.lower()
+    return any(s in text for s in ("429", "rate", "too many requests", "request limit", "credits"))
+
+
+def _is_size_error(text: str) -> bool:
+    text = text.lower()
+    return any(s in text for s in ("413", "too large", "limit", "range", "exceed", "too many"))
+
+
+class Probe:
+    """Сирі JSON-RPC запити до одного ендпоінта з обліком кредитів."""
+
+    def __init__(self, rpc_url: str):
+        self.rpc_url = rpc_url
+        self.session = requests.Session()
+        self.limiter = limiter_for(rpc_url)
+
+    def call(self, method: str, params: list, timeout: float = 30, retry: bool = True) -> Tuple[Any, Optional[str], float, int]:
+        """
+        (результат, помилка, секунд, байтів відповіді). Відмову за rate limit
+        повторює після паузи, щоб вона не записалась як відсутня можливість.
+        """
+        for attempt in range(RATE_RETRIES if retry else 1):
+            result = self._call_once(method, params, timeout)
+            if result[1] is None or not _is_rate_error(result[1]):
+                break
+            time.sleep(1.0 + attempt)
+        return result
+
+    def _call_once(self, method: str, params: list, timeout: float) -> Tuple[Any, Optional[str], float, int]:
+        self.limiter.charge(method)
+        t0 = time.perf_counter()
+        try:
+            resp = self.session.post(
+                self.rpc_url, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params},
+                timeout=timeout,
+            )
+            elapsed = time.perf_counter() - t0
+            if resp.status_code != 200:
+                return None, f"HTTP {resp.status_code}", elapsed, len(resp.content)
+            data = resp.json()
+        except Exception as e:
+            return None, str(e), time.perf_counter() - t0, 0
+        if "error" in data:
+            return None, str(data["error"].get("message", data["error"])), elapsed, len(resp.content)
+        return data.get("result"), None, elapsed, len(resp.content)
+
+    def batch(self, calls: List[Tuple[str, list]]) -> Tuple[Optional[list], Optional[str]]:
+        for attempt in range(RATE_RETRIES):
+            results, err = self._batch_once(calls)
+            if err is None or not _is_rate_error(err):
+                break
+            time.sleep(1.0 + attempt)
+        return results, err
+
+    def _batch_once(self, calls: List[Tuple[str, list]]) -> Tuple[Optional[list], Optional[str]]:
+        for method, _ in calls:
+            self.limiter.charge(method)
+        try:
+            resp = self.session.post(
+                self.rpc_url,
+                json=[{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in enumerate(calls)],
+                timeout=30,
+            )
+            if resp.status_code != 200:
+                return None, f"HTTP {resp.status_code}"
+            data = resp.json()
+        except Exception as e:
+            return None, str(e)
+        if not isinstance(data, list):
+            return None, str(data.get("error", data))
+        if len(data) != len(calls) or any("error" in item for item in data):
+            errors = [item["error"] for item in data if "error" in item]
+            return None, str(errors[0] if errors else f"{len(data)}/{len(calls)} відповідей")
+        return [item.get("result") for item in sorted(data, key=lambda x: x.get("id", 0))], None
+
+
+# --- окремі виміри ---
+
+def measure_latency(probe: Probe) -> Dict[str, float]:
+    samples = []
+    for _ in range(LATENCY_SAMPLES):
+        _, err, elapsed, _ = probe.call("eth_blockNumber", [])
+        if err is None:
+            samples.append(elapsed * 1000)
+    if not samples:
+        raise ConnectionError("eth_blockNumber не відповідає")
+    samples.sort()
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))], 1)  # noqa: E731
+    return {"p50": round(statistics.median(samples), 1), "p90": pick(0.9), "p99": pick(0.99), "max": round(samples[-1], 1)}
+
+
+def measure_batch(probe: Probe, head: int) -> int:
+    best = 0
+    for size in BATCH_SIZES:
+        results, err = probe.batch([("eth_getBlockByNumber", [hex(head - i), False]) for i in range(size)])
+        if err is not None or any(r is None for r in results):
+            print(f"   batch {size}: ❌ {err or 'порожні результати'}", flush=True)
+            break
+        print(f"   batch {size}: ✅", flush=True)
+        best = size
+    return best
+
+
+def measure_header_method(probe: Probe, head: int) -> str:
+    result, err, _, _ = probe.call("eth_getHeaderByNumber", [hex(head)])
+    return "eth_getHeaderByNumber" if err is None and result else "eth_getBlockByNumber"
+
+
+def measure_log_range(probe: Probe, head: int, contracts: List[str]) -> Dict[str, Any]:
+    best = {"max_range": 0, "max_bytes": 0, "bytes_per_block": 0, "limited_by": "provider"}
+    for blocks in LOG_RANGES:
+        if blocks > head:
+            best["limited_by"] = "profiler"
+            break
+        if best["bytes_per_block"] and best["bytes_per_block"] * blocks > LOG_MAX_BYTES:
+            best["limited_by"] = "profiler"
+            break
+        flt = {"fromBlock": hex(head - blocks + 1), "toBlock": hex(head), "address": contracts, "topics": [TRANSFER_EVENT_TOPIC]}
+        result, err, elapsed, size = probe.call("eth_getLogs", [flt], timeout=60)
+        if err is not None:
+            print(f"   get_logs {blocks} блоків: ❌ {err[:80]}", flush=True)
+            if not _is_size_error(err):
+                best["limited_by"] = f"error: {err[:80]}"
+            break
+        print(f"   get_logs {blocks} блоків: ✅ {len(result)} логів, {size / 1024:.0f} КБ, {elapsed * 1000:.0f} мс", flush=True)
+        best.update(max_range=blocks, max_bytes=size, bytes_per_block=max(1, size // blocks))
+    return best
+
+
+def measure_topics(probe: Probe, head: int, contracts: List[str], blocks: int) -> Tuple[bool, int]:
+    wallet_topic = "0x" + "00" * 12 + WALLET_ADDRESS.lower()[2:]
+    start = hex(head - max(1, blocks) + 1)
+    best = 0
+    for size in TOPIC_LIST_SIZES:
+        topic_list = [wallet_topic] + ["0x" + "00" * 12 + os.urandom(20).hex() for _ in range(size - 1)]
+        flt = {"fromBlock": start, "toBlock": hex(head), "address": contracts,
+               "topics": [TRANSFER_EVENT_TOPIC, None, topic_list]}
+        _, err, _, _ = probe.call("eth_getLogs", [flt])
+        if err is not None:
+            print(f"   topics[2] OR-список {size}: ❌ {err[:80]}", flush=True)
+            break
+        print(f"   topics[2] OR-список {size}: ✅", flush=True)
+        best = size
+    return best > 0, best
+
+
+def measure_log_filter(probe: Probe, contracts: List[str]) -> bool:
+    filter_id, err, _, _ = probe.call("eth_newFilter", [{"address": contracts, "topics": [TRANSFER_EVENT_TOPIC]}])
+    if err is not None or not filter_id:
+        return False
+    _, err, _, _ = probe.call("eth_getFilterChanges", [filter_id])
+    probe.call("eth_uninstallFilter", [filter_id])
+    return err is None
+
+
+def measure_rps(probe: Probe) -> float:
+    """Найбільша частота з сходинок, на якій помилок не більше ERROR_RATE_MAX."""
+    sustainable = 0.0
+    rate = 5.0
+    with ThreadPoolExecutor(max_workers=64) as pool:
+        while rate <= PROFILE_MAX_RPS:
+            count = int(rate * RPS_STEP_SEC)
+            t0 = time.perf_counter()
+
+            def fire(i: int) -> bool:
+                delay = t0 + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                _, err, _, _ = probe.call("eth_blockNumber", [], timeout=10, retry=False)
+                return err is None
+
+            ok = sum(pool.map(fire, range(count)))
+            elapsed = time.perf_counter() - t0
+            achieved = count / elapsed
+            errors = 1 - ok / count
+            mark = "✅" if errors <= ERROR_RATE_MAX and achieved >= rate * 0.8 else "❌"
+            print(f"   {rate:.0f} зап/с: {achieved:.0f} досягнуто, помилок {errors:.0%} {mark}", flush=True)
+            if mark == "❌":
+                break
+            sustainable = rate
+            rate *= 2
+    return sustainable
+
+
+def recommend(p: Dict[str, Any]) -> Dict[str, Any]:
+    """Налаштування клієнта з виміряних можливостей."""
+    logs = p["get_logs"]
+    chunk = max(1, logs["max_range"] // 2)
+    if logs["bytes_per_block"]:
+        chunk = min(chunk, max(1, logs["max_bytes"] // logs["bytes_per_block"]))
+    batch_max = p["batch_max"]
+    rps = round(p["rps"] * 0.8, 1) if p["rps"] else 0
+    # закон Літтла: щоб тримати rps при затримці p50, в польоті має бути rps * p50 запитів
+    concurrency = max(1, min(8, round(rps * p["latency_ms"]["p50"] / 1000))) if rps else 1
+    return {
+        "logs_chunk": chunk,
+        "header_batch": min(batch_max, 100) if batch_max else 0,
+        "native_batch": min(batch_max, 10) if batch_max else 0,
+        "receipt_batch": min(batch_max, 50) if batch_max else 0,
+        "concurrency": concurrency,
+        "rps": rps,
+        "server_topics_max": p["topics_or_max"],
+        "use_log_filter": p["log_filter"],
+    }
+
+
+def profile_endpoint(rpc_url: str) -> Dict[str, Any]:
+    probe = Probe(rpc_url)
+    contracts = list(TOKEN_CONTRACTS)
+    print(f"\n📐 {endpoint_key(rpc_url)}", flush=True)
+
+    latency = measure_latency(probe)
+    print(f"   затримка: p50 {latency['p50']} мс, p90 {latency['p90']} мс, p99 {latency['p99']} мс", flush=True)
+    head_hex, _, _, _ = probe.call("eth_blockNumber", [])
+    head = int(head_hex, 16) - FINALITY_DEPTH
+
+    batch_max = measure_batch(probe, head)
+    header_method = measure_header_method(probe, head)
+    print(f"   заголовки: {header_method}", flush=True)
+    logs = measure_log_range(probe, head, contracts)
+    topics_filter, topics_or_max = measure_topics(probe, head, contracts, min(100, logs["max_range"] or 1))
+    log_filter = measure_log_filter(probe, contracts)
+    print(f"   eth_newFilter: {'✅' if log_filter else '❌'}", flush=True)
+    rps = measure_rps(probe)
+
+    profile = {
+        "measured_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "latency_ms": latency,
+        "batch": batch_max > 0,
+        "batch_max": batch_max,
+        "header_method": header_method,
+        "get_logs": logs,
+        "topics_filter": topics_filter,
+        "topics_or_max": topics_or_max,
+        "log_filter": log_filter,
+        "rps": rps,
+    }
+    profile["recommended"] = recommend(profile)
+    probe.limiter.save()
+    return profile
+
+
+def main():
+    urls = [u.rstrip("/") for u in sys.argv[1:]] or [
+        u.rstrip("/") for u in (QUICKNODE_BSC_NODE, GETBLOCK_BSC_NODE) if u
+    ]
+    if not ENDPOINT_PROFILE_FILE:
+        print("❌ Не задано ENDPOINT_PROFILE_FILE")
+        return
+    try:
+        with open(ENDPOINT_PROFILE_FILE, "r", encoding="utf-8") as f:
+            profiles = json.load(f)
+    except (FileNotFoundError, ValueError):
+        profiles = {}
+
+    for url in urls:
+        try:
+            profile = profile_endpoint(url)
+        except Exception as e:
+            print(f"❌ {endpoint_key(url)}: {e}", flush=True)
+            continue
+        profiles[endpoint_key(url)] = profile
+        rec = profile["recommended"]
+        print(
+            f"   ➜ чанк get_logs {rec['logs_chunk']}, batch заголовків {rec['header_batch']}, "
+            f"паралельність {rec['concurrency']}, {rec['rps']} зап/с, "
+            f"topics[2] до {rec['server_topics_max']} адрес, фільтр {'так' if rec['use_log_filter'] else 'ні'}",
+            flush=True,
+        )
+        with open(ENDPOINT_PROFILE_FILE, "w", encoding="utf-8") as f:
+            json.dump(profiles, f, indent=2)
+    print(f"\n💾 Профіль: {ENDPOINT_PROFILE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
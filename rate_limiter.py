@@ -0,0 +1,260 @@
+"""
+Обмеження частоти RPC-запитів і облік кредитів провайдера.
+
+- TokenBucket: запити/сек з невеликим burst, без фіксованих пауз
+- RpcLimiter: спільний для всіх RPC клієнта (web3 middleware + batch);
+  рахує кредити за методами за цикл і за добу (UTC); після порогу
+  RPC_THROTTLE_AT розтягує залишок квоти на решту доби, після
+  RPC_DEGRADE_AT переходить у degraded-режим, а на 100% відмовляє
+  в запитах, щоб не вийти за тариф
+- Для asyncio — acquire_async(): той самий облік, очікування без
+  блокування циклу подій
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+from config import RPC_PROVIDER_LIMITS, RPC_THROTTLE_AT, RPC_DEGRADE_AT, RPC_BUDGET_FILE
+
+
+class CreditBudgetExceeded(RuntimeError):
+    """Добова квота кредитів вичерпана — запит не надсилається."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Блокує до появи токенів. Повертає час очікування (сек).
+        Запит більший за ємність (великий batch) бере токени в борг —
+        наступні виклики чекають, доки борг не погаситься.
+        """
+        if self.rate <= 0:
+            return 0.0
+        need = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= need:
+                    self.tokens -= tokens
+                    return waited
+                delay = (need - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Неблокуючий acquire для asyncio: токени списуються одразу (можливо
+        в борг), повертається час, який треба перечекати до запиту.
+        """
+        if self.rate <= 0:
+            return 0.0
+        need = min(tokens, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            delay = max(0.0, (need - self.tokens) / self.rate)
+            self.tokens -= tokens
+            return delay
+
+
+class RpcLimiter:
+    """
+    Ліміт запитів/сек і бюджет кредитів одного RPC-провайдера.
+
+    profile: {"rps": 15, "burst": 15, "daily_credits": 0,
+              "credits": {"default": 20, "eth_getLogs": 20, ...}}
+    daily_credits = 0 — квота не відстежується.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        profile: Dict[str, Any],
+        throttle_at: float = 0.7,
+        degrade_at: float = 0.85,
+        state_file: Optional[str] = None,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(profile.get("rps", 10), profile.get("burst"))
+        self.costs: Dict[str, int] = dict(profile.get("credits", {}))
+        self.default_cost = int(self.costs.get("default", 1))
+        self.daily_quota = int(profile.get("daily_credits", 0))
+        self.throttle_at = throttle_at
+        self.degrade_at = degrade_at
+        self.state_file = state_file
+        self.lock = threading.Lock()
+
+        self.day = self._today()
+        self.day_credits = 0
+        self.cycle_credits = 0
+        self.cycle_requests = 0
+        self.waited = 0.0
+        self._load()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def cost(self, method: str) -> int:
+        return int(self.costs.get(method, self.default_cost))
+
+    # --- облік ---
+
+    def acquire(self, method: str, count: int = 1):
+        """Списує кредити за `count` викликів `method` і чекає на rate limit."""
+        credits = self.charge(method, count)
+        waited = self.bucket.acquire(count)
+        waited += self._pace_delay(credits)
+        if waited:
+            with self.lock:
+                self.waited += waited
+
+    async def acquire_async(self, method: str, count: int = 1):
+        """acquire() для asyncio: чекає через asyncio.sleep, не блокуючи цикл подій."""
+        credits = self.charge(method, count)
+        delay = self.bucket.reserve(count) + self._pace_seconds(credits)
+        if delay:
+            with self.lock:
+                self.waited += delay
+            await asyncio.sleep(delay)
+
+    def charge(self, method: str, count: int = 1) -> int:
+        """Лише облік кредитів, без очікування (профайлер сам задає темп)."""
+        credits = self.cost(method) * count
+        with self.lock:
+            today = self._today()
+            if today != self.day:
+                self.day = today
+                self.day_credits = 0
+            if self.daily_quota and self.day_credits + credits > self.daily_quota:
+                raise CreditBudgetExceeded(
+                    f"{self.name}: добова квота {self.daily_quota} кредитів вичерпана"
+                )
+            self.day_credits += credits
+            self.cycle_credits += credits
+            self.cycle_requests += count
+        return credits
+
+    def cap_rate(self, rps: float):
+        """Стеля частоти з профілю ендпоінта: лише знижує налаштований rps."""
+        bucket = self.bucket
+        with bucket.lock:
+            if 0 < rps < bucket.rate:
+                bucket.rate = float(rps)
+                bucket.capacity = min(bucket.capacity, max(1.0, float(rps)))
+                bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def _pace_delay(self, credits: int) -> float:
+        delay = self._pace_seconds(credits)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def _pace_seconds(self, credits: int) -> float:
+        """
+        Після throttle_at частки квоти залишок кредитів розтягується на
+        решту доби (UTC): пауза = кредити / (залишок / секунд до кінця доби).
+        """
+        if not self.daily_quota or self.day_usage < self.throttle_at:
+            return 0.0
+        now = datetime.now(timezone.utc)
+        seconds_left = max(1, 86400 - (now.hour * 3600 + now.minute * 60 + now.second))
+        remaining = max(1, self.daily_quota - self.day_credits)
+        return min(5.0, credits * seconds_left / remaining)
+
+    @property
+    def day_usage(self) -> float:
+        return self.day_credits / self.daily_quota if self.daily_quota else 0.0
+
+    @property
+    def degraded(self) -> bool:
+        """Квота майже вичерпана — варто рідше опитувати і пропускати необов'язкові запити."""
+        return bool(self.daily_quota) and self.day_usage >= self.degrade_at
+
+    def start_cycle(self):
+        with self.lock:
+            self.cycle_credits = 0
+            self.cycle_requests = 0
+            self.waited = 0.0
+
+    def summary(self) -> str:
+        quota = f"/{self.daily_quota}" if self.daily_quota else ""
+        return (
+            f"{self.name}: цикл {self.cycle_requests} запитів, {self.cycle_credits} кредитів, "
+            f"очікування {self.waited:.1f} с; за добу {self.day_credits}{quota}"
+        )
+
+    # --- стан між перезапусками ---
+
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f).get(self.name, {})
+            if data.get("day") == self.day:
+                self.day_credits = int(data.get("credits", 0))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def save(self):
+        if not self.state_file:
+            return
+        try:
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (FileNotFoundError, ValueError):
+                data = {}
+            data[self.name] = {"day": self.day, "credits": self.day_credits}
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти бюджет кредитів: {e}", flush=True)
+
+    # --- web3 ---
+
+    def middleware(self, make_request: Callable, w3: Any) -> Callable:
+        """web3 middleware: кожен RPC-виклик проходить через acquire()."""
+        def inner(method, params):
+            self.acquire(method)
+            return make_request(method, params)
+        return inner
+
+
+def provider_name(rpc_url: str) -> str:
+    url = rpc_url.lower()
+    if "quiknode" in url:
+        return "quicknode"
+    if "getblock" in url:
+        return "getblock"
+    return "default"
+
+
+_limiters: Dict[str, RpcLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(rpc_url: str) -> RpcLimiter:
+    """Один спільний RpcLimiter на провайдера в межах процесу."""
+    name = provider_name(rpc_url)
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            profile = RPC_PROVIDER_LIMITS.get(name, RPC_PROVIDER_LIMITS["default"])
+            limiter = RpcLimiter(name, profile, RPC_THROTTLE_AT, RPC_DEGRADE_AT, RPC_BUDGET_FILE)
+            _limiters[name] = limiter
+        return limiter
@@ -0,0 +1,275 @@
+"""
+Звірка балансів: незалежна перевірка, що сканер нічого не пропустив.
+
+Баланси всіх адрес зі списку для всіх токенів читаються одним пакетом
+через Multicall3 (aggregate3, RECONCILE_BATCH викликів balanceOf на один
+eth_call) на закріпленому блоці (голова мінус confirmations мережі).
+Очікуваний баланс — баланс попередньої звірки плюс сума записаних з того
+часу переказів. Для адрес з розбіжністю запускається точковий re-scan
+get_logs (topics[1]/topics[2] з OR-списком адрес) лише по діапазону від
+попередньої звірки; знайдені перекази, яких не було серед записаних,
+повертаються як пропущені.
+
+Запуск вручну (одна звірка до закріпленого блоку):
+    python reconcile.py
+"""
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from eth_abi import decode, encode
+from bscscan_client import BSCscanClient, TRANSFER_EVENT_TOPIC
+from transfer import INCOMING, OUTGOING, SELF, Transfer, decode_transfer_log, raw_bytes
+from config import (
+    RECONCILE_BATCH, RECONCILE_SCAN_CHUNK, RECONCILE_STATE_FILE,
+)
+
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")
+TOPIC_BATCH = 100  # адрес в одному OR-списку topics
+
+Pair = Tuple[bytes, bytes]  # (контракт токена, адреса)
+
+
+def _pair_key(pair: Pair) -> str:
+    return f"0x{pair[0].hex()}:0x{pair[1].hex()}"
+
+
+def _parse_pair_key(key: str) -> Pair:
+    token, addr = key.split(":")
+    return bytes.fromhex(token[2:]), bytes.fromhex(addr[2:])
+
+
+def encode_balance_calls(pairs: List[Pair]) -> str:
+    """calldata aggregate3 з balanceOf для кожної пари (allowFailure=True)."""
+    calls = [
+        ("0x" + token.hex(), True, BALANCE_OF_SELECTOR + b"\0" * 12 + addr)
+        for token, addr in pairs
+    ]
+    return "0x" + (AGGREGATE3_SELECTOR + encode(["(address,bool,bytes)[]"], [calls])).hex()
+
+
+def decode_balances(data: str) -> List[Optional[int]]:
+    """Результат aggregate3 -> баланси; None для невдалих викликів."""
+    results = decode(["(bool,bytes)[]"], raw_bytes(data))[0]
+    return [int.from_bytes(ret, "big") if ok and len(ret) == 32 else None for ok, ret in results]
+
+
+class Reconciler:
+    """
+    Стан звірки в RECONCILE_STATE_FILE:
+    - anchors: {пара: {"block": N, "balance": "..."}} — баланс на момент звірки
+    - pending: {пара: [[блок, зміна, ключ переказу], ...]} — записані після неї
+    """
+
+    def __init__(self, client, state_file: Optional[str] = RECONCILE_STATE_FILE):
+        self.client = client
+        self.state_file = state_file
+        self.anchors: Dict[str, Dict] = {}
+        self.pending: Dict[str, List] = defaultdict(list)
+        self._load()
+
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self.anchors = data.get("anchors", {})
+        self.pending = defaultdict(list, data.get("pending", {}))
+
+    def save(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump({"anchors": self.anchors, "pending": self.pending}, f)
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти стан звірки: {e}", flush=True)
+
+    # --- облік записаних переказів ---
+
+    def _deltas(self, tx: Transfer) -> List[Tuple[Pair, int]]:
+        out = []
+        if tx.direction in (INCOMING, SELF):
+            out.append(((tx.contract, tx.to_addr), tx.value))
+        if tx.direction in (OUTGOING, SELF):
+            out.append(((tx.contract, tx.from_addr), -tx.value))
+        return out
+
+    def record(self, transactions: List[Transfer]):
+        """Записує перекази, знайдені сканером (усі, незалежно від мінімальної суми)."""
+        for tx in transactions:
+            if not tx.contract:
+                continue  # BNB не звіряється
+            for pair, delta in self._deltas(tx):
+                key = _pair_key(pair)
+                anchor = self.anchors.get(key)
+                if anchor and tx.block_number <= anchor["block"]:
+                    continue
+                self.pending[key].append([tx.block_number, delta, tx.key])
+
+    # --- звірка ---
+
+    def _pairs(self) -> List[Pair]:
+        return [(token, addr) for token in self.client.tokens.address_bytes for addr in self.client.watch]
+
+    def fetch_balances(self, pairs: List[Pair], block: int) -> List[Optional[int]]:
+        """Баланси пачками по RECONCILE_BATCH; усі пачки — одним HTTP batch."""
+        batches = [pairs[i:i + RECONCILE_BATCH] for i in range(0, len(pairs), RECONCILE_BATCH)]
+        calls = [
+            ("eth_call", [{"to": MULTICALL3, "data": encode_balance_calls(batch)}, hex(block)])
+            for batch in batches
+        ]
+        results = self.client._rpc_batch(calls)
+        balances: List[Optional[int]] = []
+        for batch, data in zip(batches, results):
+            if not data or data == "0x":
+                balances.extend([None] * len(batch))
+                continue
+            balances.extend(decode_balances(data))
+        return balances
+
+    def run(self, safe_block: Optional[int] = None) -> List[Transfer]:
+        """
+        Одна звірка на блоці min(голова - confirmations мережі клієнта, safe_block),
+        де safe_block — до якого блоку сканер уже дійшов.
+        Повертає пропущені сканером вхідні перекази.
+        """
+        latest = self.client.get_latest_block()
+        if not latest:
+            return []
+        pinned = latest - self.client.chain.confirmations
+        if safe_block is not None:
+            pinned = min(pinned, safe_block)
+
+        pairs = self._pairs()
+        balances = self.fetch_balances(pairs, pinned)
+        mismatched: Dict[str, int] = {}
+        anchored = 0
+        for pair, balance in zip(pairs, balances):
+            if balance is None:
+                continue
+            key = _pair_key(pair)
+            anchor = self.anchors.get(key)
+            if anchor is None:
+                self._set_anchor(key, pinned, balance)
+                anchored += 1
+                continue
+            if pinned <= anchor["block"]:
+                continue
+            expected = int(anchor["balance"]) + sum(d for bn, d, _ in self.pending[key] if bn <= pinned)
+            if expected == balance:
+                self._set_anchor(key, pinned, balance)
+            else:
+                mismatched[key] = balance
+
+        print(
+            f"🧮 Звірка на блоці {pinned}: {len(pairs)} балансів, "
+            f"{len(pairs) - len(mismatched) - anchored} збігаються, {len(mismatched)} розбіжностей"
+            + (f", {anchored} нових" if anchored else ""),
+            flush=True,
+        )
+
+        missed: List[Transfer] = []
+        if mismatched:
+            missed = self._rescan(mismatched, pinned)
+        self.save()
+        return missed
+
+    def _set_anchor(self, key: str, block: int, balance: int):
+        self.anchors[key] = {"block": block, "balance": str(balance)}
+        rest = [p for p in self.pending.get(key, []) if p[0] > block]
+        if rest:
+            self.pending[key] = rest
+        else:
+            self.pending.pop(key, None)
+
+    def _rescan(self, mismatched: Dict[str, int], pinned: int) -> List[Transfer]:
+        """Точковий get_logs по адресах з розбіжністю від їхньої попередньої звірки."""
+        client = self.client
+        addresses = sorted({_parse_pair_key(key)[1] for key in mismatched})
+        from_block = min(self.anchors[key]["block"] for key in mismatched) + 1
+        print(
+            f"🔎 Re-scan {len(addresses)} адрес, блоки {from_block}-{pinned}",
+            flush=True,
+        )
+
+        logs = []
+        for i in range(0, len(addresses), TOPIC_BATCH):
+            topic_list = ["0x" + "00" * 12 + a.hex() for a in addresses[i:i + TOPIC_BATCH]]
+            for topics in (
+                [TRANSFER_EVENT_TOPIC, None, topic_list],  # вхідні
+                [TRANSFER_EVENT_TOPIC, topic_list],        # вихідні
+            ):
+                logs.extend(self._get_logs(from_block, pinned, topics))
+
+        recorded = {p[2] for key in mismatched for p in self.pending.get(key, [])}
+        seen = set()
+        found: Dict[str, int] = defaultdict(int)
+        candidates = []
+        for lg in logs:
+            token = client.tokens.get(raw_bytes(lg.get("address")))
+            if token is None:
+                continue
+            tx = decode_transfer_log(lg, decimals=token.decimals, symbol=token.symbol, chain=client.chain.key)
+            if tx in seen:
+                continue
+            seen.add(tx)
+            for addr, delta in ((tx.to_addr, tx.value), (tx.from_addr, -tx.value)):
+                key = _pair_key((tx.contract, addr))
+                if key not in mismatched or tx.block_number <= self.anchors[key]["block"]:
+                    continue
+                found[key] += delta
+                if delta > 0 and tx.key not in recorded:
+                    if client.spam is not None and client.spam.is_dust(tx.contract, lg.get("data")):
+                        continue  # пил враховано в балансі, але це не пропущений платіж
+                    candidates.append((lg, token, INCOMING, ""))
+        # час блоків — одним пакетом заголовків на всі пропущені перекази
+        missed: List[Transfer] = client._decode_with_times(candidates)
+
+        for key, balance in mismatched.items():
+            expected = int(self.anchors[key]["balance"]) + found[key]
+            if expected != balance:
+                print(f"   ⚠️ {key}: баланс {balance}, за логами {expected} — перевірте вручну", flush=True)
+            self._set_anchor(key, pinned, balance)
+
+        print(f"   ✅ Re-scan: пропущених вхідних переказів {len(missed)}", flush=True)
+        return missed
+
+    def _get_logs(self, start: int, end: int, topics: list) -> list:
+        """get_logs з діапазоном до RECONCILE_SCAN_CHUNK; при помилці розміру — ділимо навпіл."""
+        out = []
+        chunk = RECONCILE_SCAN_CHUNK
+        pos = start
+        while pos <= end:
+            chunk_end = min(pos + chunk - 1, end)
+            try:
+                out.extend(self.client.w3.eth.get_logs({
+                    "fromBlock": pos,
+                    "toBlock": chunk_end,
+                    "address": self.client.tokens.addresses,
+                    "topics": topics,
+                }))
+                pos = chunk_end + 1
+            except Exception as e:
+                if chunk > 1 and any(s in str(e).lower() for s in ("413", "too large", "limit", "range")):
+                    chunk = max(1, chunk // 2)
+                    continue
+                raise
+        return out
+
+
+def main():
+    client = BSCscanClient()
+    reconciler = Reconciler(client)
+    missed = reconciler.run()
+    for tx in missed:
+        print(f"💸 Пропущено: {tx.amount:.2f} {tx.symbol} на {tx.to_address}, блок {tx.block_number}, {tx.hash}")
+    print(f"💳 {client.limiter.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Маршрутизація сповіщень Telegram: (гаманець, токен, діапазон суми) ->
+набір чатів. Різні магазини й токени — в різні канали, великі суми —
+додатково в чат ескалації.
+
+- Маршрути з ROUTES_FILE (JSON-список); поле, якого немає, збігається
+  з будь-яким значенням. Чати всіх маршрутів, що збіглися, об'єднуються;
+  жоден не збігся — TELEGRAM_CHANNEL_ID
+- Таблиця компілюється один раз: для кожної пари (гаманець, токен) з
+  маршрутів, включно з «будь-який», — відсортовані межі сум і готовий
+  кортеж чатів на кожен проміжок. Пошук — два звернення до dict і
+  bisect по кількох межах, незалежно від кількості маршрутів
+- ChatLimiter: TokenBucket на кожен чат (TELEGRAM_CHAT_RPS) плюс
+  спільний на бота (TELEGRAM_GLOBAL_RPS)
+
+Перевірка: python routing.py 0xГАМАНЕЦЬ USDT 1500
+"""
+import json
+import sys
+import threading
+from bisect import bisect_right
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from rate_limiter import TokenBucket
+from config import (
+    ROUTES_FILE, TELEGRAM_CHANNEL_ID,
+    TELEGRAM_CHAT_RPS, TELEGRAM_CHAT_BURST, TELEGRAM_GLOBAL_RPS,
+)
+
+DEFAULT_CHAT = "default"
+_ZERO = Decimal(0)
+
+# (гаманець або None, токен або None, min, max або None, чати)
+Route = Tuple[Optional[str], Optional[str], Decimal, Optional[Decimal], Tuple[str, ...]]
+
+
+def _parse_route(raw: Dict[str, Any], default_chat: str) -> Route:
+    wallet = raw.get("wallet") or None
+    if wallet is not None:
+        wallet = wallet.strip().lower()
+        if not wallet.startswith("0x") or len(wallet) != 42:
+            raise ValueError(f"Некоректна адреса в маршруті: {raw.get('wallet')!r}")
+    token = (raw.get("token") or "").strip().upper() or None
+    low = Decimal(str(raw.get("min") or 0))
+    high = Decimal(str(raw["max"])) if raw.get("max") is not None else None
+    if high is not None and high <= low:
+        raise ValueError(f"Порожній діапазон суми в маршруті: {low} - {high}")
+    chats = tuple(default_chat if str(c) == DEFAULT_CHAT else str(c) for c in raw.get("chats") or ())
+    if not chats:
+        raise ValueError(f"Маршрут без chats: {raw}")
+    return wallet, token, low, high, chats
+
+
+class Router:
+    def __init__(self, routes: List[Route], default_chat: str = TELEGRAM_CHANNEL_ID):
+        self.routes = routes
+        self.default = (default_chat,) if default_chat else ()
+        self.wallets = {r[0] for r in routes if r[0] is not None}
+        self.tokens = {r[1] for r in routes if r[1] is not None}
+        # (гаманець|None, токен|None) -> (межі сум, чати на проміжок [межа_i, межа_i+1))
+        self.table: Dict[Tuple[Optional[str], Optional[str]], Tuple[List[Decimal], List[Tuple[str, ...]]]] = {}
+        groups: Dict[Tuple[Optional[str], Optional[str]], List[Route]] = {}
+        for r in routes:
+            groups.setdefault((r[0], r[1]), []).append(r)
+        for wallet in [None, *self.wallets]:
+            for token in [None, *self.tokens]:
+                keys = {(None, None), (wallet, None), (None, token), (wallet, token)}
+                self.table[(wallet, token)] = self._compile([r for key in keys for r in groups.get(key, ())])
+
+    def _compile(self, routes: List[Route]) -> Tuple[List[Decimal], List[Tuple[str, ...]]]:
+        bounds = sorted({_ZERO, *(r[2] for r in routes), *(r[3] for r in routes if r[3] is not None)})
+        chats = []
+        for low in bounds:
+            merged: Dict[str, None] = {}  # порядок чатів — як у маршрутах
+            for r in routes:
+                if r[2] <= low and (r[3] is None or low < r[3]):
+                    merged.update(dict.fromkeys(r[4]))
+            chats.append(tuple(merged) or self.default)
+        return bounds, chats
+
+    @classmethod
+    def load(cls, path: str = ROUTES_FILE, default_chat: str = TELEGRAM_CHANNEL_ID) -> "Router":
+        if not path:
+            return cls([], default_chat)
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        router = cls([_parse_route(r, default_chat) for r in raw], default_chat)
+        print(f"🧭 Маршрутів: {len(router.routes)}, чатів: {len(router.chats)}", flush=True)
+        return router
+
+    @property
+    def chats(self) -> List[str]:
+        seen: Dict[str, None] = dict.fromkeys(self.default)
+        for r in self.routes:
+            seen.update(dict.fromkeys(r[4]))
+        return list(seen)
+
+    def route(self, wallet: str, token: str, amount: Decimal) -> Tuple[str, ...]:
+        """Чати для переказу: wallet — '0x…' у нижньому регістрі, token — символ."""
+        wallet = wallet if wallet in self.wallets else None
+        token = token if token in self.tokens else None
+        bounds, chats = self.table[(wallet, token)]
+        i = bisect_right(bounds, amount) - 1
+        return chats[i] if i >= 0 else self.default
+
+    def route_event(self, event: Dict[str, Any]) -> Tuple[str, ...]:
+        """Гаманець події — отримувач для вхідного платежу, відправник для вихідного."""
+        transfer = event["transfer"]
+        wallet = transfer["to_address"] if transfer.get("is_incoming", True) else transfer["from_address"]
+        return self.route(wallet.lower(), str(transfer["symbol"]).upper(), Decimal(transfer["amount"]))
+
+
+class ChatLimiter:
+    """Паузи перед надсиланням: окремий темп кожного чату і спільний ліміт бота."""
+
+    def __init__(self, chat_rps: float = TELEGRAM_CHAT_RPS, burst: int = TELEGRAM_CHAT_BURST,
+                 global_rps: float = TELEGRAM_GLOBAL_RPS):
+        self.chat_rps = chat_rps
+        self.burst = burst
+        self.total = TokenBucket(global_rps)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, chat: str) -> float:
+        with self.lock:
+            bucket = self.buckets.get(chat)
+            if bucket is None:
+                bucket = self.buckets[chat] = TokenBucket(self.chat_rps, self.burst)
+        return bucket.acquire() + self.total.acquire()
+
+
+def main():
+    if len(sys.argv) != 4:
+        print("Використання: python routing.py 0xГАМАНЕЦЬ ТОКЕН СУМА")
+        sys.exit(1)
+    router = Router.load()
+    chats = router.route(sys.argv[1].lower(), sys.argv[2].upper(), Decimal(sys.argv[3]))
+    print(f"📨 {', '.join(chats) or '—'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Канали сповіщень (sinks): кожна подія — вхідний платіж або вихідний
+переказ — розсилається в усі канали з NOTIFY_SINKS паралельно.
+
+- telegram — повідомлення в чати за маршрутами (routing.py): кожен
+             чат у своєму потоці зі своїм темпом (TELEGRAM_CHAT_RPS)
+- webhook  — POST JSON на WEBHOOK_URL; з WEBHOOK_SECRET тіло
+             підписується HMAC-SHA256 у заголовку X-Signature
+- file     — рядок JSON у NOTIFY_FILE (append-only журнал для аудиту)
+
+Кожен канал підтверджує подію сам (ack). Поки її не підтвердили всі
+канали, подія лежить у SINK_STATE_FILE з лічильником спроб по каналах
+і повторюється лише для каналів без ack. Після невдалої розсилки канал
+пропускає цикли з паузою SINK_BACKOFF_SEC, що подвоюється до
+SINK_BACKOFF_MAX_SEC; успіх скидає паузу. Лише після SINK_MAX_ATTEMPTS
+невдалих розсилок канал для події вважається відмовленим; подія, яку не
+доставив жоден канал, відкидається з окремим записом у лог.
+Кожен канал обробляє свої події у власному потоці:
+повільний канал не затримує інші, а розсилка триває стільки, скільки
+найповільніший канал.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import requests
+from routing import ChatLimiter, Router
+from telegram_bot import TelegramBot
+from transfer import Transfer
+from config import (
+    NOTIFY_SINKS, WEBHOOK_URL, WEBHOOK_SECRET, NOTIFY_FILE,
+    SINK_STATE_FILE, SINK_RETRIES, SINK_MAX_ATTEMPTS, SINK_BACKOFF_SEC, SINK_BACKOFF_MAX_SEC,
+    TELEGRAM_SEND_THREADS,
+)
+
+PAYMENT = "payment"
+OUTGOING_EVENT = "outgoing"
+SENT_CHATS = "telegram_sent"  # чати, в які подію вже надіслано (зберігається разом з подією)
+_INTERNAL = ("message", SENT_CHATS)
+
+
+def public_fields(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Подія без тексту Telegram і службових полів — для webhook і файлу."""
+    return {k: v for k, v in event.items() if k not in _INTERNAL}
+
+
+def make_event(kind: str, tx: Transfer, invoice: Optional[Any] = None, message: str = "") -> Dict[str, Any]:
+    """
+    Подія для розсилки: ключ як у processed_txs, переказ, рахунок і
+    готовий текст для Telegram. Лише JSON-типи — подія зберігається
+    в SINK_STATE_FILE до підтвердження всіма каналами.
+    """
+    transfer = dict(tx.formatted)
+    transfer["amount"] = str(tx.amount)
+    event: Dict[str, Any] = {
+        "key": ("out:" if kind == OUTGOING_EVENT else "") + tx.key,
+        "kind": kind,
+        "transfer": transfer,
+        "message": message,
+        "created_at": int(time.time()),
+    }
+    if invoice is not None:
+        event["invoice"] = {
+            "id": invoice.id,
+            "order_ref": invoice.order_ref,
+            "status": invoice.status,
+            "token": invoice.token,
+            "amount": str(invoice.amount),
+            "received": str(invoice.received),
+            "due": str(invoice.due),
+        }
+    return event
+
+
+class Sink:
+    """Канал сповіщень: send() — одна спроба, deliver() — з повторами."""
+
+    name = "sink"
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def deliver(self, event: Dict[str, Any], send: Optional[Callable[[Dict[str, Any]], bool]] = None) -> bool:
+        """send() до SINK_RETRIES разів з паузою 1, 2, 4… с. True — канал підтвердив."""
+        send = send or self.send
+        error = "відмова"
+        for attempt in range(1, SINK_RETRIES + 1):
+            try:
+                if send(event):
+                    return True
+                error = "відмова"
+            except Exception as e:
+                error = str(e)
+            if attempt < SINK_RETRIES:
+                time.sleep(2 ** (attempt - 1))
+        print(f"   ❌ {self.name}: {event['key'][:18]}…: {error}", flush=True)
+        return False
+
+    def deliver_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, bool]]:
+        """
+        Події по черзі (порядок повідомлень зберігається). Після першої
+        відмови решта не надсилається і не повертається — їх повторимо
+        наступного циклу без лічби спроби.
+        """
+        results = []
+        for key, event in items:
+            ok = self.deliver(event)
+            results.append((key, ok))
+            if not ok:
+                break
+        return results
+
+    def close(self):
+        pass
+
+
+class TelegramSink(Sink):
+    """
+    Чати події — з Router; кожен чат у власному потоці отримує свої події
+    по черзі в темпі ChatLimiter. Подія підтверджена, коли надіслана в усі
+    свої чати; вже надіслані чати записуються в подію (SENT_CHATS) і при
+    повторі пропускаються.
+    """
+
+    name = "telegram"
+
+    def __init__(self, telegram: TelegramBot, router: Optional[Router] = None,
+                 limiter: Optional[ChatLimiter] = None):
+        self.telegram = telegram
+        self.router = router or Router([], telegram.channel_id)
+        self.limiter = limiter or ChatLimiter()
+        self.pool = ThreadPoolExecutor(max_workers=max(1, TELEGRAM_SEND_THREADS), thread_name_prefix="telegram")
+        self.lock = threading.Lock()
+
+    def remaining(self, event: Dict[str, Any]) -> List[str]:
+        sent = event.get(SENT_CHATS, ())
+        return [chat for chat in self.router.route_event(event) if chat not in sent]
+
+    def _send_chat(self, chat: str, event: Dict[str, Any]) -> bool:
+        self.limiter.acquire(chat)
+        if not self.telegram.send_message(event["message"], chat_id=chat):
+            return False
+        with self.lock:
+            event.setdefault(SENT_CHATS, []).append(chat)
+        return True
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        return all(self._send_chat(chat, event) for chat in self.remaining(event))
+
+    def deliver_many(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, bool]]:
+        by_chat: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        pending_chats: Dict[str, int] = {}  # ключ -> чатів, у які ще треба надіслати
+        for key, event in items:
+            chats = self.remaining(event)
+            pending_chats[key] = len(chats)
+            for chat in chats:
+                by_chat.setdefault(chat, []).append((key, event))
+
+        def run_chat(chat, chat_items):
+            done = []
+            for key, event in chat_items:
+                ok = self.deliver(event, lambda e: self._send_chat(chat, e))
+                done.append((key, ok))
+                if not ok:
+                    break  # решту подій цього чату — наступного циклу, порядок зберігається
+            return done
+
+        failed = set()
+        futures = [self.pool.submit(run_chat, chat, chat_items) for chat, chat_items in by_chat.items()]
+        for future in futures:
+            for key, ok in future.result():
+                pending_chats[key] -= 1
+                if not ok:
+                    failed.add(key)
+        # Подія без невдач, але з непройденими чатами — без результату (спроба не рахується)
+        return [(key, key not in failed) for key, _ in items if key in failed or pending_chats[key] == 0]
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class WebhookSink(Sink):
+    """POST події без поля message; 2xx — підтвердження."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, secret: str = ""):
+        self.url = url
+        self.secret = secret.encode()
+        self.session = requests.Session()
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        body = json.dumps(public_fields(event), sort_keys=True).encode()
+        headers = {"Content-Type": "application/json", "X-Event-Key": event["key"]}
+        if self.secret:
+            headers["X-Signature"] = hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+        resp = self.session.post(self.url, data=body, headers=headers, timeout=10)
+        if resp.status_code >= 300:
+            raise ConnectionError(f"HTTP {resp.status_code}")
+        return True
+
+    def close(self):
+        self.session.close()
+
+
+class FileSink(Sink):
+    """Рядок JSON на подію; запис з fsync — підтверджена подія вже на диску."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def send(self, event: Dict[str, Any]) -> bool:
+        line = json.dumps(public_fields(event), ensure_ascii=False, sort_keys=True)
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+
+def build_sinks(telegram: TelegramBot) -> List[Sink]:
+    sinks: List[Sink] = []
+    for name in NOTIFY_SINKS:
+        if name == "telegram":
+            sinks.append(TelegramSink(telegram, Router.load(default_chat=telegram.channel_id)))
+        elif name == "webhook":
+            if not WEBHOOK_URL:
+                print("⚠️ NOTIFY_SINKS: webhook без WEBHOOK_URL — пропущено", flush=True)
+                continue
+            sinks.append(WebhookSink(WEBHOOK_URL, WEBHOOK_SECRET))
+        elif name == "file":
+            sinks.append(FileSink(NOTIFY_FILE))
+        else:
+            print(f"⚠️ NOTIFY_SINKS: невідомий канал {name}", flush=True)
+    return sinks
+
+
+class Notifier:
+    """Розсилка подій у канали з окремим станом підтверджень і спроб для кожного."""
+
+    def __init__(self, sinks: List[Sink], state_file: Optional[str] = SINK_STATE_FILE):
+        self.sinks = sinks
+        self.state_file = state_file
+        self.pending: Dict[str, Dict[str, Any]] = {}  # ключ -> {"event", "acked", "failed", "attempts"}
+        self.pool = ThreadPoolExecutor(max_workers=max(1, len(sinks)), thread_name_prefix="sink")
+        self._published = False
+        self._failures: Dict[str, int] = {}  # канал -> невдалих розсилок поспіль
+        self._retry_at: Dict[str, float] = {}  # канал -> час, до якого розсилку пропускаємо
+        self._load()
+
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                self.pending = json.load(f).get("pending", {})
+        except (FileNotFoundError, ValueError):
+            self.pending = {}
+        if self.pending:
+            print(f"📨 Непідтверджених подій: {len(self.pending)}", flush=True)
+
+    def save(self):
+        if not self.state_file:
+            return
+        try:
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"pending": self.pending}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.state_file)
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти стан каналів: {e}", flush=True)
+
+    def describe(self) -> str:
+        return ", ".join(sink.name for sink in self.sinks) or "—"
+
+    def is_pending(self, key: str) -> bool:
+        return key in self.pending
+
+    def start_cycle(self):
+        self._published = False
+
+    def retry(self) -> List[str]:
+        """Повтор непідтверджених подій, якщо в цьому циклі розсилки ще не було."""
+        if self._published or not self.pending:
+            return []
+        return self.publish([])
+
+    def publish(self, events: List[Dict[str, Any]]) -> List[str]:
+        """
+        Додає нові події до непідтверджених і розсилає всі непідтверджені
+        в канали, що не чекають паузи після невдачі. Повертає ключі подій,
+        завершених у всіх каналах (ack або відмова після SINK_MAX_ATTEMPTS).
+        """
+        self._published = True
+        for event in events:
+            self.pending.setdefault(event["key"], {"event": event, "acked": [], "failed": [], "attempts": {}})
+        if not self.pending:
+            return []
+
+        now = time.time()
+        ready = [sink for sink in self.sinks if self._retry_at.get(sink.name, 0) <= now]
+        work = {
+            sink.name: [
+                (key, entry["event"]) for key, entry in self.pending.items()
+                if sink.name not in entry["acked"] and sink.name not in entry["failed"]
+            ]
+            for sink in ready
+        }
+        t0 = time.perf_counter()
+        futures = [(sink, self.pool.submit(sink.deliver_many, work[sink.name])) for sink in ready if work[sink.name]]
+        for sink, future in futures:
+            failed = False
+            for key, ok in future.result():
+                entry = self.pending[key]
+                if ok:
+                    entry["acked"].append(sink.name)
+                    continue
+                failed = True
+                attempts = entry["attempts"][sink.name] = entry["attempts"].get(sink.name, 0) + 1
+                if attempts >= SINK_MAX_ATTEMPTS:
+                    print(f"⛔ {sink.name}: подію {key[:18]}… відкинуто після {attempts} розсилок", flush=True)
+                    entry["failed"].append(sink.name)
+            self._backoff(sink.name, failed)
+
+        names = {sink.name for sink in self.sinks}
+        done = [key for key, entry in self.pending.items() if names <= set(entry["acked"]) | set(entry["failed"])]
+        for key in done:
+            entry = self.pending.pop(key)
+            if not entry["acked"]:
+                transfer = entry["event"].get("transfer", {})
+                print(
+                    f"⛔ Подію {key} ({transfer.get('amount')} {transfer.get('symbol', '')}) не доставлено "
+                    f"жодним каналом після {SINK_MAX_ATTEMPTS} розсилок — відкинуто",
+                    flush=True,
+                )
+        if futures:
+            print(
+                f"📨 Канали ({self.describe()}): завершено {len(done)}, очікують {len(self.pending)}, "
+                f"{time.perf_counter() - t0:.2f} с",
+                flush=True,
+            )
+        self.save()
+        return done
+
+    def _backoff(self, name: str, failed: bool):
+        """Пауза каналу після невдалої розсилки: SINK_BACKOFF_SEC, 2×, 4×… до SINK_BACKOFF_MAX_SEC."""
+        if not failed:
+            self._failures.pop(name, None)
+            self._retry_at.pop(name, None)
+            return
+        n = self._failures[name] = self._failures.get(name, 0) + 1
+        delay = min(SINK_BACKOFF_MAX_SEC, SINK_BACKOFF_SEC * 2 ** min(n - 1, 20))
+        self._retry_at[name] = time.time() + delay
+        print(f"   ⏸ {name}: наступна розсилка не раніше ніж за {delay:.0f} с", flush=True)
+
+    async def publish_async(self, events: List[Dict[str, Any]]) -> List[str]:
+        return await asyncio.to_thread(self.publish, events)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        for sink in self.sinks:
+            sink.close()
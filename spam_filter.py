@@ -0,0 +1,176 @@
+"""
+Фільтр спаму (address poisoning) до декодування логу.
+
+Боти-отруювачі шлють на популярні гаманці нульові або мізерні Transfer
+з адрес, схожих на справжніх контрагентів (ті самі перші й останні
+символи). Перевірки, від найдешевшої:
+- сума: 32-байтове поле data порівнюється з порогом як bytes
+  (big-endian однакової довжини — порівняння збігається з числовим);
+  лише пил відкидається до декодування
+- схожа адреса: індекс відомих контрагентів за 2 першими + 2 останніми
+  байтами; інша адреса з тим самим ключем — можлива підробка
+- частота: понад SPAM_SENDER_MAX переказів від відправника за
+  SPAM_SENDER_WINDOW_BLOCKS блоків; не рахуються довірені адреси
+  (наші та отримувачі наших вихідних переказів)
+Схожа адреса і частота лише позначають переказ підозрілим (Transfer.suspect,
+попередження в повідомленні): біржовий гаманець чи контрагент зі збігом
+ключа — справжні платежі, і втратити їх гірше, ніж надіслати спам.
+"""
+import json
+from collections import Counter, deque
+from decimal import Decimal
+from typing import Any, Deque, Dict, Iterable, Optional, Set
+from transfer import INCOMING, OUTGOING, raw_bytes, raw_int
+from config import (
+    SPAM_DUST_AMOUNT, SPAM_SENDER_MAX, SPAM_SENDER_WINDOW_BLOCKS, SPAM_STATE_FILE,
+)
+
+ZERO_WORD = bytes(32)
+_ADDRESS_TAIL = slice(-20, None)
+_KEY_HEAD = slice(12, 14)  # перші 2 байти адреси в 32-байтовому topic
+_KEY_TAIL = slice(30, 32)  # останні 2 байти
+
+# Вердикти check(): DUST відкидається, решта — позначка на переказі
+DUST = "dust"
+LOOKALIKE = "lookalike"
+RATE = "rate"
+
+
+class SpamFilter:
+    def __init__(self, state_file: Optional[str] = SPAM_STATE_FILE):
+        self.state_file = state_file
+        self.counters: Counter = Counter()
+        self.thresholds: Dict[bytes, bytes] = {}  # контракт -> поріг пилу (32 байти)
+        self.known: Dict[bytes, Set[bytes]] = {}  # ключ схожості -> адреси
+        self.trusted: Set[bytes] = set()
+        self.recent: Dict[bytes, Deque[int]] = {}  # відправник -> номери блоків
+        self._dirty = False
+        self._load()
+
+    # --- налаштування ---
+
+    def set_tokens(self, tokens: Iterable[Any]):
+        """Пороги пилу в сирих одиницях кожного токена (SPAM_DUST_AMOUNT)."""
+        for token in tokens:
+            if token.address:
+                threshold = int(Decimal(str(SPAM_DUST_AMOUNT)).scaleb(token.decimals))
+                self.thresholds[token.address] = threshold.to_bytes(32, "big")
+
+    def learn(self, addr: bytes, trusted: bool = False):
+        """Додає справжнього контрагента (20 байтів) до індексу схожості."""
+        if trusted and addr not in self.trusted:
+            self.trusted.add(addr)
+            self._dirty = True
+        key = addr[:2] + addr[-2:]
+        bucket = self.known.get(key)
+        if bucket is None:
+            self.known[key] = {addr}
+        elif addr not in bucket:
+            bucket.add(addr)
+        else:
+            return
+        self._dirty = True
+
+    # --- перевірки ---
+
+    def is_dust(self, contract: bytes, data: Any) -> bool:
+        """Нульова або менша за поріг сума; data — сире 32-байтове поле логу."""
+        data = raw_bytes(data)
+        if len(data) != 32:
+            return False
+        if data == ZERO_WORD:
+            return True
+        threshold = self.thresholds.get(contract)
+        return threshold is not None and data < threshold
+
+    def _is_lookalike(self, word: bytes) -> bool:
+        key = bytes.__getitem__(word, _KEY_HEAD) + bytes.__getitem__(word, _KEY_TAIL)
+        bucket = self.known.get(key)
+        return bucket is not None and bytes.__getitem__(word, _ADDRESS_TAIL) not in bucket
+
+    def _over_rate(self, addr: bytes, block_number: int) -> bool:
+        window = self.recent.get(addr)
+        if window is None:
+            if len(self.recent) > 50_000:
+                self._prune(block_number)
+            window = self.recent[addr] = deque()
+        oldest = block_number - SPAM_SENDER_WINDOW_BLOCKS
+        while window and window[0] <= oldest:
+            window.popleft()
+        if len(window) >= SPAM_SENDER_MAX:
+            return True
+        window.append(block_number)
+        return False
+
+    def _prune(self, block_number: int):
+        oldest = block_number - SPAM_SENDER_WINDOW_BLOCKS
+        self.recent = {a: w for a, w in self.recent.items() if w and w[-1] > oldest}
+
+    def check(self, lg: Any, direction: str) -> str:
+        """
+        Вердикт для логу до декодування: DUST — відкинути; LOOKALIKE чи
+        RATE — доставити з позначкою підозри; "" — чистий. Контрагент
+        (відправник вхідного, отримувач вихідного) чистого переказу стає
+        відомим; підозрілий до індексу схожості не додається.
+        """
+        contract = raw_bytes(lg.get("address"))
+        if self.is_dust(contract, lg.get("data")):
+            self.counters["dust"] += 1
+            return DUST
+
+        topics = lg["topics"]
+        if direction == INCOMING:
+            word = raw_bytes(topics[1])
+        elif direction == OUTGOING:
+            word = raw_bytes(topics[2])
+        else:
+            self.counters["passed"] += 1
+            return ""  # між нашими адресами
+
+        if self._is_lookalike(word):
+            self.counters["lookalike"] += 1
+            return LOOKALIKE
+        addr = bytes.__getitem__(word, _ADDRESS_TAIL)
+        if addr not in self.trusted and self._over_rate(addr, raw_int(lg.get("blockNumber"))):
+            self.counters["rate"] += 1
+            return RATE
+        # отримувач нашого вихідного переказу — довірений контрагент
+        self.learn(addr, trusted=direction == OUTGOING)
+        self.counters["passed"] += 1
+        return ""
+
+    def summary(self) -> str:
+        c = self.counters
+        return (
+            f"спам: відкинуто пил {c['dust']}, підозрілих (схожі адреси {c['lookalike']}, "
+            f"частота {c['rate']}), чистих {c['passed']}"
+        )
+
+    # --- стан ---
+
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for addr in data.get("known", []):
+            self.learn(bytes.fromhex(addr[2:]))
+        for addr in data.get("trusted", []):
+            self.learn(bytes.fromhex(addr[2:]), trusted=True)
+        self._dirty = False
+
+    def save(self):
+        if not self.state_file or not self._dirty:
+            return
+        try:
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump({
+                    "known": ["0x" + a.hex() for b in self.known.values() for a in b],
+                    "trusted": ["0x" + a.hex() for a in self.trusted],
+                }, f)
+            self._dirty = False
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти стан спам-фільтра: {e}", flush=True)
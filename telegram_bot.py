@@ -1,9 +1,13 @@
 """
 Модуль для надсилання повідомлень у Telegram
 """
+import asyncio
+import time
 import requests
-from typing import Dict, Optional
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID
+from typing import Any, Dict, Optional, Union
+import chains
+from transfer import Transfer
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID, TELEGRAM_API_URL
 
 
 class TelegramBot:
@@ -11,50 +15,172 @@ class TelegramBot:
     
     def __init__(self, bot_token: str = TELEGRAM_BOT_TOKEN):
         self.bot_token = bot_token
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.base_url = f"{TELEGRAM_API_URL}/bot{bot_token}"
         self.channel_id = TELEGRAM_CHANNEL_ID
         
-    def send_message(self, text: str, parse_mode: str = "HTML") -> bool:
-        """Надсилання повідомлення у канал"""
+    def send_message(self, text: str, parse_mode: str = "HTML", chat_id: Optional[str] = None) -> bool:
+        """Надсилання повідомлення у канал (або в chat_id); на 429 — одна повторна спроба після retry_after"""
         url = f"{self.base_url}/sendMessage"
         params = {
-            'chat_id': self.channel_id,
+            'chat_id': chat_id or self.channel_id,
             'text': text,
             'parse_mode': parse_mode,
             'disable_web_page_preview': False
         }
         
-        try:
-            response = requests.post(url, json=params, timeout=10)
-            response.raise_for_status()
-            return response.json().get('ok', False)
-        except requests.exceptions.RequestException as e:
-            print(f"Помилка надсилання повідомлення: {e}")
-            return False
+        for attempt in range(2):
+            try:
+                response = requests.post(url, json=params, timeout=10)
+                if response.status_code == 429 and attempt == 0:
+                    time.sleep(self._retry_after(response.json()))
+                    continue
+                response.raise_for_status()
+                return response.json().get('ok', False)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Помилка надсилання повідомлення: {e}")
+                return False
+        return False
+
+    @staticmethod
+    def _retry_after(body: Dict) -> float:
+        """Пауза з відповіді 429 (parameters.retry_after), не більше хвилини"""
+        retry_after = (body.get('parameters') or {}).get('retry_after', 1)
+        return min(float(retry_after), 60.0)
     
-    def format_payment_message(self, tx_data: Dict) -> str:
+    def format_payment_message(self, tx_data: Union[Transfer, Dict], invoice: Optional[Any] = None) -> str:
         """Форматування повідомлення про оплату у форматі як на фото"""
+        if isinstance(tx_data, Transfer):
+            tx_data = tx_data.formatted
+
         # Форматуємо суму
         amount_str = f"{tx_data['amount']:.2f} {tx_data['symbol']}"
         
         # Посилання на транзакцію
         tx_hash = tx_data['hash']
-        tx_link = f"https://bscscan.com/tx/{tx_hash}"
+        tx_link = chains.tx_url(tx_data.get('chain'), tx_hash)
         
         # Формуємо повідомлення
         message = f"""💰 <b>Нова оплата отримана!</b>
 
 📊 <b>Сума:</b> {amount_str}
-📥 <b>Отримано на:</b> <code>{tx_data['to_address']}</code>
+{self.format_chain_line(tx_data)}{self.format_suspect_line(tx_data)}📥 <b>Отримано на:</b> <code>{tx_data['to_address']}</code>
 🔗 <b>Хеш транзакції:</b> <code>{tx_hash}</code>
 🕐 <b>Час:</b> {tx_data['timestamp']}
-
+{self.format_invoice_block(invoice)}
 🔗 <a href="{tx_link}">Переглянути транзакцію</a>"""
         
         return message
+
+    @staticmethod
+    def format_chain_line(tx_data: Dict) -> str:
+        """Рядок з назвою мережі — лише коли бот стежить за кількома мережами"""
+        if not chains.MULTI_CHAIN:
+            return ""
+        key = tx_data.get('chain') or chains.DEFAULT_CHAIN
+        try:
+            name = chains.get_chain(key).name
+        except ValueError:
+            name = key
+        return f"⛓ <b>Мережа:</b> {name}\n"
+
+    @staticmethod
+    def format_suspect_line(tx_data: Dict) -> str:
+        """Попередження спам-фільтра: переказ доставлено, але варто перевірити адресу"""
+        suspect = tx_data.get('suspect')
+        if suspect == "lookalike":
+            return "⚠️ <b>Увага:</b> адреса схожа на відомого контрагента — звірте її повністю\n"
+        if suspect == "rate":
+            return "⚠️ <b>Увага:</b> відправник надсилає незвично багато переказів — можливий спам\n"
+        return ""
+
+    def format_invoice_block(self, invoice: Optional[Any]) -> str:
+        """Рядки про рахунок, на який зараховано платіж (порожньо, якщо рахунку немає)"""
+        if invoice is None:
+            return ""
+        lines = [f"🧾 <b>Рахунок:</b> <code>{invoice.id}</code> — {invoice.status_text}"]
+        if invoice.order_ref and invoice.order_ref != invoice.id:
+            lines.append(f"🛒 <b>Замовлення:</b> {invoice.order_ref}")
+        lines.append(f"💳 <b>Сплачено:</b> {invoice.received.normalize():f} з {invoice.amount.normalize():f} {invoice.token}")
+        if invoice.status == "partial":
+            lines.append(f"⏳ <b>Залишок:</b> {invoice.due.normalize():f} {invoice.token}")
+        elif invoice.status == "overpaid":
+            lines.append(f"➕ <b>Переплата:</b> {(-invoice.due).normalize():f} {invoice.token}")
+        return "\n".join(lines) + "\n"
     
-    def send_payment_notification(self, tx_data: Dict) -> bool:
+    def send_payment_notification(self, tx_data: Union[Transfer, Dict], invoice: Optional[Any] = None) -> bool:
         """Надсилання сповіщення про оплату"""
-        message = self.format_payment_message(tx_data)
+        message = self.format_payment_message(tx_data, invoice)
         return self.send_message(message)
 
+    def format_outgoing_message(self, tx_data: Union[Transfer, Dict]) -> str:
+        """Повідомлення про вихідний переказ (повернення, виведення) або переказ між нашими адресами"""
+        if isinstance(tx_data, Transfer):
+            tx_data = tx_data.formatted
+
+        amount_str = f"{tx_data['amount']:.2f} {tx_data['symbol']}"
+        tx_hash = tx_data['hash']
+        tx_link = chains.tx_url(tx_data.get('chain'), tx_hash)
+        title = "🔁 <b>Переказ між нашими адресами</b>" if tx_data.get('direction') == "self" else "📤 <b>Вихідний переказ</b>"
+
+        message = f"""{title}
+
+📊 <b>Сума:</b> {amount_str}
+{self.format_chain_line(tx_data)}{self.format_suspect_line(tx_data)}📤 <b>З адреси:</b> <code>{tx_data['from_address']}</code>
+📥 <b>На адресу:</b> <code>{tx_data['to_address']}</code>
+🔗 <b>Хеш транзакції:</b> <code>{tx_hash}</code>
+🕐 <b>Час:</b> {tx_data['timestamp']}
+
+🔗 <a href="{tx_link}">Переглянути транзакцію</a>"""
+
+        return message
+
+    def send_outgoing_notification(self, tx_data: Union[Transfer, Dict]) -> bool:
+        """Надсилання сповіщення про вихідний переказ"""
+        return self.send_message(self.format_outgoing_message(tx_data))
+
+
+class AsyncTelegramBot(TelegramBot):
+    """
+    Те саме форматування, надсилання — через aiohttp без блокування циклу
+    подій. Сеанс відкривається при першому повідомленні; close() — при зупинці.
+    """
+
+    def __init__(self, bot_token: str = TELEGRAM_BOT_TOKEN):
+        super().__init__(bot_token)
+        self._session = None
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def send_message_async(self, text: str, parse_mode: str = "HTML", chat_id: Optional[str] = None) -> bool:
+        """Надсилання повідомлення у канал (або в chat_id)"""
+        from aiohttp import ClientError, ClientSession, ClientTimeout
+
+        if self._session is None:
+            self._session = ClientSession(timeout=ClientTimeout(total=10))
+        params = {
+            'chat_id': chat_id or self.channel_id,
+            'text': text,
+            'parse_mode': parse_mode,
+            'disable_web_page_preview': False
+        }
+        for attempt in range(2):
+            try:
+                async with self._session.post(f"{self.base_url}/sendMessage", json=params) as response:
+                    if response.status == 429 and attempt == 0:
+                        await asyncio.sleep(self._retry_after(await response.json(content_type=None)))
+                        continue
+                    response.raise_for_status()
+                    return (await response.json(content_type=None)).get('ok', False)
+            except (ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"Помилка надсилання повідомлення: {e}")
+                return False
+        return False
+
+    async def send_payment_notification_async(self, tx_data: Union[Transfer, Dict], invoice: Optional[Any] = None) -> bool:
+        return await self.send_message_async(self.format_payment_message(tx_data, invoice))
+
+    async def send_outgoing_notification_async(self, tx_data: Union[Transfer, Dict]) -> bool:
+        return await self.send_message_async(self.format_outgoing_message(tx_data))
@@ -1,15 +1,23 @@
 """
-ТЕСТ: Сканує блоки назад від останнього, знаходить ОСТАННЮ USDT транзакцію
-на гаманець і надсилає в Telegram. Логує все.
+ТЕСТ: Знаходить ОСТАННЮ USDT транзакцію на гаманець і надсилає в Telegram.
+Спершу дивиться в локальне сховище бота (TRANSFER_STORE_DB) — миттєво,
+без RPC; якщо там порожньо — сканує блоки назад від останнього. Логує все.
 
 Запуск: python test_find_last_tx.py
 """
+import os
 import sys
 import time
 import traceback
+from datetime import datetime, timezone
 import requests
 from web3 import Web3
-from config import QUICKNODE_BSC_NODE, WALLET_ADDRESS, TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID
+from config import (
+    QUICKNODE_BSC_NODE, WALLET_ADDRESS, TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID,
+    TRANSFER_STORE_DB,
+)
+from bscscan_client import make_web3
+from rate_limiter import limiter_for
 
 USDT_CONTRACT = "0x55d398326f99059fF775485246999027B3197955"
 TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
@@ -68,6 +76,66 @@ def send_telegram(text):
         return False
 
 
+def find_in_store(wallet):
+    """Остання вхідна USDT з локального сховища або None."""
+    if not TRANSFER_STORE_DB or not os.path.exists(TRANSFER_STORE_DB):
+        log("Локальне сховище відсутнє")
+        return None
+    from transfer_store import TransferStore
+    from watchlist import parse_address
+
+    t0 = time.perf_counter()
+    store = TransferStore(TRANSFER_STORE_DB)
+    last = store.last(1, parse_address(wallet), symbol="USDT")
+    log(f"Запит до сховища ({store.count()} переказів): {(time.perf_counter() - t0) * 1000:.1f} мс")
+    if not last:
+        return None
+    tx = last[0]
+    return {
+        "hash": tx.hash,
+        "from": tx.from_address,
+        "to": tx.to_address,
+        "amount": float(tx.amount),
+        "block": tx.block_number,
+        "timestamp": datetime.fromtimestamp(tx.timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+    }
+
+
+def report(found_tx, method_note):
+    # === КРОК 4: Надсилання в Telegram ===
+    print("=" * 60)
+    log("КРОК 4: Надсилання в Telegram")
+    print("=" * 60)
+
+    tx_link = f"https://bscscan.com/tx/{found_tx['hash']}"
+    message = f"""🧪 <b>ТЕСТ - Остання USDT транзакція:</b>
+
+📊 <b>Сума:</b> {found_tx['amount']:.2f} USDT
+📤 <b>Від:</b> <code>{found_tx['from']}</code>
+📥 <b>До:</b> <code>{found_tx['to']}</code>
+📦 <b>Блок:</b> {found_tx['block']}
+🕐 <b>Час:</b> {found_tx['timestamp']}
+
+🔗 <a href="{tx_link}">Переглянути на BSCScan</a>
+
+<i>{method_note}</i>"""
+
+    log(f"TX: {found_tx['hash']}")
+    log(f"Сума: {found_tx['amount']:.2f} USDT")
+    log(f"Блок: {found_tx['block']}")
+
+    ok = send_telegram(message)
+    if ok:
+        log("✅ Надіслано в Telegram!")
+    else:
+        log_err("❌ Telegram не вдалося!")
+    print()
+
+    print("=" * 60)
+    log("ТЕСТ ЗАВЕРШЕНО")
+    print("=" * 60)
+
+
 def main():
     wallet = WALLET_ADDRESS.lower()
     usdt_checksum = Web3.to_checksum_address(USDT_CONTRACT)
@@ -78,12 +146,31 @@ def main():
     log(f"Topic адреси: {topic_addr}")
     print()
 
+    # === КРОК 0: Локальне сховище ===
+    print("=" * 60)
+    log("КРОК 0: Пошук у локальному сховищі")
+    print("=" * 60)
+    try:
+        found_tx = find_in_store(wallet)
+    except Exception as e:
+        log_err(f"Сховище: {e}")
+        found_tx = None
+    if found_tx:
+        log(f"  ✅ ЗНАЙДЕНО! Блок {found_tx['block']}, {found_tx['amount']:.2f} USDT — сканування не потрібне")
+        print()
+        report(found_tx, "Джерело: локальне сховище, без RPC")
+        return
+    log("Немає в сховищі, сканую блоки")
+    print()
+
     # === КРОК 1: Підключення ===
     print("=" * 60)
     log("КРОК 1: Підключення")
     print("=" * 60)
     try:
-        w3 = Web3(Web3.HTTPProvider(QUICKNODE_BSC_NODE.rstrip("/"), request_kwargs={"timeout": 30}))
+        # Кеш остаточних блоків + спільний rate limiter провайдера замість пауз
+        w3 = make_web3(QUICKNODE_BSC_NODE.rstrip("/"))
+        limiter = limiter_for(QUICKNODE_BSC_NODE)
         latest = w3.eth.block_number
         log(f"OK. Блок: {latest}")
     except Exception as e:
@@ -202,7 +289,6 @@ def main():
                     block_data = w3.eth.get_block(block_num)
                     ts = block_data.get("timestamp", 0)
                     if ts:
-                        from datetime import datetime
                         time_str = datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S UTC")
                 except Exception as te:
                     log(f"  Timestamp: {te}")
@@ -236,48 +322,16 @@ def main():
         if blocks_scanned % 100 == 0 and blocks_scanned > 0:
             log(f"  Просканував {blocks_scanned} блоків...")
 
-        time.sleep(0.3)
-
     log(f"Просканував {blocks_scanned} блоків, помилок: {blocks_with_error}")
+    log(limiter.summary())
     print()
 
     if not found_tx:
         log_err(f"TX не знайдено в останніх {MAX_SCAN_BLOCKS} блоках!")
         return
 
-    # === КРОК 4: Надсилання в Telegram ===
-    print("=" * 60)
-    log("КРОК 4: Надсилання в Telegram")
-    print("=" * 60)
-
-    tx_link = f"https://bscscan.com/tx/{found_tx['hash']}"
-    message = f"""🧪 <b>ТЕСТ - Остання USDT транзакція:</b>
-
-📊 <b>Сума:</b> {found_tx['amount']:.2f} USDT
-📤 <b>Від:</b> <code>{found_tx['from']}</code>
-📥 <b>До:</b> <code>{found_tx['to']}</code>
-📦 <b>Блок:</b> {found_tx['block']}
-🕐 <b>Час:</b> {found_tx['timestamp']}
-
-🔗 <a href="{tx_link}">Переглянути на BSCScan</a>
-
-<i>Метод: {'get_logs з фільтром' if use_filter else 'get_logs без фільтра'}
-Просканував: {blocks_scanned} блоків</i>"""
-
-    log(f"TX: {found_tx['hash']}")
-    log(f"Сума: {found_tx['amount']:.2f} USDT")
-    log(f"Блок: {found_tx['block']}")
-
-    ok = send_telegram(message)
-    if ok:
-        log("✅ Надіслано в Telegram!")
-    else:
-        log_err("❌ Telegram не вдалося!")
-    print()
-
-    print("=" * 60)
-    log("ТЕСТ ЗАВЕРШЕНО")
-    print("=" * 60)
+    method = 'get_logs з фільтром' if use_filter else 'get_logs без фільтра'
+    report(found_tx, f"Метод: {method}\nПросканував: {blocks_scanned} блоків")
 
 
 if __name__ == "__main__":
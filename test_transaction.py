@@ -1,8 +1,7 @@
 """
 Тестовий скрипт для перевірки конкретної транзакції
 """
-from web3 import Web3
-from bscscan_client import BSCscanClient
+from bscscan_client import BSCscanClient, make_web3
 from telegram_bot import TelegramBot
 from config import QUICKNODE_BSC_NODE, WALLET_ADDRESS
 
@@ -22,7 +21,7 @@ def check_transaction():
     print("=" * 60)
     
     # Підключаємося до QuickNode
-    w3 = Web3(Web3.HTTPProvider(QUICKNODE_BSC_NODE))
+    w3 = make_web3(QUICKNODE_BSC_NODE)
     
     if not w3.is_connected():
         print("❌ Не вдалося підключитися до QuickNode")
@@ -89,9 +89,9 @@ def test_transaction_search():
                 found_tx = client.check_transaction_by_hash(tx_hash)
                 if found_tx:
                     print(f"✅ Транзакцію знайдено через API!")
-                    print(f"   From: {found_tx.get('from', '')}")
-                    print(f"   To: {found_tx.get('to', '')}")
-                    print(f"   Value: {found_tx.get('value', '')}")
+                    print(f"   From: {found_tx.from_address}")
+                    print(f"   To: {found_tx.to_address}")
+                    print(f"   Value: {found_tx.amount} {found_tx.symbol}")
                 else:
                     print(f"❌ Транзакцію не знайдено через API")
                     print(f"   Можливі причини:")
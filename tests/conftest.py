@@ -0,0 +1,205 @@
+"""
+Спільне для тестів: оточення config без мережі і вузол JSON-RPC у пам'яті.
+
+config читає змінні оточення під час імпорту, тому вони задаються тут,
+до імпорту модулів бота. FakeNode підміняє requests.post і
+requests.Session.post (через нього ходить HTTPProvider web3), тож
+клієнт працює своїм звичайним кодом — batch, web3, лімітер — без сокетів.
+"""
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RPC_URL = "http://node.test/rpc"
+WALLET = "0xceb8658255151827b3fc99d257471120413d0f28"
+USDT = "0x55d398326f99059ff775485246999027b3197955"
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+os.environ.update({
+    "QUICKNODE_BSC_NODE": RPC_URL,
+    "GETBLOCK_BSC_NODE": "",
+    "USE_FALLBACK_ENDPOINT": "false",
+    "WALLET_ADDRESS": WALLET,
+    "TOKEN_CONTRACTS": USDT,
+    "CHAINS": "bsc",
+    "INITIAL_CONNECTION_DELAY": "0",
+    "CONNECT_RETRIES": "1",
+    "USE_CHAIN_CACHE": "false",
+    "USE_LOG_FILTER": "false",
+    "USE_SPAM_FILTER": "false",
+    "TRACK_NATIVE": "false",
+    "TRACK_OUTGOING": "false",
+    "ENDPOINT_PROFILE_FILE": "",
+    "SINK_STATE_FILE": "",
+    "NOTIFY_SINKS": "file",
+    "RPC_PROVIDER_LIMITS": '{"default": {"rps": 100000}}',
+    "TELEGRAM_API_URL": "http://telegram.test",
+    "LOG_LEVEL": "WARNING",
+})
+
+import requests  # noqa: E402
+
+
+def word(address: str) -> str:
+    """Адреса -> 32-байтовий topic."""
+    return "0x" + "00" * 12 + address[2:].lower()
+
+
+class FakeNode:
+    """
+    JSON-RPC вузол у пам'яті: Transfer-логи по блоках, заголовки з часом
+    і хешем, log-фільтри. fail[метод] — виняток, яким «падає» HTTP-запит
+    з цим методом (таймаут, обрив), як у справжнього транспорту.
+    """
+
+    def __init__(self, head: int = 100):
+        self.head = head
+        self.logs: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.hashes: Dict[int, str] = {}
+        self.filters: Dict[str, int] = {}
+        self.fail: Dict[str, Exception] = {}
+        self.calls: List[str] = []
+        self._seq = 0
+
+    def _hex32(self) -> str:
+        self._seq += 1
+        return "0x" + self._seq.to_bytes(32, "big").hex()
+
+    def block_hash(self, n: int) -> str:
+        if n not in self.hashes:
+            self.hashes[n] = self._hex32()
+        return self.hashes[n]
+
+    def transfer(self, block: int, to: str = WALLET, amount: int = 5, sender: Optional[str] = None,
+                 token: str = USDT, tx_hash: Optional[str] = None) -> str:
+        """Додає Transfer-лог у блок; повертає хеш транзакції."""
+        tx_hash = tx_hash or self._hex32()
+        self.logs[block].append({
+            "address": token,
+            "topics": [TRANSFER_TOPIC, word(sender or "0x" + "ab" * 20), word(to)],
+            "data": "0x" + (amount * 10 ** 18).to_bytes(32, "big").hex(),
+            "blockNumber": hex(block),
+            "blockHash": self.block_hash(block),
+            "transactionHash": tx_hash,
+            "transactionIndex": hex(len(self.logs[block])),
+            "logIndex": hex(len(self.logs[block])),
+            "removed": False,
+        })
+        return tx_hash
+
+    def reorg(self, block: int, keep: bool = False):
+        """Блок замінено: новий хеш; keep — ті самі перекази потрапили і в новий блок."""
+        self.hashes[block] = self._hex32()
+        if keep:
+            for lg in self.logs[block]:
+                lg["blockHash"] = self.hashes[block]
+        else:
+            self.logs[block] = []
+
+    # --- JSON-RPC ---
+
+    def _logs_in(self, start: int, end: int, addresses=None) -> List[Dict[str, Any]]:
+        wanted = {a.lower() for a in addresses} if addresses else None
+        return [
+            dict(lg) for n in range(start, end + 1) for lg in self.logs.get(n, ())
+            if wanted is None or lg["address"] in wanted
+        ]
+
+    def handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        method, params = req["method"], req.get("params") or []
+        if method == "eth_blockNumber":
+            result = hex(self.head)
+        elif method == "eth_chainId":
+            result = "0x38"
+        elif method == "eth_call":
+            if params[0]["data"] == "0x313ce567":  # decimals()
+                result = "0x" + (18).to_bytes(32, "big").hex()
+            else:  # symbol()
+                result = "0x" + (32).to_bytes(32, "big").hex() + (4).to_bytes(32, "big").hex() + b"USDT".ljust(32, b"\0").hex()
+        elif method in ("eth_getBlockByNumber", "eth_getHeaderByNumber"):
+            n = int(params[0], 16)
+            result = None if n > self.head else {
+                "number": hex(n), "hash": self.block_hash(n), "timestamp": hex(1_700_000_000 + n * 3),
+            }
+        elif method == "eth_getLogs":
+            f = params[0]
+            result = self._logs_in(int(f["fromBlock"], 16), int(f["toBlock"], 16), f.get("address"))
+        elif method == "eth_newFilter":
+            result = hex(len(self.filters) + 1)
+            self.filters[result] = self.head
+        elif method == "eth_getFilterChanges":
+            last = self.filters.get(params[0])
+            if last is None:
+                return {"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32000, "message": "filter not found"}}
+            self.filters[params[0]] = self.head
+            result = self._logs_in(last + 1, self.head)
+        elif method == "eth_uninstallFilter":
+            result = self.filters.pop(params[0], None) is not None
+        else:
+            return {"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32601, "message": f"{method} not found"}}
+        return {"jsonrpc": "2.0", "id": req.get("id"), "result": result}
+
+    def post(self, url: str, json_body: Any) -> requests.Response:
+        body = json_body if isinstance(json_body, list) else [json_body]
+        for req in body:
+            self.calls.append(req["method"])
+            if req["method"] in self.fail:
+                raise self.fail[req["method"]]
+        out = [self.handle(req) for req in body] if isinstance(json_body, list) else self.handle(json_body)
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp.encoding = "utf-8"
+        resp.headers["Content-Type"] = "application/json"
+        resp._content = json.dumps(out).encode()
+        return resp
+
+
+@pytest.fixture(autouse=True)
+def _state_dir(tmp_path, monkeypatch):
+    """Файли стану (processed_txs.json, кеш токенів, …) — у тимчасовому каталозі тесту."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def node(monkeypatch) -> FakeNode:
+    fake = FakeNode()
+
+    def post(url, **kwargs):
+        body = kwargs["json"] if kwargs.get("json") is not None else json.loads(kwargs["data"])
+        return fake.post(url, body)
+
+    monkeypatch.setattr(requests, "post", post)
+    monkeypatch.setattr(requests.Session, "post", lambda self, url, **kwargs: post(url, **kwargs))
+    return fake
+
+
+@pytest.fixture
+def client(node):
+    from bscscan_client import BSCscanClient
+
+    return BSCscanClient(RPC_URL)
+
+
+@pytest.fixture
+def bot(client):
+    """
+    PaymentMonitorBot без стартових повідомлень; події — лише в канал file
+    (NOTIFY_SINKS), Telegram тільки форматує текст. Курсор — на голові вузла.
+    """
+    from bot import PaymentMonitorBot
+    from telegram_bot import TelegramBot
+
+    monitor = PaymentMonitorBot.__new__(PaymentMonitorBot)
+    monitor.bscscan = client
+    monitor.telegram = TelegramBot()
+    monitor._init_state()
+    monitor.start_block = client.get_latest_block()
+    return monitor
@@ -0,0 +1,88 @@
+"""Aggregates: облік переказів і відкликання внесків після реорганізації."""
+from decimal import Decimal
+
+import pytest
+import requests
+
+from aggregates import DAY, TOKEN, Aggregates
+from transfer import Transfer
+
+
+@pytest.fixture
+def agg_bot(bot):
+    bot.aggregates = Aggregates("aggregates.db")
+    return bot
+
+
+def _token_total(aggregates: Aggregates):
+    return aggregates.totals(DAY, TOKEN, 0, 2 ** 40).get(("USDT", ""), [Decimal(0), 0])
+
+
+def _counted(aggregates: Aggregates):
+    return dict(aggregates.db.execute("SELECT tx_key, retracted FROM counted"))
+
+
+def test_reorg_retracts_and_recounts(node, agg_bot):
+    start = agg_bot.start_block
+    node.transfer(start + 1, amount=10)  # переживе реорганізацію
+    node.transfer(start + 2, amount=7)   # зникне з ланцюга
+    node.head = start + 3
+    agg_bot.check_new_transactions()
+    assert _token_total(agg_bot.aggregates) == [Decimal(17), 2]
+    kept_key, lost_key = sorted(agg_bot.aggregates.journal)
+
+    node.reorg(start + 1, keep=True)
+    node.reorg(start + 2)
+    node.head = start + 4
+    agg_bot.check_new_transactions()
+
+    # знайдений знову з тим самим ключем — врахований один раз, зниклий — відкликаний
+    assert _token_total(agg_bot.aggregates) == [Decimal(10), 1]
+    assert _counted(agg_bot.aggregates) == {kept_key: 0, lost_key: 1}
+    assert set(agg_bot.aggregates.journal) == {kept_key}
+    assert agg_bot.aggregates.journal[kept_key][2] == bytes.fromhex(node.block_hash(start + 1)[2:])
+
+    node.head = start + 5  # наступний цикл без змін — без подвійного обліку
+    agg_bot.check_new_transactions()
+    assert _token_total(agg_bot.aggregates) == [Decimal(10), 1]
+
+
+def _tx(n: int, block: int = 10, amount: int = 5) -> Transfer:
+    return Transfer(
+        n.to_bytes(32, "big"), 0, block, b"\xab" * 20, b"\xcd" * 20, amount * 10 ** 18,
+        timestamp=1_700_000_000, block_hash=b"\x01" * 32,
+    )
+
+
+def test_add_counts_once_and_again_after_retract():
+    aggregates = Aggregates("aggregates.db")
+    tx = _tx(1)
+    assert aggregates.add(tx)
+    assert not aggregates.add(tx)  # уже в журналі
+    assert not aggregates.add(_tx(2), known=True)  # оброблений до таблиці counted
+    assert aggregates.retract_blocks("bsc", {10}) == [tx.key]
+    assert _token_total(aggregates) == [Decimal(0), 0]
+    assert aggregates.add(tx, known=True)  # відкликаний — рахується знову
+    aggregates.commit()
+
+    reopened = Aggregates("aggregates.db")  # стан — у SQLite
+    assert _token_total(reopened) == [Decimal(5), 1]
+    assert not reopened.add(tx, known=True)
+    assert reopened.unconfirmed_blocks("bsc", 9) == {10: b"\x01" * 32}
+    assert reopened.unconfirmed_blocks("bsc", 10) == {}  # остаточний — з журналу геть
+    assert not reopened.add(tx)  # ключ лишається в counted
+
+
+def test_reorg_check_failure_keeps_cursor(node, agg_bot):
+    start = agg_bot.start_block
+    node.transfer(start + 1)
+    node.head = start + 2
+    agg_bot.check_new_transactions()
+    node.head = start + 3
+    node.fail["eth_getBlockByNumber"] = requests.Timeout("read timed out")  # хеші блоків журналу
+    agg_bot.check_new_transactions()  # не виходить з циклу винятком
+    assert agg_bot.start_block == start + 2
+    del node.fail["eth_getBlockByNumber"]
+    agg_bot.check_new_transactions()
+    assert agg_bot.start_block == start + 3
+    assert _token_total(agg_bot.aggregates) == [Decimal(5), 1]
@@ -0,0 +1,60 @@
+"""Задачі AsyncPaymentMonitor: помилка циклу не зупиняє TaskGroup."""
+import asyncio
+
+import pytest
+
+from conftest import RPC_URL
+
+
+def _monitor():
+    from async_bot import AsyncPaymentMonitor
+    from async_client import AsyncBSCscanClient
+    from telegram_bot import AsyncTelegramBot
+
+    monitor = AsyncPaymentMonitor(AsyncBSCscanClient(RPC_URL), AsyncTelegramBot())
+    monitor.next_interval = lambda client=None: 0
+    monitor.report_cycle = lambda: None
+    return monitor
+
+
+def test_scan_loop_survives_unexpected_error():
+    monitor = _monitor()
+    calls = []
+
+    async def check(client):
+        calls.append(client)
+        if len(calls) == 1:
+            raise asyncio.TimeoutError()  # не ConnectionError — раніше вбивав TaskGroup
+        raise asyncio.CancelledError()  # скасування проходить крізь цикл
+
+    monitor.check_new_transactions_async = check
+
+    async def main():
+        monitor._awake.set()
+        with pytest.raises(asyncio.CancelledError):
+            await monitor._scan_loop(monitor.bscscan)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_delivery_loop_survives_unexpected_error():
+    monitor = _monitor()
+    delivered = []
+
+    async def process(transactions):
+        if transactions == "bad":
+            raise ValueError("broken event")
+        delivered.append(transactions)
+
+    monitor.process_transactions_async = process
+
+    async def main():
+        task = asyncio.create_task(monitor._delivery_loop())
+        await monitor.queue.put("bad")
+        await monitor.queue.put([])
+        await asyncio.wait_for(monitor.queue.join(), timeout=5)
+        task.cancel()
+
+    asyncio.run(main())
+    assert delivered == [[]]
@@ -0,0 +1,61 @@
+"""Транспорт AsyncBSCscanClient і gather_or_cancel без мережі."""
+import asyncio
+
+import pytest
+
+from conftest import RPC_URL
+
+
+class _FailingSession:
+    """aiohttp-сеанс, POST якого падає з заданим винятком."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+    def post(self, url, json=None):
+        error = self.error
+
+        class _Request:
+            async def __aenter__(self):
+                raise error
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Request()
+
+
+@pytest.mark.parametrize("error", [asyncio.TimeoutError(), "client_error"])
+def test_batch_transport_error_is_connection_error(error):
+    from aiohttp import ClientConnectionError
+
+    from async_client import AsyncBSCscanClient
+
+    client = AsyncBSCscanClient(RPC_URL)
+    client._session = _FailingSession(ClientConnectionError("reset") if error == "client_error" else error)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client._rpc_batch_async([("eth_getBlockByNumber", ["0x1", False])]))
+
+
+def test_gather_or_cancel_cancels_siblings():
+    from async_client import gather_or_cancel
+
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise ConnectionError("batch")
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await gather_or_cancel(slow(), failing())
+
+    asyncio.run(main())
+    assert cancelled == [True]
@@ -0,0 +1,41 @@
+"""Цикл PaymentMonitorBot.check_new_transactions проти FakeNode."""
+import pytest
+import requests
+
+
+@pytest.mark.parametrize("error", [requests.Timeout("read timed out"), requests.HTTPError("502 Bad Gateway")])
+def test_header_batch_failure_keeps_cursor(node, bot, error):
+    start = bot.start_block
+    node.transfer(start + 2)
+    node.head = start + 5
+    node.fail["eth_getBlockByNumber"] = error  # час блоків — batch заголовків
+
+    bot.check_new_transactions()  # не виходить з циклу винятком
+
+    assert bot.start_block == start
+    assert not bot.processed_txs
+
+    del node.fail["eth_getBlockByNumber"]
+    bot.check_new_transactions()
+
+    assert bot.start_block == start + 5
+    assert len(bot.processed_txs) == 1
+
+
+def test_filter_delta_failure_rescans_gap(node, bot):
+    bot.bscscan.use_log_filter = True
+    node.head += 1
+    bot.check_new_transactions()  # встановлює фільтр
+    assert bot.bscscan._filter_id is not None
+    start = bot.start_block
+    node.head = start + 3
+    node.transfer(start + 2)
+    node.fail["eth_getBlockByNumber"] = requests.Timeout("read timed out")  # дельта вже забрана, час — ні
+    bot.check_new_transactions()
+    assert bot.start_block == start
+    assert bot.bscscan._filter_id is None
+    assert not bot.processed_txs
+    del node.fail["eth_getBlockByNumber"]
+    bot.check_new_transactions()  # новий фільтр + range-скан пропуску
+    assert bot.start_block == start + 3
+    assert len(bot.processed_txs) == 1
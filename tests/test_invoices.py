@@ -0,0 +1,122 @@
+"""InvoiceBook: зіставлення платежів з рахунками, термін дії, спільна база."""
+import time
+from decimal import Decimal
+
+import pytest
+
+from invoices import EXPIRED, OPEN, OVERPAID, PAID, PARTIAL, InvoiceBook
+from transfer import Transfer
+
+SHOP = b"\xcd" * 20
+OTHER = b"\xee" * 20
+
+
+def _tx(n: int, amount: str, to: bytes = SHOP, symbol: str = "USDT") -> Transfer:
+    return Transfer(
+        n.to_bytes(32, "big"), 0, 100 + n, b"\xab" * 20, to,
+        int(Decimal(amount).scaleb(18)), timestamp=1_700_000_000, symbol=symbol,
+    )
+
+
+@pytest.fixture
+def book():
+    return InvoiceBook("invoices.db")
+
+
+def test_exact_due_has_priority(book):
+    older = book.create(SHOP, Decimal("10"))
+    exact = book.create(SHOP, Decimal("25"))
+    inv = book.match(_tx(1, "25"))
+    assert inv.id == exact.id and inv.status == PAID
+    assert book.invoices[older.id].status == OPEN
+
+
+def test_no_exact_match_goes_to_oldest_open(book):
+    oldest = book.create(SHOP, Decimal("10"))
+    book.create(SHOP, Decimal("20"))
+    book.create(OTHER, Decimal("3"))  # інша адреса не бере участі
+    inv = book.match(_tx(1, "3"))
+    assert inv.id == oldest.id and inv.status == PARTIAL
+    assert book.match(_tx(2, "1", symbol="USDC")) is None  # інший токен — не рахунок
+
+
+def test_partial_payment_reindexes_due(book):
+    inv = book.create(SHOP, Decimal("10"))
+    book.create(SHOP, Decimal("7"))
+    first = book.match(_tx(1, "4"))
+    assert first.status == PARTIAL and first.due == Decimal("6")
+    # залишок 6 — точний збіг, хоча новіший рахунок теж відкритий
+    second = book.match(_tx(2, "6"))
+    assert second.id == inv.id and second.status == PAID
+    assert second.payments == [_tx(1, "4").key, _tx(2, "6").key]
+
+
+def test_partial_invoice_stays_oldest(book):
+    oldest = book.create(SHOP, Decimal("10"))
+    book.create(SHOP, Decimal("20"))
+    book.match(_tx(1, "2"))
+    book.commit()
+    book.refresh()  # власні записи повертаються з бази — порядок не змінюється
+    assert book.match(_tx(2, "3")).id == oldest.id
+
+
+def test_overpay(book):
+    book.create(SHOP, Decimal("10"))
+    inv = book.match(_tx(1, "12.5"))
+    assert inv.status == OVERPAID and inv.due == Decimal("-2.5")
+    assert book.match(_tx(2, "1")) is None  # закритий рахунок більше не приймає платежів
+    assert len(book) == 0
+
+
+def test_repeated_transfer_applied_once(book):
+    book.create(SHOP, Decimal("10"))
+    first = book.match(_tx(1, "4"))
+    again = book.match(_tx(1, "4"))
+    assert again.id == first.id and again.received == Decimal("4")
+    book.commit()
+
+    reopened = InvoiceBook("invoices.db")  # applied відновлюється з payments у базі
+    assert reopened.match(_tx(1, "4")).received == Decimal("4")
+
+
+def test_match_snapshot_is_independent(book):
+    book.create(SHOP, Decimal("10"))
+    snap = book.match(_tx(1, "4"))
+    book.match(_tx(2, "6"))
+    assert snap.status == PARTIAL and snap.received == Decimal("4")
+
+
+def test_refresh_picks_up_other_process_writes(book):
+    cli = InvoiceBook("invoices.db")  # CLI пише в ту саму базу
+    created = cli.create(SHOP, Decimal("5"), order_ref="order-1")
+    assert book.match(_tx(1, "5")) is None  # ще не підхоплено
+    book.refresh()
+    assert book.match(_tx(2, "5")).id == created.id
+    book.commit()
+
+    cancelled = cli.create(SHOP, Decimal("8"))
+    book.refresh()
+    assert cli.cancel(cancelled.id)
+    book.refresh()
+    assert book.match(_tx(3, "8")) is None
+    cli.refresh()
+    assert cli.invoices[created.id].status == PAID
+
+
+def test_sweep_expires_by_heap(book):
+    short = book.create(SHOP, Decimal("10"), ttl_sec=60)
+    long = book.create(SHOP, Decimal("20"), ttl_sec=3600)
+    paid = book.create(SHOP, Decimal("30"), ttl_sec=60)
+    book.match(_tx(1, "30"))
+    book.commit()
+    now = time.time()
+    assert book.sweep(now) == []
+    expired = book.sweep(now + 61)
+    assert [inv.id for inv in expired] == [short.id]
+    assert book.invoices[short.id].status == EXPIRED
+    assert book.invoices[paid.id].status == PAID
+    assert book.match(_tx(2, "10")).id == long.id  # прострочений не приймає платежів
+    assert book.sweep(now + 61) == []
+
+    reopened = InvoiceBook("invoices.db")
+    assert reopened.invoices[short.id].status == EXPIRED
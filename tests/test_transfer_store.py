@@ -0,0 +1,97 @@
+"""TransferStore: запис без дублікатів, запити історії, видалення після реорганізації."""
+from decimal import Decimal
+
+import pytest
+
+from aggregates import Aggregates
+from transfer import OUTGOING, Transfer
+from transfer_store import TransferStore
+
+SHOP = b"\xcd" * 20
+PAYER = b"\xab" * 20
+BASE_TS = 1_700_000_000
+
+
+def _tx(n: int, block: int = 0, ts: int = 0, to: bytes = SHOP, sender: bytes = PAYER,
+        symbol: str = "USDT", value: int = 5 * 10 ** 18, **kwargs) -> Transfer:
+    return Transfer(
+        n.to_bytes(32, "big"), n % 3, block or 100 + n, sender, to, value,
+        timestamp=ts or BASE_TS + n * 60, symbol=symbol, contract=b"\x55" * 20,
+        block_hash=bytes([n]) * 32, **kwargs,
+    )
+
+
+@pytest.fixture
+def store():
+    return TransferStore("transfers.db")
+
+
+def test_add_ignores_repeats_and_roundtrips(store):
+    big = _tx(1, value=2 ** 200)  # uint256 — не вміщується в INTEGER SQLite
+    assert store.add([big, _tx(2)]) == 2
+    assert store.add([big, _tx(3)]) == 1
+    assert store.add([]) == 0
+    assert store.count() == 3
+
+    reopened = TransferStore("transfers.db")
+    (row,) = reopened.block_range(101, 101)
+    for field in Transfer.__slots__:
+        if not field.startswith("_"):
+            assert getattr(row, field) == getattr(big, field), field
+    assert row.key == big.key
+
+
+def test_last_skips_outgoing_and_filters(store):
+    store.add([
+        _tx(1), _tx(2, symbol="USDC"), _tx(3, to=b"\xee" * 20),
+        _tx(4, direction=OUTGOING, to=PAYER, sender=SHOP),
+    ])
+    assert [tx.key for tx in store.last(10)] == [_tx(n).key for n in (3, 2, 1)]
+    assert [tx.key for tx in store.last(1)] == [_tx(3).key]
+    assert [tx.key for tx in store.last(10, address=SHOP)] == [_tx(n).key for n in (2, 1)]
+    assert [tx.key for tx in store.last(10, symbol="usdc")] == [_tx(2).key]
+
+
+def test_sender_recipient_and_time_queries(store):
+    other = b"\x11" * 20
+    store.add([_tx(1), _tx(2, sender=other), _tx(3), _tx(4, symbol="USDC")])
+    assert [tx.key for tx in store.from_sender(PAYER)] == [_tx(n).key for n in (4, 3, 1)]
+    assert [tx.key for tx in store.from_sender(PAYER, since=BASE_TS + 150)] == [_tx(n).key for n in (4, 3)]
+    assert [tx.key for tx in store.to_recipient(SHOP, since=BASE_TS + 120)] == [_tx(n).key for n in (4, 3, 2)]
+    window = (BASE_TS + 60, BASE_TS + 240)  # [start, end)
+    assert [tx.key for tx in store.time_range(*window)] == [_tx(n).key for n in (1, 2, 3)]
+    assert store.time_range(*window, symbol="USDC") == []
+    assert sum(tx.amount for tx in store.time_range(*window)) == Decimal(15)
+
+
+def test_block_range_is_per_chain(store):
+    store.add([_tx(1, block=500), _tx(2, block=500, chain="polygon"), _tx(3, block=510)])
+    assert [tx.key for tx in store.block_range(500, 510)] == [_tx(1, block=500).key, _tx(3, block=510).key]
+    (poly,) = store.block_range(500, 510, "polygon")
+    assert poly.chain == "polygon" and poly.key.startswith("polygon:")
+
+
+def test_remove_by_keys(store):
+    poly = _tx(2, chain="polygon")
+    store.add([_tx(1), poly, _tx(3)])
+    assert store.remove([_tx(1).key, poly.key, _tx(9).key]) == 2
+    assert [tx.key for tx in store.last(10)] == [_tx(3).key]
+
+
+def test_bot_store_follows_reorg(node, bot):
+    bot.store = TransferStore("transfers.db")
+    bot.aggregates = Aggregates("aggregates.db")  # журнал неостаточних блоків — з агрегатів
+    start = bot.start_block
+    node.transfer(start + 1)
+    node.transfer(start + 2)
+    node.head = start + 3
+    bot.check_new_transactions()
+    assert bot.store.count() == 2
+
+    node.reorg(start + 1, keep=True)
+    node.reorg(start + 2)
+    node.head = start + 4
+    bot.check_new_transactions()
+    (kept,) = bot.store.block_range(start, start + 4)
+    assert kept.block_number == start + 1
+    assert kept.block_hash == bytes.fromhex(node.block_hash(start + 1)[2:])
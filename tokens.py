@@ -0,0 +1,191 @@
+"""
+Реєстр BEP-20 токенів для моніторингу.
+
+Усі контракти йдуть одним get_logs (address = список), тож новий токен
+не додає RPC-викликів за цикл. decimals/symbol читаються один раз
+пакетним eth_call (вузол без batch — по одному eth_call) і зберігаються
+в TOKENS_CACHE_FILE; мінімальна сума задається окремо для кожного
+токена (MIN_AMOUNTS).
+З TRACK_NATIVE реєстр містить і BNB під порожньою адресою контракту.
+"""
+import asyncio
+import json
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from eth_utils import to_checksum_address
+from native import NATIVE_DECIMALS, NATIVE_SYMBOL
+from config import TOKEN_CONTRACTS, MIN_AMOUNTS, MIN_AMOUNT_USDT, TOKENS_CACHE_FILE, TRACK_NATIVE
+
+DECIMALS_SELECTOR = "0x313ce567"  # decimals()
+SYMBOL_SELECTOR = "0x95d89b41"    # symbol()
+
+
+def decode_abi_string(data: Any) -> str:
+    """Результат symbol(): ABI string або bytes32 (старі контракти)."""
+    if not data or data == "0x":
+        return ""
+    raw = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    if len(raw) == 32:
+        return raw.rstrip(b"\0").decode("utf-8", "replace")
+    if len(raw) >= 64:
+        offset = int.from_bytes(raw[:32], "big")
+        length = int.from_bytes(raw[offset:offset + 32], "big")
+        return raw[offset + 32:offset + 32 + length].decode("utf-8", "replace")
+    return ""
+
+
+class Token:
+    __slots__ = ("address", "checksum", "symbol", "decimals", "min_amount")
+
+    def __init__(self, address: bytes, checksum: str, symbol: str, decimals: int, min_amount: Decimal):
+        self.address = address
+        self.checksum = checksum
+        self.symbol = symbol
+        self.decimals = decimals
+        self.min_amount = min_amount
+
+    def __repr__(self) -> str:
+        return f"Token({self.symbol}, {self.checksum}, decimals={self.decimals})"
+
+
+class TokenRegistry:
+    def __init__(
+        self,
+        contracts: Optional[List[str]] = None,
+        cache_file: Optional[str] = TOKENS_CACHE_FILE,
+        native_symbol: str = NATIVE_SYMBOL,
+    ):
+        self.cache_file = cache_file
+        self.tokens: Dict[bytes, Token] = {}
+        self._checksums: Dict[bytes, str] = {}
+        for contract in contracts if contracts is not None else TOKEN_CONTRACTS:
+            checksum = to_checksum_address(contract)
+            self._checksums[bytes.fromhex(checksum[2:])] = checksum
+        if TRACK_NATIVE:
+            threshold = MIN_AMOUNTS.get(native_symbol, MIN_AMOUNT_USDT)
+            self.tokens[b""] = Token(b"", "", native_symbol, NATIVE_DECIMALS, Decimal(str(threshold)))
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __iter__(self) -> Iterator[Token]:
+        return iter(self.tokens.values())
+
+    def get(self, address: bytes) -> Optional[Token]:
+        return self.tokens.get(address)
+
+    @property
+    def addresses(self) -> List[str]:
+        """Checksum-адреси контрактів для get_logs / eth_newFilter."""
+        return list(self._checksums.values())
+
+    @property
+    def address_bytes(self) -> List[bytes]:
+        return list(self._checksums)
+
+    @property
+    def unresolved(self) -> List[str]:
+        return [c for a, c in self._checksums.items() if a not in self.tokens]
+
+    # --- метадані ---
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_cache(self, data: Dict[str, Dict]):
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти кеш токенів: {e}", flush=True)
+
+    def resolve(
+        self,
+        rpc_batch: Callable[[List[Tuple[str, list]]], List[Any]],
+        rpc_call: Optional[Callable[[str, list], Any]] = None,
+    ):
+        """
+        Заповнює decimals/symbol: спершу з кешу, решта — одним batch eth_call
+        (по два виклики на контракт). Якщо batch не вдався — по одному
+        виклику через rpc_call. Якщо вузол не відповів, токен пропускається
+        до наступного resolve().
+        """
+        cache = self._load_cache()
+        unknown, calls = self._metadata_calls(cache)
+        if unknown:
+            try:
+                results = rpc_batch(calls)
+            except Exception as e:
+                print(f"⚠️ Метадані токенів (batch): {e}", flush=True)
+                results = [None] * len(calls)
+                if rpc_call is not None:
+                    for i, (method, params) in enumerate(calls):
+                        try:
+                            results[i] = rpc_call(method, params)
+                        except Exception as e:
+                            print(f"⚠️ Метадані токенів: {e}", flush=True)
+            self._store_metadata(cache, unknown, results)
+        self._fill(cache)
+
+    async def resolve_async(
+        self,
+        rpc_batch: Callable[[List[Tuple[str, list]]], Awaitable[List[Any]]],
+        rpc_call: Optional[Callable[[str, list], Awaitable[Any]]] = None,
+    ):
+        """resolve() з асинхронними batch- і одиничною функціями."""
+        cache = self._load_cache()
+        unknown, calls = self._metadata_calls(cache)
+        if unknown:
+            try:
+                results = await rpc_batch(calls)
+            except Exception as e:
+                print(f"⚠️ Метадані токенів (batch): {e}", flush=True)
+                results = [None] * len(calls)
+                if rpc_call is not None:
+                    single = await asyncio.gather(
+                        *(rpc_call(method, params) for method, params in calls), return_exceptions=True,
+                    )
+                    results = [None if isinstance(r, BaseException) else r for r in single]
+            self._store_metadata(cache, unknown, results)
+        self._fill(cache)
+
+    def _metadata_calls(self, cache: Dict[str, Dict]) -> Tuple[List[bytes], List[Tuple[str, list]]]:
+        unknown = [addr for addr in self._checksums if "0x" + addr.hex() not in cache]
+        calls: List[Tuple[str, list]] = []
+        for addr in unknown:
+            to = self._checksums[addr]
+            calls.append(("eth_call", [{"to": to, "data": DECIMALS_SELECTOR}, "latest"]))
+            calls.append(("eth_call", [{"to": to, "data": SYMBOL_SELECTOR}, "latest"]))
+        return unknown, calls
+
+    def _store_metadata(self, cache: Dict[str, Dict], unknown: List[bytes], results: List[Any]):
+        for i, addr in enumerate(unknown):
+            decimals_hex, symbol_hex = results[2 * i], results[2 * i + 1]
+            if not decimals_hex or decimals_hex == "0x":
+                print(f"⚠️ Не вдалося прочитати decimals для {self._checksums[addr]}", flush=True)
+                continue
+            cache["0x" + addr.hex()] = {
+                "decimals": int(decimals_hex, 16),
+                "symbol": decode_abi_string(symbol_hex) or "?",
+            }
+        self._save_cache(cache)
+
+    def _fill(self, cache: Dict[str, Dict]):
+        for addr, checksum in self._checksums.items():
+            meta = cache.get("0x" + addr.hex())
+            if not meta:
+                continue
+            symbol = meta["symbol"]
+            threshold = MIN_AMOUNTS.get(symbol.upper(), MIN_AMOUNTS.get(checksum.lower(), MIN_AMOUNT_USDT))
+            self.tokens[addr] = Token(addr, checksum, symbol, int(meta["decimals"]), Decimal(str(threshold)))
+
+    def describe(self) -> str:
+        return ", ".join(f"{t.symbol} (≥ {t.min_amount})" for t in self) or "—"
@@ -0,0 +1,217 @@
+"""
+Компактний запис переказу токена (BEP-20 Transfer).
+
+Зберігає сирі значення (int/bytes) замість рядків. Сума у Decimal,
+hex-представлення та словник для Telegram обчислюються ліниво —
+лише при першому зверненні, далі береться кешоване значення.
+"""
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from typing import Any, Dict
+
+KYIV_TZ = timezone(timedelta(hours=2))
+
+# Напрямок переказу відносно списку наших адрес
+INCOMING = "in"
+OUTGOING = "out"
+SELF = "self"  # відправник і отримувач — обидва наші
+
+# Мережа, ключі переказів якої без префікса (сумісність з processed_txs до chains.py)
+DEFAULT_CHAIN = "bsc"
+_ADDRESS_TAIL = slice(-20, None)
+
+
+def raw_bytes(val: Any) -> bytes:
+    """HexBytes / bytes / hex-рядок -> bytes (bytes повертаються без копіювання)."""
+    if val is None:
+        return b""
+    if isinstance(val, bytes):
+        return val
+    if isinstance(val, bytearray):
+        return bytes(val)
+    s = str(val)
+    if s.startswith("0x"):
+        s = s[2:]
+    if len(s) % 2:
+        s = "0" + s
+    return bytes.fromhex(s)
+
+
+def raw_int(val: Any) -> int:
+    """int / hex-рядок / HexBytes -> int."""
+    if val is None:
+        return 0
+    if isinstance(val, int):
+        return val
+    if isinstance(val, (bytes, bytearray)):
+        return int.from_bytes(val, "big")
+    s = str(val)
+    if s.startswith("0x"):
+        return int(s, 16) if len(s) > 2 else 0
+    return int(s)
+
+
+class Transfer:
+    """Незмінний запис одного Transfer-логу."""
+
+    __slots__ = (
+        "tx_hash", "log_index", "block_number", "block_hash",
+        "from_addr", "to_addr", "value", "decimals", "symbol",
+        "contract", "timestamp", "direction", "chain", "suspect",
+        "_amount", "_formatted",
+    )
+
+    def __init__(
+        self,
+        tx_hash: bytes,
+        log_index: int,
+        block_number: int,
+        from_addr: bytes,
+        to_addr: bytes,
+        value: int,
+        timestamp: int = 0,
+        decimals: int = 18,
+        symbol: str = "USDT",
+        contract: bytes = b"",
+        block_hash: bytes = b"",
+        direction: str = INCOMING,
+        chain: str = DEFAULT_CHAIN,
+        suspect: str = "",
+    ):
+        s = object.__setattr__
+        s(self, "tx_hash", tx_hash)
+        s(self, "log_index", log_index)
+        s(self, "block_number", block_number)
+        s(self, "block_hash", block_hash)
+        s(self, "from_addr", from_addr)
+        s(self, "to_addr", to_addr)
+        s(self, "value", value)
+        s(self, "decimals", decimals)
+        s(self, "symbol", symbol)
+        s(self, "contract", contract)
+        s(self, "timestamp", timestamp)
+        s(self, "direction", direction)
+        s(self, "chain", chain)
+        s(self, "suspect", suspect)  # вердикт спам-фільтра (схожа адреса, частота); "" — чистий
+        s(self, "_amount", None)
+        s(self, "_formatted", None)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("Transfer незмінний")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("Transfer незмінний")
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Transfer):
+            return NotImplemented
+        return self.tx_hash == other.tx_hash and self.log_index == other.log_index and self.chain == other.chain
+
+    def __hash__(self) -> int:
+        return hash((self.tx_hash, self.log_index, self.chain))
+
+    def __repr__(self) -> str:
+        return (
+            f"Transfer({self.hash[:12]}… #{self.log_index} блок {self.block_number}: "
+            f"{self.amount} {self.symbol})"
+        )
+
+    # --- ліниві представлення ---
+
+    @property
+    def hash(self) -> str:
+        return "0x" + bytes.hex(self.tx_hash)
+
+    @property
+    def key(self) -> str:
+        """Унікальний ключ переказу: хеш + індекс логу; поза bsc — з префіксом мережі."""
+        if self.chain == DEFAULT_CHAIN:
+            return f"{self.hash}:{self.log_index}"
+        return f"{self.chain}:{self.hash}:{self.log_index}"
+
+    @property
+    def from_address(self) -> str:
+        return "0x" + bytes.hex(self.from_addr)
+
+    @property
+    def to_address(self) -> str:
+        return "0x" + bytes.hex(self.to_addr)
+
+    @property
+    def contract_address(self) -> str:
+        return "0x" + bytes.hex(self.contract) if self.contract else ""
+
+    @property
+    def is_incoming(self) -> bool:
+        return self.direction != OUTGOING
+
+    @property
+    def amount(self) -> Decimal:
+        """Точна сума у токенах (value / 10**decimals)."""
+        amount = self._amount
+        if amount is None:
+            amount = Decimal(self.value).scaleb(-self.decimals)
+            object.__setattr__(self, "_amount", amount)
+        return amount
+
+    @property
+    def time_str(self) -> str:
+        if not self.timestamp:
+            return "N/A"
+        return datetime.fromtimestamp(self.timestamp, tz=KYIV_TZ).strftime("%Y-%m-%d %H:%M:%S (Київ)")
+
+    @property
+    def formatted(self) -> Dict:
+        """Словник для виводу/Telegram; будується один раз."""
+        formatted = self._formatted
+        if formatted is None:
+            formatted = {
+                "hash": self.hash,
+                "amount": self.amount,
+                "symbol": self.symbol,
+                "from_address": self.from_address,
+                "to_address": self.to_address,
+                "timestamp": self.time_str,
+                "is_incoming": self.is_incoming,
+                "direction": self.direction,
+                "contract_address": self.contract_address,
+                "block_number": self.block_number,
+                "chain": self.chain,
+                "suspect": self.suspect,
+            }
+            object.__setattr__(self, "_formatted", formatted)
+        return formatted
+
+
+def decode_transfer_log(
+    lg: Any,
+    timestamp: int = 0,
+    decimals: int = 18,
+    symbol: str = "USDT",
+    direction: str = INCOMING,
+    chain: str = DEFAULT_CHAIN,
+    suspect: str = "",
+) -> Transfer:
+    """
+    Декодує Transfer-лог (AttributeDict з web3 або сирий JSON-RPC dict).
+    topics[1]/topics[2] — 32-байтові слова, адреса в останніх 20 байтах.
+    Вже розібрані web3 bytes-значення зберігаються без копіювання;
+    зріз через bytes.__getitem__ оминає повільний HexBytes.__getitem__.
+    """
+    topics = lg["topics"]
+    return Transfer(
+        tx_hash=raw_bytes(lg.get("transactionHash")),
+        log_index=raw_int(lg.get("logIndex")),
+        block_number=raw_int(lg.get("blockNumber")),
+        from_addr=bytes.__getitem__(raw_bytes(topics[1]), _ADDRESS_TAIL),
+        to_addr=bytes.__getitem__(raw_bytes(topics[2]), _ADDRESS_TAIL),
+        value=int.from_bytes(raw_bytes(lg.get("data")), "big"),
+        timestamp=timestamp,
+        decimals=decimals,
+        symbol=symbol,
+        contract=raw_bytes(lg.get("address")),
+        block_hash=raw_bytes(lg.get("blockHash")),
+        direction=direction,
+        chain=chain,
+        suspect=suspect,
+    )
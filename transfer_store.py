@@ -0,0 +1,188 @@
+"""
+Локальне сховище знайдених переказів (SQLite) для історії та звітів.
+
+Кожен переказ, знайдений ботом, записується сюди один раз (ключ — хеш
+транзакції + індекс логу) разом з мережею (chains.py). Індекси за блоком, відправником, отримувачем,
+токеном і часом — запити на кшталт "усі платежі від X за місяць" чи
+"останні N" виконуються за мілісекунди без звернення до ланцюга.
+
+Запуск:
+    python transfer_store.py last [N] [адреса]
+    python transfer_store.py from <адреса> [днів]
+    python transfer_store.py to <адреса> [днів]
+    python transfer_store.py range <YYYY-MM-DD> <YYYY-MM-DD> [токен]
+    python transfer_store.py blocks <від> <до> [мережа]
+"""
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional
+from transfer import DEFAULT_CHAIN, KYIV_TZ, Transfer
+from watchlist import parse_address
+from config import TRANSFER_STORE_DB
+
+_COLUMNS = (
+    "tx_hash, log_index, block_number, block_hash, timestamp, contract, symbol,"
+    " decimals, from_addr, to_addr, value, direction, chain"
+)
+
+
+def _row_to_transfer(row) -> Transfer:
+    return Transfer(
+        tx_hash=row[0], log_index=row[1], block_number=row[2], block_hash=row[3],
+        timestamp=row[4], contract=row[5], symbol=row[6], decimals=row[7],
+        from_addr=row[8], to_addr=row[9], value=int(row[10]), direction=row[11], chain=row[12],
+    )
+
+
+class TransferStore:
+    def __init__(self, path: str = TRANSFER_STORE_DB):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        # value — TEXT: uint256 не вміщується в INTEGER SQLite
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS transfers ("
+            " tx_hash BLOB NOT NULL, log_index INTEGER NOT NULL,"
+            " block_number INTEGER NOT NULL, block_hash BLOB, timestamp INTEGER NOT NULL,"
+            " contract BLOB NOT NULL, symbol TEXT NOT NULL, decimals INTEGER NOT NULL,"
+            " from_addr BLOB NOT NULL, to_addr BLOB NOT NULL, value TEXT NOT NULL,"
+            " direction TEXT NOT NULL, chain TEXT NOT NULL DEFAULT '" + DEFAULT_CHAIN + "',"
+            " PRIMARY KEY (tx_hash, log_index)) WITHOUT ROWID"
+        )
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(transfers)")}
+        if "chain" not in columns:  # сховище до chains.py: усі перекази — основної мережі
+            self.db.execute(f"ALTER TABLE transfers ADD COLUMN chain TEXT NOT NULL DEFAULT '{DEFAULT_CHAIN}'")
+        for name, cols in (
+            ("transfers_block", "block_number"),
+            ("transfers_time", "timestamp"),
+            ("transfers_from", "from_addr, timestamp"),
+            ("transfers_to", "to_addr, timestamp"),
+            ("transfers_symbol", "symbol, timestamp"),
+        ):
+            self.db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON transfers({cols})")
+        self.db.commit()
+
+    def add(self, transfers: Iterable[Transfer]) -> int:
+        """Записує перекази однією транзакцією; повторні ігноруються."""
+        rows = [
+            (
+                tx.tx_hash, tx.log_index, tx.block_number, tx.block_hash, tx.timestamp,
+                tx.contract, tx.symbol, tx.decimals, tx.from_addr, tx.to_addr,
+                str(tx.value), tx.direction, tx.chain,
+            )
+            for tx in transfers
+        ]
+        if not rows:
+            return 0
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                f"INSERT OR IGNORE INTO transfers ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self.db.total_changes - before
+
+    def _query(self, where: str, params: tuple, order: str = "block_number DESC, log_index DESC",
+               limit: Optional[int] = None) -> List[Transfer]:
+        sql = f"SELECT {_COLUMNS} FROM transfers WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [_row_to_transfer(row) for row in self.db.execute(sql, params)]
+
+    def remove(self, keys: Iterable[str]) -> int:
+        """Видаляє перекази за ключами Transfer.key (відкликані реорганізацією)."""
+        rows = []
+        for key in keys:
+            tx_hash, log_index = key.split(":")[-2:]
+            rows.append((bytes.fromhex(tx_hash[2:]), int(log_index)))
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany("DELETE FROM transfers WHERE tx_hash = ? AND log_index = ?", rows)
+            return self.db.total_changes - before
+
+    # --- запити ---
+
+    def last(self, n: int = 10, address: Optional[bytes] = None, symbol: Optional[str] = None) -> List[Transfer]:
+        """Останні n вхідних переказів (на адресу і/або в токені, якщо задані)."""
+        where, params = ["direction != 'out'"], []
+        if address is not None:
+            where.append("to_addr = ?")
+            params.append(address)
+        if symbol is not None:
+            where.append("symbol = ?")
+            params.append(symbol.upper())
+        return self._query(" AND ".join(where), tuple(params), order="timestamp DESC, log_index DESC", limit=n)
+
+    def from_sender(self, sender: bytes, since: int = 0) -> List[Transfer]:
+        return self._query("from_addr = ? AND timestamp >= ?", (sender, since), order="timestamp DESC")
+
+    def to_recipient(self, recipient: bytes, since: int = 0) -> List[Transfer]:
+        return self._query("to_addr = ? AND timestamp >= ?", (recipient, since), order="timestamp DESC")
+
+    def time_range(self, start_ts: int, end_ts: int, symbol: Optional[str] = None) -> List[Transfer]:
+        if symbol is not None:
+            return self._query(
+                "symbol = ? AND timestamp >= ? AND timestamp < ?", (symbol.upper(), start_ts, end_ts),
+                order="timestamp",
+            )
+        return self._query("timestamp >= ? AND timestamp < ?", (start_ts, end_ts), order="timestamp")
+
+    def block_range(self, start_block: int, end_block: int, chain: str = DEFAULT_CHAIN) -> List[Transfer]:
+        """Номери блоків — свої в кожній мережі, тож діапазон завжди в одній мережі."""
+        return self._query(
+            "block_number BETWEEN ? AND ? AND chain = ?", (start_block, end_block, chain),
+            order="block_number, log_index",
+        )
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM transfers").fetchone()[0]
+
+
+def _parse_date(text: str) -> int:
+    return int(datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=KYIV_TZ).timestamp())
+
+
+def _print(transfers: List[Transfer], elapsed: float):
+    for tx in transfers:
+        arrow = "📤" if tx.direction == "out" else "💰"
+        print(
+            f"{arrow} {tx.time_str}  {tx.amount:>14.2f} {tx.symbol:<5} "
+            f"{tx.from_address} → {tx.to_address}  блок {tx.block_number}  {tx.hash}"
+        )
+    print(f"Знайдено: {len(transfers)} за {elapsed * 1000:.1f} мс")
+
+
+def main():
+    commands = ("last", "from", "to", "range", "blocks")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        return
+    if not TRANSFER_STORE_DB:
+        print("❌ Не задано TRANSFER_STORE_DB")
+        return
+    store = TransferStore()
+    cmd, args = sys.argv[1], sys.argv[2:]
+    t0 = time.perf_counter()
+    try:
+        if cmd == "last":
+            n = int(args[0]) if args else 10
+            address = parse_address(args[1]) if len(args) > 1 else None
+            result = store.last(n, address)
+        elif cmd in ("from", "to"):
+            since = int(time.time() - float(args[1]) * 86400) if len(args) > 1 else 0
+            address = parse_address(args[0])
+            result = store.from_sender(address, since) if cmd == "from" else store.to_recipient(address, since)
+        elif cmd == "range":
+            result = store.time_range(_parse_date(args[0]), _parse_date(args[1]), args[2] if len(args) > 2 else None)
+        else:
+            result = store.block_range(int(args[0]), int(args[1]), args[2] if len(args) > 2 else DEFAULT_CHAIN)
+    except (IndexError, ValueError) as e:
+        print(f"❌ {e}\n{__doc__}")
+        return
+    _print(result, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 import sys
 import time
 from web3 import Web3
+from bscscan_client import make_web3
 from config import QUICKNODE_BSC_NODE, WALLET_ADDRESS, INITIAL_CONNECTION_DELAY
 
 USDT_CONTRACT = "0x55d398326f99059fF775485246999027B3197955"
@@ -36,7 +37,7 @@ def main():
     print()
 
     rpc = QUICKNODE_BSC_NODE.rstrip("/")
-    w3 = Web3(Web3.HTTPProvider(rpc, request_kwargs={"timeout": 30}))
+    w3 = make_web3(rpc)
     print(f"Підключення до {rpc[:50]}...")
     print(f"Блок: {w3.eth.block_number}")
     print()
@@ -0,0 +1,299 @@
+"""
+Список адрес для моніторингу (депозитні адреси клієнтів).
+
+- Адреси з файлу (одна на рядок, # — коментар) або з SQLite-таблиці
+  watch_addresses(address); зміни підхоплюються без перезапуску
+- AddressSet — відкрита адресація по одному bytearray з 20-байтовими
+  слотами: O(1) перевірка topics[2] без створення Python-об'єкта
+  на кожну адресу: ~55 байтів/адресу проти ~95 у set з bytes, понад
+  1 млн перевірок/сек (див. bench_watchlist.py)
+- Стратегія запиту: для невеликого списку — OR-список у topics[2]
+  (фільтрація на вузлі), для великого — всі логи і фільтрація тут
+
+Запуск:
+    python watchlist.py list
+    python watchlist.py add 0x...
+    python watchlist.py remove 0x...
+"""
+import os
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional
+from config import (
+    WALLET_ADDRESS, WATCHLIST_FILE, WATCHLIST_DB, WATCHLIST_RELOAD_SEC,
+)
+
+_EMPTY, _USED, _DELETED = 0, 1, 2
+_ADDRESS_TAIL = slice(-20, None)
+
+
+def parse_address(text: str) -> bytes:
+    """'0x…' (40 hex) -> 20 байтів."""
+    text = text.strip().lower()
+    if text.startswith("0x"):
+        text = text[2:]
+    if len(text) != 40:
+        raise ValueError(f"Некоректна адреса: {text!r}")
+    return bytes.fromhex(text)
+
+
+class AddressSet:
+    """
+    Хеш-множина 20-байтових адрес у суцільному bytearray.
+    Порівняння слота — bytearray.startswith(addr, offset) без алокацій.
+    """
+
+    def __init__(self, addresses: Iterable[bytes] = (), capacity: int = 16):
+        self._count = 0
+        self._used = 0  # зайняті + видалені слоти
+        self._alloc(capacity)
+        for addr in addresses:
+            self.add(addr)
+
+    def _alloc(self, capacity: int):
+        size = 16
+        while size < capacity:
+            size <<= 1
+        self._mask = size - 1
+        self._slots = bytearray(size * 20)
+        self._state = bytearray(size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _probe(self, addr: bytes) -> int:
+        """Індекс слота з addr або перший вільний слот для вставки."""
+        mask = self._mask
+        slots = self._slots
+        state = self._state
+        i = hash(addr) & mask
+        first_deleted = -1
+        while True:
+            st = state[i]
+            if st == _EMPTY:
+                return first_deleted if first_deleted >= 0 else i
+            if st == _USED:
+                if slots.startswith(addr, i * 20):
+                    return i
+            elif first_deleted < 0:
+                first_deleted = i
+            i = (i + 1) & mask
+
+    def __contains__(self, addr: bytes) -> bool:
+        mask = self._mask
+        slots = self._slots
+        state = self._state
+        i = hash(addr) & mask
+        while True:
+            st = state[i]
+            if st == _EMPTY:
+                return False
+            if st == _USED and slots.startswith(addr, i * 20):
+                return True
+            i = (i + 1) & mask
+
+    def contains_word(self, word: bytes) -> bool:
+        """32-байтовий topic -> чи є адреса (останні 20 байтів) у множині."""
+        return bytes.__getitem__(word, _ADDRESS_TAIL) in self
+
+    def add(self, addr: bytes) -> bool:
+        if (self._used + 1) * 2 > len(self._state):
+            self._rehash(max(16, self._count * 4))
+        i = self._probe(addr)
+        if self._state[i] == _USED:
+            return False
+        if self._state[i] == _EMPTY:
+            self._used += 1
+        self._state[i] = _USED
+        self._slots[i * 20:(i + 1) * 20] = addr
+        self._count += 1
+        return True
+
+    def discard(self, addr: bytes) -> bool:
+        i = self._probe(addr)
+        if self._state[i] != _USED:
+            return False
+        self._state[i] = _DELETED
+        self._count -= 1
+        return True
+
+    def __iter__(self) -> Iterator[bytes]:
+        slots = self._slots
+        for i, st in enumerate(self._state):
+            if st == _USED:
+                yield bytes(slots[i * 20:(i + 1) * 20])
+
+    def _rehash(self, capacity: int):
+        old = list(self)
+        self._count = 0
+        self._used = 0
+        self._alloc(capacity)
+        for addr in old:
+            self.add(addr)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._slots) + len(self._state)
+
+
+class WatchList:
+    """
+    Адреси для моніторингу з гарячим перезавантаженням.
+    WALLET_ADDRESS присутній завжди.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = WATCHLIST_FILE,
+        db_path: Optional[str] = WATCHLIST_DB,
+        reload_sec: float = WATCHLIST_RELOAD_SEC,
+    ):
+        self.path = path or None
+        self.db_path = db_path or None
+        self.reload_sec = reload_sec
+        self.addresses = AddressSet()
+        self.version = 0
+        self._stat = (0.0, -1)  # (mtime, розмір) файлу на момент читання
+        self._loaded_at = 0.0
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def __contains__(self, addr: bytes) -> bool:
+        return addr in self.addresses
+
+    def contains_word(self, word: bytes) -> bool:
+        return self.addresses.contains_word(word)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self.addresses)
+
+    # --- джерела ---
+
+    def _read_file(self) -> List[bytes]:
+        out = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    out.append(parse_address(line))
+        return out
+
+    def _db(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path)
+        db.execute("CREATE TABLE IF NOT EXISTS watch_addresses (address TEXT PRIMARY KEY)")
+        return db
+
+    def _read_db(self) -> List[bytes]:
+        with self._db() as db:
+            return [parse_address(row[0]) for row in db.execute("SELECT address FROM watch_addresses")]
+
+    def _file_stat(self):
+        st = os.stat(self.path)
+        return st.st_mtime, st.st_size
+
+    def reload(self) -> bool:
+        """
+        Перечитує файл і БД. version зростає, лише якщо набір адрес справді
+        змінився: клієнти не перебудовують bloom-запит на кожне перечитування.
+        """
+        addresses = AddressSet(capacity=len(self.addresses) * 2)
+        addresses.add(parse_address(WALLET_ADDRESS))
+        if self.path and os.path.exists(self.path):
+            self._stat = self._file_stat()
+            for addr in self._read_file():
+                addresses.add(addr)
+        if self.db_path:
+            for addr in self._read_db():
+                addresses.add(addr)
+        self._loaded_at = time.monotonic()
+        current = self.addresses
+        if self.version and len(addresses) == len(current) and all(addr in current for addr in addresses):
+            return False
+        self.addresses = addresses
+        self.version += 1
+        return True
+
+    def refresh(self) -> bool:
+        """
+        Перечитує джерело, якщо змінились mtime або розмір файлу чи минув
+        WATCHLIST_RELOAD_SEC для БД. True — змінився набір адрес.
+        """
+        stale = False
+        if self.path and os.path.exists(self.path) and self._file_stat() != self._stat:
+            stale = True
+        if self.db_path and time.monotonic() - self._loaded_at >= self.reload_sec:
+            stale = True
+        if not stale:
+            return False
+        before = len(self.addresses)
+        changed = self.reload()
+        if changed:
+            print(f"📋 Список адрес оновлено: {before} → {len(self.addresses)}", flush=True)
+        return changed
+
+    # --- гаряче додавання/видалення ---
+
+    def add(self, address: str):
+        addr = parse_address(address)
+        if self.db_path:
+            with self._db() as db:
+                db.execute("INSERT OR IGNORE INTO watch_addresses (address) VALUES (?)", ("0x" + addr.hex(),))
+        elif self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("0x" + addr.hex() + "\n")
+            self._stat = self._file_stat()
+        if self.addresses.add(addr):
+            self.version += 1
+
+    def remove(self, address: str):
+        addr = parse_address(address)
+        if self.db_path:
+            with self._db() as db:
+                db.execute("DELETE FROM watch_addresses WHERE address = ?", ("0x" + addr.hex(),))
+        elif self.path and os.path.exists(self.path):
+            kept = [a for a in self._read_file() if a != addr]
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.writelines("0x" + a.hex() + "\n" for a in kept)
+            self._stat = self._file_stat()
+        if self.addresses.discard(addr):
+            self.version += 1
+
+    # --- стратегія запиту ---
+
+    def server_topics(self, max_server: int) -> Optional[List[str]]:
+        """
+        OR-список для topics[2], якщо адрес не більше max_server;
+        None — запитувати всі логи і фільтрувати на клієнті.
+        """
+        if max_server <= 0 or len(self.addresses) > max_server:
+            return None
+        return ["0x" + "00" * 12 + addr.hex() for addr in self.addresses]
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("list", "add", "remove"):
+        print(__doc__)
+        return
+    watch = WatchList()
+    cmd = sys.argv[1]
+    if cmd == "list":
+        for addr in watch:
+            print("0x" + addr.hex())
+        print(f"Усього: {len(watch)}")
+        return
+    if not watch.path and not watch.db_path:
+        print("❌ Не задано WATCHLIST_FILE або WATCHLIST_DB")
+        return
+    for address in sys.argv[2:]:
+        if cmd == "add":
+            watch.add(address)
+        else:
+            watch.remove(address)
+    print(f"✅ Готово. Адрес у списку: {len(watch)}")
+
+
+if __name__ == "__main__":
+    main()